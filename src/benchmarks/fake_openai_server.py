@@ -0,0 +1,290 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint
+
+Point the SDK at it with OPENAI_BASE_URL=<server.base_url>. Responses are canned
+enrichment and newsletter outputs derived deterministically from the request, or
+replayed from the llm_cache.db of a real run. Streamed requests get the same text as
+server-sent events, line by line, with the latency spread over the lines.
+"""
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from services.openai.response_cache import ResponseCache
+
+LOCATIONS = [
+    ("portugal", "lisbon"), ("spain", "madrid"), ("france", "paris"), ("italy", "rome"),
+    ("japan", "tokyo"), ("thailand", "bangkok"), ("mexico", "mexico city"), ("greece", "athens"),
+    ("portugal", "porto"), ("japan", "kyoto"),
+]
+# First matching keyword decides the content type, like a model reading the headline would
+CONTENT_TYPE_KEYWORDS = [
+    ("deal", ("$", "sale", "cheap")),
+    ("guide", ("guide", "weekend")),
+    ("news", ("opens", "announces", "new ")),
+    ("tip", ("how to", "pack", "tips")),
+]
+
+NEWSLETTER_MARKDOWN = """# Introduction
+Welcome to this week's edition.
+
+# Featured Deals
+## Cheap flights to Lisbon
+Round trips from $299.
+
+# Destination Guides
+## A weekend in Porto
+Where to eat and stay.
+
+# Travel News
+## New routes this winter
+Airlines add capacity to southern Europe.
+
+# Travel Tips
+Book midweek for the best fares.
+
+# Conclusion
+Safe travels!
+"""
+
+SEASONAL_MARKDOWN = """# Seasonal Inspiration
+## Winter festivals
+Markets and lights worth planning around.
+
+"""
+
+_PACKED_IDS = re.compile(r"^### ARTICLE (\S+)$", re.MULTILINE)
+
+
+def canned_enrichment(text: str) -> Dict:
+    """Enrichment output that depends only on the article text"""
+    seed = zlib.crc32(text.encode("utf-8"))
+    lowered = text.lower()
+    country, city = next(
+        (location for location in LOCATIONS if location[1] in lowered), LOCATIONS[seed % len(LOCATIONS)]
+    )
+    content_type = next(
+        (name for name, keywords in CONTENT_TYPE_KEYWORDS if any(keyword in lowered for keyword in keywords)),
+        CONTENT_TYPE_KEYWORDS[seed % len(CONTENT_TYPE_KEYWORDS)][0]
+    )
+    enrichment = {
+        "content_type": [content_type],
+        "locations": {"primary": country, "secondary": [city]},
+        "audience": ["budget"] if seed % 2 else ["luxury"],
+        "key_themes": ["culture"],
+        "seasonality": ["winter"]
+    }
+    if content_type == "deal":
+        enrichment["deal_data"] = {
+            "type": "flight",
+            "price_tier": "budget",
+            "value_score": 5 + seed % 5,
+            "booking_deadline": "2099-01-01",
+            "travel_window": {"start": "2099-02-01", "end": "2099-03-01"},
+            "origin": "new york",
+            "destination": city
+        }
+    return enrichment
+
+
+def canned_response(body: Dict) -> str:
+    """Deterministic completion text for a chat completions request body"""
+    content = body["messages"][-1]["content"]
+    ids = _PACKED_IDS.findall(content)
+    if ids:
+        articles = _PACKED_IDS.split(content)[2::2]
+        return json.dumps({"results": [
+            {"article_id": int(article_id), **canned_enrichment(text.strip())} for article_id, text in zip(ids, articles)
+        ]})
+    if body.get("response_format"):
+        return json.dumps(canned_enrichment(content))
+    if "# Seasonal Inspiration" in body["messages"][0]["content"]:
+        return NEWSLETTER_MARKDOWN.replace("# Conclusion", SEASONAL_MARKDOWN + "# Conclusion")
+    return NEWSLETTER_MARKDOWN
+
+
+def recording_key(body: Dict) -> str:
+    """ResponseCache key of a request, so a real run's llm_cache.db can be replayed"""
+    system_prompt = body["messages"][0]["content"]
+    content = body["messages"][-1]["content"]
+    if body.get("response_format"):
+        return ResponseCache.make_key(body["model"], system_prompt, content,
+                                      json.dumps(body["response_format"], sort_keys=True))
+    return ResponseCache.make_key(body["model"], system_prompt, content)
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 0.05,
+                 recordings_path: Optional[str] = None, seed: int = 0, port: int = 0):
+        """
+        OpenAI-compatible HTTP server running on a background thread
+
+        Args:
+            latency: Seconds each completion takes
+            latency_jitter: Uniform random extra latency, up to this many seconds
+            error_rate: Fraction of requests answered with a 500
+            rate_limit_rate: Fraction of requests answered with a 429 and a retry-after header
+            retry_after: Seconds advertised in the retry-after header of a 429
+            recordings_path: llm_cache.db of a real run whose responses are replayed when they match
+            seed: Seed of the random draws, so error and latency sequences repeat
+            port: Port to listen on (0 picks a free one)
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.recordings_path = recordings_path
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "completions": 0, "errors": 0, "rate_limited": 0, "replayed": 0}
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _draw(self):
+        """Outcome and latency of the next request, drawn under the lock so a seed replays"""
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.latency_jitter)
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return "rate_limited", 0.0
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return "error", delay
+            self.stats["completions"] += 1
+            return "ok", delay
+
+    def _recorded(self, body: Dict) -> Optional[str]:
+        if not self.recordings_path:
+            return None
+        conn = sqlite3.connect(f"file:{self.recordings_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT response FROM llm_cache WHERE cache_key = ?", (recording_key(body),)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading recorded responses: {e}")
+            row = None
+        finally:
+            conn.close()
+        if row:
+            with self.lock:
+                self.stats["replayed"] += 1
+            return row[0]
+        return None
+
+    def completion(self, body: Dict) -> Dict:
+        """Chat completion object for a request body"""
+        text = self._recorded(body)
+        if text is None:
+            text = canned_response(body)
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        completion_tokens = len(text) // 4
+        return {
+            "id": f"chatcmpl-{zlib.crc32(text.encode('utf-8')):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_event(self, payload):
+                self.wfile.write(f"data: {payload}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _send_stream(self, completion: Dict, delay: float, stream_options: Dict):
+                """Completion as chat.completion.chunk events, one line of text each"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                lines = completion["choices"][0]["message"]["content"].splitlines(keepends=True) or [""]
+                chunk = {key: completion[key] for key in ("id", "created", "model")}
+                chunk["object"] = "chat.completion.chunk"
+                for index, line in enumerate(lines):
+                    time.sleep(delay / len(lines))
+                    self._send_event(json.dumps({**chunk, "choices": [{
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": line} if index == 0 else {"content": line},
+                        "finish_reason": "stop" if index == len(lines) - 1 else None
+                    }]}))
+                if stream_options.get("include_usage"):
+                    self._send_event(json.dumps({**chunk, "choices": [], "usage": completion["usage"]}))
+                self._send_event("[DONE]")
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+                outcome, delay = server._draw()
+                if outcome == "ok" and body.get("stream"):
+                    self._send_stream(server.completion(body), delay, body.get("stream_options") or {})
+                    return
+                if delay:
+                    time.sleep(delay)
+                if outcome == "rate_limited":
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                    {"retry-after-ms": str(int(server.retry_after * 1000))})
+                elif outcome == "error":
+                    self._send_json(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+                else:
+                    self._send_json(200, server.completion(body))
+
+        return Handler
@@ -0,0 +1,196 @@
+"""
+Record/replay of the HTTP requests made through `requests`
+
+Feeds and article pages are fetched with requests.get, which goes through
+Session.send. A cassette patches Session.send to record live responses to a JSON
+file, or to replay them without touching the network.
+"""
+import base64
+import json
+import random
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from config.logging_config import fetch_logger as logger
+
+MODES = ("record", "replay", "passthrough")
+
+
+class HttpCassette:
+    def __init__(self, path: Optional[str] = None, mode: str = "replay"):
+        """
+        Recorded HTTP responses keyed by method and URL
+
+        Args:
+            path: JSON file holding the recordings; None keeps them in memory only
+            mode: "record" fetches live and stores responses, "replay" answers from the
+                recordings (404 for anything missing), "passthrough" leaves requests alone
+        """
+        if mode not in MODES:
+            raise ValueError(f"Invalid cassette mode: {mode}")
+        self.path = Path(path) if path else None
+        self.mode = mode
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._original_send = None
+
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return f"{method.upper()} {url}"
+
+    def add(self, url: str, body: bytes, status: int = 200, content_type: str = "text/html; charset=utf-8",
+            method: str = "GET"):
+        """Store a response for a URL"""
+        self.entries[self.key(method, url)] = {
+            "status": status,
+            "headers": {"Content-Type": content_type},
+            "body": base64.b64encode(body).decode("ascii")
+        }
+
+    def body(self, url: str, method: str = "GET") -> Optional[bytes]:
+        """Recorded body of a URL"""
+        entry = self.entries.get(self.key(method, url))
+        return base64.b64decode(entry["body"]) if entry else None
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        logger.info(f"Saved {len(self.entries)} recorded responses to {self.path}")
+
+    def _response(self, request: requests.PreparedRequest, entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = base64.b64decode(entry["body"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = "OK" if entry["status"] < 400 else "Not Found"
+        return response
+
+    def send(self, session: requests.Session, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Replacement for Session.send"""
+        key = self.key(request.method, request.url)
+        if self.mode == "replay":
+            entry = self.entries.get(key)
+            if entry is None:
+                # Never fall through to the network, a miss must stay offline
+                self.misses += 1
+                logger.warning(f"No recorded response for {key}")
+                entry = {"status": 404, "headers": {"Content-Type": "text/plain"}, "body": ""}
+            else:
+                self.hits += 1
+            return self._response(request, entry)
+
+        response = self._original_send(session, request, **kwargs)
+        if self.mode == "record":
+            self.entries[key] = {
+                "status": response.status_code,
+                "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+                "body": base64.b64encode(response.content).decode("ascii")
+            }
+        return response
+
+    def __enter__(self) -> "HttpCassette":
+        cassette = self
+        self._original_send = requests.sessions.Session.send
+
+        def send(session, request, **kwargs):
+            return cassette.send(session, request, **kwargs)
+
+        requests.sessions.Session.send = send
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        requests.sessions.Session.send = self._original_send
+        self._original_send = None
+        if self.mode == "record":
+            self.save()
+
+
+SOURCE_CATEGORIES = ["budget", "luxury", "travel_tips"]
+CITIES = ["Lisbon", "Madrid", "Paris", "Rome", "Tokyo", "Bangkok", "Mexico City", "Athens", "Porto", "Kyoto"]
+TOPICS = [
+    "Cheap flights to {city} from ${price} round trip",
+    "The ultimate weekend guide to {city}",
+    "{city} airport opens a new terminal",
+    "How to pack light for a week in {city}",
+    "Hotel sale: {city} stays from ${price} a night",
+]
+
+
+def _rss_feed(name: str, link: str, items: List[Dict]) -> bytes:
+    entries = "".join(
+        f"<item><title>{escape(item['title'])}</title><link>{escape(item['url'])}</link>"
+        f"<description>{escape(item['summary'])}</description>"
+        f"<pubDate>{format_datetime(item['published'])}</pubDate></item>"
+        for item in items
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(name)}</title><link>{escape(link)}</link><description>{escape(name)}</description>"
+        f"{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def _article_page(title: str, paragraphs: List[str]) -> bytes:
+    body = "".join(f"<p>{escape(paragraph)}</p>" for paragraph in paragraphs)
+    return (
+        f"<html><head><title>{escape(title)}</title><style>p {{}}</style></head>"
+        f"<body><h1>{escape(title)}</h1>{body}<script>track()</script></body></html>"
+    ).encode("utf-8")
+
+
+def synthetic_corpus(source_count: int = 3, articles_per_source: int = 10, paragraphs: int = 6,
+                     seed: int = 0, now: Optional[datetime] = None) -> Tuple[HttpCassette, List[Dict]]:
+    """
+    Cassette of generated feeds and article pages, plus the sources that point at them
+
+    Feed parsing only reads the first 10 entries of a feed, so larger corpora need more sources.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now().astimezone()
+    cassette = HttpCassette(mode="replay")
+    sources = []
+    for source_index in range(source_count):
+        name = f"Synthetic Feed {source_index + 1}"
+        site = f"https://feed{source_index + 1}.example.com"
+        items = []
+        for article_index in range(articles_per_source):
+            city = rng.choice(CITIES)
+            title = rng.choice(TOPICS).format(city=city, price=rng.randrange(99, 999))
+            url = f"{site}/articles/{article_index + 1}"
+            text = [
+                f"{title}. Paragraph {paragraph + 1} about {city} with tips on food, neighbourhoods and transport."
+                for paragraph in range(paragraphs)
+            ]
+            cassette.add(url, _article_page(title, text))
+            items.append({
+                "title": title,
+                "url": url,
+                "summary": text[0],
+                "published": now - timedelta(hours=source_index * articles_per_source + article_index)
+            })
+        cassette.add(f"{site}/feed/", _rss_feed(name, site, items), content_type="application/rss+xml")
+        sources.append({
+            "name": name,
+            "active": True,
+            "quality_score": 5 + source_index % 5,
+            "category": SOURCE_CATEGORIES[source_index % len(SOURCE_CATEGORIES)],
+            "url": f"{site}/feed/",
+            "type": "rss"
+        })
+    return cassette, sources
@@ -0,0 +1,160 @@
+"""
+Enrichment benchmark of the remote OpenAI path against the local llama.cpp backend
+
+Both backends enrich the same articles; the report compares latency, throughput,
+schema validity and how often they agree on content type and primary location.
+
+Usage:
+    PYTHONPATH=src LOG_DIR=/tmp python -m benchmarks.llm_backend_benchmark --model-path model.gguf
+        [--limit 50] [--db travel_articles.db | --synthetic] [--fake-remote --remote-latency 0.8]
+"""
+import argparse
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.http_replay import synthetic_corpus
+from content.enriching.article_enricher import ArticleEnricher
+from content.fetching.parsers import clean_html_content
+from database.processed_database import ProcessedDatabase
+from services.openai.chat_provider import ChatProvider
+from services.openai.errors import LLMBadOutputError, LLMError
+from services.openai.telemetry import LLMTelemetry
+from services.openai.telemetry_report import percentile
+
+
+def load_articles(db_path: str, limit: int) -> List[Dict]:
+    """Most recent fully fetched articles of an article database"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute("""
+            SELECT id, title, content FROM articles
+            WHERE is_full_content_fetched = 1
+            ORDER BY published_date DESC
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def synthetic_articles(limit: int) -> List[Dict]:
+    """Article pages of the synthetic corpus, as the fetch stage would store them"""
+    cassette, _ = synthetic_corpus(source_count=max(1, -(-limit // 10)))
+    urls = [key.split(" ", 1)[1] for key in sorted(cassette.entries) if "/articles/" in key][:limit]
+    articles = []
+    for article_id, url in enumerate(urls, 1):
+        text = clean_html_content(cassette.body(url).decode("utf-8"))
+        articles.append({"id": article_id, "title": text.split(".")[0], "content": text})
+    return articles
+
+
+def run_backend(articles: List[Dict], provider: Optional[ChatProvider] = None,
+                model: str = "gpt-4o-mini") -> Dict:
+    """Enrich articles one at a time, recording per-article latency and output validity"""
+    telemetry = LLMTelemetry(":memory:")
+    enricher = ArticleEnricher(ProcessedDatabase(":memory:"), openai_model=model, telemetry=telemetry,
+                               llm_provider=provider)
+    results = {}
+    latencies = []
+    invalid = 0
+    failed = 0
+    started = time.perf_counter()
+    for article in articles:
+        call_started = time.perf_counter()
+        try:
+            results[article['id']] = enricher.enrich_article(article['id'], article['content'], article.get('title', ''))
+        except LLMBadOutputError:
+            invalid += 1
+        except LLMError:
+            failed += 1
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    seconds = time.perf_counter() - started
+
+    totals = telemetry.run_totals()
+    telemetry.close()
+    return {
+        "backend": enricher.llm.model,
+        "articles": len(articles),
+        "results": results,
+        "invalid": invalid,
+        "failed": failed,
+        "seconds": seconds,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "tokens": totals["tokens"],
+        "cost_usd": totals["cost_usd"]
+    }
+
+
+def agreement(remote: Dict, local: Dict) -> Dict:
+    """Share of articles enriched by both backends that got the same labels"""
+    shared = [article_id for article_id in remote["results"] if article_id in local["results"]]
+    if not shared:
+        return {"compared": 0, "content_type": None, "primary_location": None}
+
+    def share(label) -> float:
+        return sum(label(remote["results"][i]) == label(local["results"][i]) for i in shared) / len(shared)
+
+    return {
+        "compared": len(shared),
+        "content_type": share(lambda article: article.content_type[:1]),
+        "primary_location": share(lambda article: article.locations.primary)
+    }
+
+
+def format_comparison(runs: List[Dict], agreed: Dict) -> str:
+    lines = [f"{'backend':<32} {'articles/s':>10} {'p50':>8} {'p95':>8} {'valid':>7} {'tokens':>8} {'cost':>9}"]
+    for run in runs:
+        valid = len(run["results"]) / run["articles"] if run["articles"] else 0
+        rate = run["articles"] / run["seconds"] if run["seconds"] else 0
+        lines.append(
+            f"{run['backend']:<32} {rate:>10.2f} {run['p50_ms'] or 0:>6.0f}ms {run['p95_ms'] or 0:>6.0f}ms "
+            f"{valid:>6.0%} {run['tokens']:>8} ${run['cost_usd']:>8.4f}"
+        )
+    if agreed["compared"]:
+        lines.append(
+            f"Agreement over {agreed['compared']} articles: content type {agreed['content_type']:.0%}, "
+            f"primary location {agreed['primary_location']:.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Remote vs local enrichment benchmark")
+    parser.add_argument("--model-path", default=os.getenv("LOCAL_LLM_MODEL_PATH"), help="GGUF model file")
+    parser.add_argument("--threads", type=int, help="CPU threads of the local backend")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--db", help="Article database (defaults to DATABASE_PATH/travel_articles.db)")
+    parser.add_argument("--synthetic", action="store_true", help="Use generated articles instead of a database")
+    parser.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-4o-mini"), help="Remote model")
+    parser.add_argument("--fake-remote", action="store_true", help="Answer remote calls from the local fake server")
+    parser.add_argument("--remote-latency", type=float, default=0.8, help="Seconds per fake remote call")
+    args = parser.parse_args(argv)
+    if not args.model_path:
+        parser.error("--model-path or LOCAL_LLM_MODEL_PATH is required")
+
+    if args.synthetic:
+        articles = synthetic_articles(args.limit)
+    else:
+        articles = load_articles(args.db or str(Path(os.getenv("DATABASE_PATH", ".")) / "travel_articles.db"), args.limit)
+    print(f"Benchmarking enrichment of {len(articles)} articles")
+
+    if args.fake_remote:
+        with FakeOpenAIServer(latency=args.remote_latency) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+            os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+            remote = run_backend(articles, model=args.model)
+    else:
+        remote = run_backend(articles, model=args.model)
+
+    from services.llamacpp.llamacpp_provider import LlamaCppProvider
+    local = run_backend(articles, provider=LlamaCppProvider(args.model_path, n_threads=args.threads))
+    print(format_comparison([remote, local], agreement(remote, local)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Offline end-to-end benchmark of main.main()
+
+Feeds and article pages come from an HTTP cassette (synthetic by default), the LLM
+is the local fake OpenAI server, and the newsletter is written but not sent.
+
+Usage:
+    PYTHONPATH=src LOG_DIR=/tmp python -m benchmarks.pipeline_benchmark [--sources 5] [--latency 0.2]
+        [--error-rate 0.05] [--cassette feeds.json --sources-config sources.yaml] [--runs 3]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import yaml
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.http_replay import HttpCassette, synthetic_corpus
+
+STAGES = ["populate", "fetch", "enrich", "sweep", "cluster", "select", "write", "send"]
+
+
+@contextmanager
+def _environment(values: Dict[str, str]):
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_pipeline(cassette: HttpCassette, sources_config: str, server: FakeOpenAIServer,
+                 work_dir: str, env: Optional[Dict[str, str]] = None) -> Dict:
+    """Run main.main() once against a fresh database, returning its per-stage timings"""
+    import main
+
+    # The pipeline rewrites the sources file with check results, so each run gets its own copy
+    database_dir = Path(work_dir) / "db"
+    json_dir = Path(work_dir) / "json"
+    database_dir.mkdir(parents=True, exist_ok=True)
+    json_dir.mkdir(parents=True, exist_ok=True)
+    sources_copy = Path(work_dir) / "sources.yaml"
+    shutil.copyfile(sources_config, sources_copy)
+
+    timings: Dict = {}
+    with _environment({
+        "DATABASE_PATH": str(database_dir),
+        "OPENAI_API_KEY": "benchmark-key",
+        "OPENAI_MODEL": "gpt-4o-mini",
+        "OPENAI_BASE_URL": server.base_url,
+        "SOURCES_CONFIG": str(sources_copy),
+        "TEST_JSON_DIR": str(json_dir),
+        "NEWSLETTER_DRY_RUN": "true",
+        **(env or {})
+    }), cassette:
+        main.main(timings)
+    return timings
+
+
+def format_timings(runs: List[Dict]) -> str:
+    """Per-stage table of the mean over runs"""
+    lines = [f"{'stage':<10} {'seconds':>9} {'items':>7} {'items/s':>9}"]
+    total = 0.0
+    for stage in STAGES:
+        measured = [run[stage] for run in runs if stage in run]
+        if not measured:
+            continue
+        seconds = sum(timing["seconds"] for timing in measured) / len(measured)
+        items = measured[-1]["items"]
+        total += seconds
+        rate = f"{items / seconds:>9.1f}" if items and seconds > 0 else f"{'-':>9}"
+        lines.append(f"{stage:<10} {seconds:>9.3f} {items if items is not None else '-':>7} {rate}")
+    lines.append(f"{'total':<10} {total:>9.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--cassette", help="Recorded HTTP responses (defaults to a synthetic corpus)")
+    parser.add_argument("--sources-config", help="Sources file matching the cassette")
+    parser.add_argument("--sources", type=int, default=3, help="Synthetic feeds, 10 articles each")
+    parser.add_argument("--recordings", help="llm_cache.db of a real run to replay LLM responses from")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per LLM completion")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM requests failing with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of LLM requests answered 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    try:
+        if args.cassette:
+            if not args.sources_config:
+                parser.error("--cassette needs --sources-config")
+            cassette = HttpCassette(args.cassette, mode="replay")
+            sources_config = args.sources_config
+        else:
+            cassette, sources = synthetic_corpus(source_count=args.sources, seed=args.seed)
+            sources_config = str(Path(work_dir) / "synthetic_sources.yaml")
+            with open(sources_config, "w") as f:
+                yaml.safe_dump({"sources": sources}, f, sort_keys=False)
+
+        runs = []
+        for run in range(args.runs):
+            server = FakeOpenAIServer(
+                latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                rate_limit_rate=args.rate_limit_rate, recordings_path=args.recordings, seed=args.seed
+            )
+            with server:
+                runs.append(run_pipeline(cassette, sources_config, server, str(Path(work_dir) / f"run_{run}")))
+            print(f"Run {run + 1}: {server.stats}; cassette {cassette.hits} hits, {cassette.misses} misses")
+        print(format_timings(runs))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
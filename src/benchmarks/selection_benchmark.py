@@ -0,0 +1,366 @@
+"""
+Selection benchmark and backtest of ArticleSelector over synthetic corpora and database snapshots
+
+Each corpus is prepared as a pipeline run would leave it (expired deals swept, duplicate
+deals clustered), then consecutive editions are selected in each selection mode, with the
+usage of every edition recorded before the next one, as the writer does. Reported per
+corpus and mode: pool load and selection latency, statements per edition, section fill
+rates and reuse-policy violations. Results can be saved and compared with a baseline, so
+a regression fails the run.
+
+Usage:
+    PYTHONPATH=src LOG_DIR=/tmp python -m benchmarks.selection_benchmark [--sizes 1000,10000,100000,1000000]
+        [--snapshot travel_articles.db ...] [--modes sql,pool,scored] [--editions 3] [--seed 0]
+        [--output results.json] [--baseline results.json --tolerance 1.5]
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from benchmarks.pipeline_benchmark import _environment
+from content.enriching.deal_clusterer import DealClusterer
+from content.enriching.gazetteer import load_gazetteer
+from content.selection.article_selector import ITEM_SECTIONS, ArticleSelector
+from content.selection.candidate_pool import utc_now
+from content.selection.edition_planner import DATE_FORMAT, GUIDES_PER_EDITION, SECTION_SIZES
+from content.selection.scoring_engine import ScoringEngine
+from database.fetch_database import FetchDatabase
+from database.processed_database import ProcessedDatabase
+from services.openai.telemetry_report import percentile
+
+MODES = ["sql", "pool", "scored"]
+SIZES = [1000, 10000]
+SECTION_TARGETS = {**{section: SECTION_SIZES[section] for section in ITEM_SECTIONS if section in SECTION_SIZES},
+                   'featured_destination_guides': GUIDES_PER_EDITION}
+
+# Share of each content type in a corpus, and of usage among articles older than a week
+CONTENT_MIX = {"deal": 0.35, "guide": 0.2, "experience": 0.08, "news": 0.22, "tip": 0.15}
+USED_SHARE = {"deal": 0.4, "guide": 0.3, "experience": 0.25, "news": 0.2, "tip": 0.35}
+SEASONS = ["spring", "summer", "autumn", "winter"]
+AUDIENCES = ["budget", "luxury", "family", "adventure", "backpacker", "couples"]
+PRICE_TIERS = ["budget", "mid-range", "luxury"]
+SOURCE_COUNT = 40
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def synthetic_sources(count: int = SOURCE_COUNT) -> List[Dict]:
+    """Sources as the sources config lists them"""
+    return [
+        {"name": f"Synthetic Source {index + 1}", "url": f"https://source{index + 1}.example.com/feed/",
+         "quality_score": 3 + index % 8, "category": ["budget", "luxury", "travel_tips"][index % 3]}
+        for index in range(count)
+    ]
+
+
+def generate_corpus(fetch_db: FetchDatabase, processed_db: ProcessedDatabase, rows: int, seed: int = 0,
+                    now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Fill the databases with rows enriched articles, returning their sources
+
+    Popularity of cities and sources is Zipf distributed, publication ages decay
+    exponentially over two years, deals close 3-60 days after publication (so most
+    historical ones are expired) and older articles have often been used already.
+    """
+    rng = random.Random(seed)
+    now = now or utc_now()
+    gazetteer = load_gazetteer()
+    cities = sorted(
+        (place for place_id in gazetteer.coordinates() if (place := gazetteer.get(place_id)).kind == "city"),
+        key=lambda place: place.id
+    )
+    rng.shuffle(cities)
+    city_weights = _zipf_weights(len(cities))
+    hubs = cities[:8]
+    sources = synthetic_sources()
+    source_weights = _zipf_weights(len(sources), exponent=0.8)
+    content_types, type_weights = zip(*CONTENT_MIX.items())
+
+    articles, processed, locations = [], [], []
+    for article_id in range(1, rows + 1):
+        content_type = rng.choices(content_types, type_weights)[0]
+        city = rng.choices(cities, city_weights)[0]
+        source = rng.choices(sources, source_weights)[0]
+        age_days = min(rng.expovariate(1 / 120), 730)
+        published = now - timedelta(days=age_days)
+        deal_data = None
+        if content_type == "deal":
+            deadline = published + timedelta(days=rng.uniform(3, 60))
+            travel_start = deadline + timedelta(days=rng.uniform(7, 120))
+            deal_data = {
+                "type": ["flight"], "price_tier": [rng.choice(PRICE_TIERS)],
+                "value_score": round(rng.triangular(2, 10, 6)),
+                "booking_deadline": deadline.date().isoformat(),
+                "travel_window": {"start": travel_start.date().isoformat(),
+                                  "end": (travel_start + timedelta(days=rng.uniform(14, 90))).date().isoformat()},
+                "origin": rng.choice(hubs).name, "destination": city.name
+            }
+        used_count, last_used = 0, None
+        if age_days > 7 and rng.random() < USED_SHARE[content_type]:
+            used_count = 1 if content_type == "deal" else rng.randint(1, 3)
+            last_used = (published + timedelta(days=rng.uniform(1, age_days))).strftime(DATE_FORMAT)
+
+        articles.append((
+            article_id, f"Article {article_id} about {city.name}", f"https://synthetic.example.com/{article_id}",
+            f"Synthetic {content_type} about {city.name}.", published.strftime(DATE_FORMAT), source["name"],
+            source["url"]
+        ))
+        processed.append((
+            article_id, article_id, json.dumps([content_type]), json.dumps(deal_data) if deal_data else None,
+            json.dumps({"primary": city.name, "secondary": []}),
+            json.dumps(rng.sample(AUDIENCES, rng.randint(0, 2))), json.dumps([]),
+            json.dumps(rng.sample(SEASONS, rng.randint(1, 2))), published.strftime(DATE_FORMAT),
+            last_used, used_count, deal_data["booking_deadline"] if deal_data else None
+        ))
+        locations.append((article_id, city.id, city.country, "primary", city.latitude, city.longitude))
+
+    with fetch_db.conn:
+        fetch_db.conn.executemany("""
+            INSERT INTO articles (id, title, url, content, published_date, source_name, source_url,
+                is_full_content_fetched)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        """, articles)
+    with processed_db.conn:
+        processed_db.conn.executemany("""
+            INSERT INTO processed_articles (id, fetched_article_id, content_type, deal_data, locations, audience,
+                key_themes, seasonality, processed_date, last_used, used_count, booking_deadline)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, processed)
+        processed_db.conn.executemany("""
+            INSERT INTO article_locations (fetched_article_id, location_id, country_id, role, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, locations)
+    return sources
+
+
+def reuse_violations(selector: ArticleSelector, usage: Dict[int, Dict], content: Dict) -> List[str]:
+    """
+    Selected articles their content policy did not allow, given their usage before the edition
+
+    Experiences featured as destination guides are held to the guide policy, as the selector does.
+    """
+    violations = []
+    now = utc_now()
+    ids = content['metadata']['article_ids']
+    if len(ids) != len(set(ids)):
+        violations.append("article selected twice in one edition")
+    guide_ids = {item['id'] for item in content.get('featured_destination_guides') or []}
+    for processed_id in ids:
+        row = usage[processed_id]
+        content_type = (json.loads(row['content_type']) or [None])[0]
+        policy = selector.content_policies.get('guide' if processed_id in guide_ids else content_type)
+        if content_type == 'deal' and (row['booking_deadline'] or '') <= now.date().isoformat():
+            violations.append(f"{processed_id}: expired deal")
+        if not policy or not row['last_used']:
+            continue
+        last_used = datetime.strptime(row['last_used'][:19].replace('T', ' '), DATE_FORMAT)
+        if not policy['can_reuse']:
+            violations.append(f"{processed_id}: {content_type} reused")
+        elif last_used + timedelta(days=policy['cooldown_days']) >= now:
+            violations.append(f"{processed_id}: {content_type} inside its cooldown")
+        elif row['used_count'] >= policy['max_used_count']:
+            violations.append(f"{processed_id}: {content_type} used {row['used_count']} times")
+    return violations
+
+
+def fill_rates(content: Dict) -> Dict[str, float]:
+    """Filled share of each list section's target size"""
+    return {
+        section: min(len(content.get(section) or []), target) / target
+        for section, target in SECTION_TARGETS.items()
+    }
+
+
+def run_mode(processed_db: ProcessedDatabase, sources: List[Dict], mode: str, editions: int,
+             diversity: float = 0.3) -> Dict:
+    """Select consecutive editions in one mode, recording usage after each through ProcessedDatabase.record_usage like the writer"""
+    statements: List[str] = []
+    load_ms, select_ms, queries, fills, violations, failures = [], [], [], [], [], 0
+    for _ in range(editions):
+        scoring_engine = ScoringEngine.from_sources(sources) if mode == "scored" else None
+        selector = ArticleSelector(processed_db, scoring_engine=scoring_engine, diversity=diversity)
+        statements.clear()
+        processed_db.conn.set_trace_callback(statements.append)
+        try:
+            started = time.perf_counter()
+            pool = selector.load_candidate_pool() if mode in ("pool", "scored") else None
+            loaded = time.perf_counter()
+            content = selector.select_newsletter_content(pool=pool)
+            select_ms.append((time.perf_counter() - loaded) * 1000)
+            load_ms.append((loaded - started) * 1000)
+        except ValueError:
+            failures += 1
+            continue
+        finally:
+            processed_db.conn.set_trace_callback(None)
+        queries.append(len(statements))
+        fills.append(fill_rates(content))
+
+        ids = content['metadata']['article_ids']
+        placeholders = ','.join('?' * len(ids))
+        usage = {row['id']: dict(row) for row in processed_db.conn.execute(f"""
+            SELECT id, content_type, booking_deadline, last_used, used_count FROM processed_articles
+            WHERE id IN ({placeholders})
+        """, ids)}
+        violations.extend(reuse_violations(selector, usage, content))
+        processed_db.record_usage(ids)
+
+    return {
+        "mode": mode,
+        "editions": editions,
+        "failures": failures,
+        "load_ms": sum(load_ms) / len(load_ms) if load_ms else None,
+        "select_p50_ms": percentile(select_ms, 50),
+        "select_p95_ms": percentile(select_ms, 95),
+        "queries": sum(queries) / len(queries) if queries else None,
+        "fill": {section: sum(fill[section] for fill in fills) / len(fills) for section in SECTION_TARGETS}
+        if fills else {section: 0.0 for section in SECTION_TARGETS},
+        "violations": len(violations),
+        "violation_examples": violations[:5],
+    }
+
+
+def prepare(processed_db: ProcessedDatabase) -> Dict:
+    """Sweep and cluster deals as the pipeline does before selecting"""
+    started = time.perf_counter()
+    swept = processed_db.sweep_expired_deals()
+    duplicates = DealClusterer(processed_db).run()
+    return {"swept": swept, "duplicates": duplicates, "prepare_ms": (time.perf_counter() - started) * 1000}
+
+
+def benchmark_corpus(name: str, work_dir: Path, modes: List[str], editions: int, rows: Optional[int] = None,
+                     snapshot: Optional[str] = None, seed: int = 0, diversity: float = 0.3) -> List[Dict]:
+    """
+    Results of every mode over one corpus
+
+    Each mode starts from a fresh copy of the prepared corpus, so usage recorded by
+    one mode's editions doesn't affect the next mode.
+    """
+    prepared_dir = work_dir / name / "prepared"
+    prepared_dir.mkdir(parents=True)
+    with _environment({"DATABASE_PATH": str(prepared_dir)}):
+        if snapshot:
+            shutil.copyfile(snapshot, prepared_dir / "travel_articles.db")
+        fetch_db = FetchDatabase("main")
+        processed_db = ProcessedDatabase("main")
+        sources = generate_corpus(fetch_db, processed_db, rows, seed=seed) if rows else synthetic_sources()
+        rows = processed_db.conn.execute("SELECT COUNT(*) FROM processed_articles").fetchone()[0]
+        prepared = prepare(processed_db)
+        processed_db.conn.close()
+        fetch_db.conn.close()
+
+    results = []
+    for mode in modes:
+        mode_dir = work_dir / name / mode
+        mode_dir.mkdir()
+        shutil.copyfile(prepared_dir / "travel_articles.db", mode_dir / "travel_articles.db")
+        with _environment({"DATABASE_PATH": str(mode_dir)}):
+            processed_db = ProcessedDatabase("main")
+            try:
+                result = run_mode(processed_db, sources, mode, editions, diversity=diversity)
+            finally:
+                processed_db.conn.close()
+        results.append({"corpus": name, "rows": rows, **prepared, **result})
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = 1.5, min_ms: float = 5.0) -> List[str]:
+    """Regressions of results against a baseline run of the same corpora and modes"""
+    previous = {(result["corpus"], result["mode"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["corpus"], result["mode"]))
+        if before is None:
+            continue
+        label = f"{result['corpus']} {result['mode']}"
+        for metric in ("select_p50_ms", "load_ms"):
+            if result[metric] is not None and before[metric] is not None \
+                    and result[metric] > max(before[metric] * tolerance, before[metric] + min_ms):
+                regressions.append(f"{label}: {metric} {before[metric]:.1f} -> {result[metric]:.1f}")
+        if (result["queries"] or 0) > (before["queries"] or 0):
+            regressions.append(f"{label}: queries per edition {before['queries']} -> {result['queries']}")
+        if result["violations"] > before["violations"]:
+            regressions.append(f"{label}: reuse violations {before['violations']} -> {result['violations']}")
+        if result["failures"] > before["failures"]:
+            regressions.append(f"{label}: failed editions {before['failures']} -> {result['failures']}")
+        for section, rate in result["fill"].items():
+            if rate < before["fill"].get(section, 0) - 0.05:
+                regressions.append(f"{label}: {section} fill {before['fill'][section]:.0%} -> {rate:.0%}")
+    return regressions
+
+
+def format_results(results: List[Dict]) -> str:
+    sections = list(SECTION_TARGETS)
+    lines = [
+        f"{'corpus':<18} {'rows':>8} {'mode':<7} {'load':>9} {'p50':>9} {'p95':>9} {'queries':>7} "
+        + " ".join(f"{section.split('_')[-1][:6]:>6}" for section in sections) + f" {'violations':>10}"
+    ]
+
+    def ms(value) -> str:
+        return f"{value:>7.1f}ms" if value is not None else f"{'-':>9}"
+
+    for result in results:
+        queries = f"{result['queries']:>7.1f}" if result["queries"] is not None else f"{'-':>7}"
+        lines.append(
+            f"{result['corpus']:<18} {result['rows']:>8} {result['mode']:<7} {ms(result['load_ms'])} "
+            f"{ms(result['select_p50_ms'])} {ms(result['select_p95_ms'])} {queries} "
+            + " ".join(f"{result['fill'][section]:>6.0%}" for section in sections)
+            + f" {result['violations']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Selection benchmark and backtest")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="Comma separated synthetic corpus sizes (empty for none)")
+    parser.add_argument("--snapshot", action="append", default=[], help="travel_articles.db snapshot to replay")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--editions", type=int, default=3, help="Consecutive editions per corpus and mode")
+    parser.add_argument("--diversity", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed latency ratio to the baseline")
+    args = parser.parse_args(argv)
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="selection_benchmark_"))
+    results = []
+    try:
+        for size in [int(size) for size in args.sizes.split(",") if size]:
+            results += benchmark_corpus(f"synthetic-{size}", work_dir, modes, args.editions, rows=size,
+                                        seed=args.seed, diversity=args.diversity)
+        for index, snapshot in enumerate(args.snapshot):
+            results += benchmark_corpus(f"{index}-{Path(snapshot).stem}"[:18], work_dir, modes, args.editions,
+                                        snapshot=snapshot, diversity=args.diversity)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
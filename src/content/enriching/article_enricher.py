@@ -1,16 +1,53 @@
 import json
+import asyncio
+import time
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 from pydantic import ValidationError
 from database.processed_database import ProcessedDatabase
+from services.openai.chat_provider import ChatProvider
 from services.openai.openai_client import OpenAIClient
+from services.openai.errors import LLMError, LLMBadOutputError
+from services.openai.rate_limiter import RateLimiter
+from services.openai.response_cache import ResponseCache
+from services.openai.telemetry import LLMTelemetry
+from content.enriching.token_budget import TokenBudget, count_tokens
+from content.enriching.pre_classifier import PreClassifier
+from content.enriching.enrichment_scheduler import EnrichmentScheduler
+from content.enriching.gazetteer import Gazetteer, load_gazetteer
+from content.enriching.structured_output import (
+    BOOKKEEPING_FIELDS, enrichment_response_format, prompt_version, repair_fields, repair_json
+)
 from models.schemas import ProcessedArticle
 from config.logging_config import fetch_logger as logger
 
 class ArticleEnricher:
-    def __init__(self, processed_db: ProcessedDatabase, openai_model: str = "gpt-4o-mini"):
+    def __init__(self, processed_db: ProcessedDatabase, openai_model: str = "gpt-4o-mini",
+                 cache: Optional[ResponseCache] = None, max_content_tokens: int = 3000,
+                 short_article_tokens: int = 600, pack_token_budget: int = 4000, max_pack_size: int = 8,
+                 pre_classifier: Optional[PreClassifier] = None, max_enrichment_attempts: int = 3,
+                 gazetteer: Optional[Gazetteer] = None, telemetry: Optional[LLMTelemetry] = None,
+                 llm_provider: Optional[ChatProvider] = None, scheduler: Optional[EnrichmentScheduler] = None):
         self.processed_db = processed_db
-        self.llm = OpenAIClient(model=openai_model)
+        # A local provider replaces the OpenAI API for enrichment requests
+        self.llm = OpenAIClient(model=openai_model, cache=cache, telemetry=telemetry, provider=llm_provider)
+        self.token_budget = TokenBudget(max_tokens=max_content_tokens, model=openai_model)
+        # Optional local triage that skips junk and keeps non-deals out of deal extraction
+        self.pre_classifier = pre_classifier
+        # Maps free-form location names onto canonical places before saving
+        self.gazetteer = gazetteer or load_gazetteer()
+        # Articles failing this often for non-transient reasons are dead-lettered
+        self.max_enrichment_attempts = max_enrichment_attempts
+        # Optional urgency ordering of the queue, so expiring deals aren't stuck behind evergreen content
+        self.scheduler = scheduler
+        # Seconds the time budget of a run is measured in
+        self.clock = time.monotonic
+
+        # Packed mode: short articles share one request and one copy of the system prompt
+        self.short_article_tokens = short_article_tokens
+        self.pack_token_budget = pack_token_budget
+        self.max_pack_size = max_pack_size
         logger.info(f"ArticleEnricher initialized with model: {openai_model}")
 
         # System prompt for article analysis
@@ -75,65 +112,613 @@ class ArticleEnricher:
 
         Return ONLY the JSON object, no additional text.
         """
+
+        # Structured output formats generated from the ProcessedArticle model
+        self.response_format = enrichment_response_format()
+        self.packed_response_format = enrichment_response_format(packed=True)
+
+        # Short prompt for the cheap follow-up call when local repair can't fix a response
+        self.repair_prompt = """
+        You fix JSON produced by a travel content analyzer. You will receive a validation error and the
+        invalid JSON. Return ONLY the corrected JSON object, keeping every value that is already valid.
+        Missing lists must be empty lists and a missing primary location must be "worldwide".
+        """
+
+        # Shorter prompt for articles the pre-classifier doesn't consider deals
+        self.light_system_prompt = """
+        You are an expert travel content analyzer. Your task is to analyze travel content and extract specific metadata in a structured format. You must return ONLY a valid JSON object with these exact fields and possible values.
+
+        Required JSON format:
+        {
+            "content_type": ["guide", "news", "tip", "experience", "deal"],
+            "deal_data": null,
+            "locations": {
+                "primary": "string",
+                "secondary": []
+            },
+            "audience": ["budget", "luxury", "family", "adventure", "general"],
+            "key_themes": ["food", "culture", "outdoors", "shopping", "nightlife", "news", "guide"],
+            "seasonality": ["any", "summer", "winter", "shoulder"]
+        }
+
+        Leave "deal_data" null. For primary location, return the country in a lowercase string with no spaces or "worldwide". Secondary locations can be cities or additional countries but should be a list with entries that are all lowercase with no spaces.
+
+        Return ONLY the JSON object, no additional text.
+        """
+
+        # Prompts used when several articles are sent in one request
+        self.packed_prompt = self._packed_prompt(self.system_prompt)
+        self.light_packed_prompt = self._packed_prompt(self.light_system_prompt)
+
+    @staticmethod
+    def _packed_prompt(system_prompt: str) -> str:
+        return system_prompt + """
+        MULTIPLE ARTICLES: The content contains several articles, each starting with a line "### ARTICLE <id>".
+        Analyze each article independently and return ONLY a JSON object of this form:
+        {
+            "results": [
+                {"article_id": <id>, ...the fields of the JSON object described above for that article... }
+            ]
+        }
+        Include every article id exactly once.
+        """
+
+    def _prompt_for(self, article: Dict, packed: bool = False) -> str:
+        """System prompt for an article's pre-classifier route"""
+        if article.get('route') == 'light':
+            return self.light_packed_prompt if packed else self.light_system_prompt
+        return self.packed_prompt if packed else self.system_prompt
+
+    def prompt_version_for(self, route: str = "full", packed: bool = False) -> str:
+        """Version stored with enrichments made on a pre-classifier route, alone or in a packed request"""
+        response_format = self.packed_response_format if packed else self.response_format
+        return prompt_version(self._prompt_for({'route': route}, packed), response_format)
+
+    def current_prompt_versions(self) -> List[str]:
+        """Versions of every route's current prompts; enrichments with any other version are outdated"""
+        return sorted({
+            self.prompt_version_for(route, packed) for route in ("full", "light") for packed in (False, True)
+        })
     
+    def skip_version(self) -> str:
+        """Version stored with articles the pre-classifier skipped"""
+        return f"skip:{self.pre_classifier.version}" if self.pre_classifier else "skip:off"
+
     def get_unprocessed_articles(self) -> List[Dict]:
-        """Get articles that haven't been processed yet"""
+        """
+        Get articles that haven't been processed yet
+
+        Articles skipped by an earlier version of the pre-classifier rules (or before
+        skips were versioned) count as unprocessed, so they are triaged again.
+        """
         query = """
             SELECT f.* FROM articles f
             LEFT JOIN processed_articles p ON f.id = p.fetched_article_id
-            WHERE p.id IS NULL AND f.is_full_content_fetched = 1
+            LEFT JOIN enrichment_failures d ON f.id = d.fetched_article_id
+            WHERE (
+                p.id IS NULL
+                OR (
+                    json_extract(p.content_type, '$[0]') = 'irrelevant'
+                    AND COALESCE(p.prompt_version, '') != ?
+                )
+            )
+            AND f.is_full_content_fetched = 1 AND COALESCE(d.dead, 0) = 0
         """
-        cursor = self.processed_db.conn.execute(query)
+        cursor = self.processed_db.conn.execute(query, (self.skip_version(),))
         articles = [dict(row) for row in cursor.fetchall()]
         logger.info(f"Found {len(articles)} unprocessed articles")
         return articles
         
-    def enrich_article(self, article_id: int, content: str) -> ProcessedArticle:
+    def triage(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Route articles with the pre-classifier before any LLM call
+
+        Junk is stored as 'irrelevant' with the pre-classifier's version, so it isn't
+        picked up again until the relevance rules change; the remaining articles are
+        returned with a "route" entry of "full" or "light".
+        """
+        if not self.pre_classifier:
+            return articles
+
+        remaining = []
+        skipped = []
+        for article in articles:
+            decision = self.pre_classifier.route(article)
+            if decision['route'] == 'skip':
+                skipped.append(ProcessedArticle(
+                    fetched_article_id=article['id'],
+                    content_type=['irrelevant'],
+                    locations={'primary': 'worldwide', 'secondary': []},
+                    audience=[],
+                    key_themes=[],
+                    seasonality=[],
+                    processed_date=datetime.now(),
+                    prompt_version=self.skip_version()
+                ))
+            else:
+                remaining.append({**article, 'route': decision['route']})
+
+        self.processed_db.save_articles(skipped)
+        light_count = sum(1 for article in remaining if article['route'] == 'light')
+        logger.info(
+            f"Pre-classifier skipped {len(skipped)} articles, "
+            f"{light_count} light and {len(remaining) - light_count} full enrichments remaining"
+        )
+        return remaining
+
+    def prioritize(self, articles: List[Dict]) -> List[Dict]:
+        """Order articles most urgent first when a scheduler is set"""
+        if not self.scheduler:
+            return articles
+        return self.scheduler.order(articles)
+
+    def work_units(self, articles: List[Dict], packed: bool = False) -> List[List[Dict]]:
+        """
+        Requests for prepared articles in queue order: packs, or one-element lists for single requests
+
+        A pack is placed at the position of its most urgent article.
+        """
+        if not packed:
+            return [
+                [{**article, 'prepared': self.prepare_content(article['content'], article.get('title', ''))}]
+                for article in articles
+            ]
+        packs, singles = self.pack_articles(articles)
+        position = {article['id']: index for index, article in enumerate(articles)}
+        units = packs + [[single] for single in singles]
+        return sorted(units, key=lambda unit: min(position[article['id']] for article in unit))
+
+    def prepare_content(self, content: str, title: str = "") -> Dict:
+        """Fit article text to the token budget before it is sent to the LLM"""
+        prepared = self.token_budget.fit(content, title)
+        if prepared['truncated']:
+            logger.debug(f"Truncated article content from {prepared['original_tokens']} to {prepared['tokens']} tokens")
+        return prepared
+
+    def enrich_article(self, article_id: int, content: str, title: str = "", route: str = "full") -> ProcessedArticle:
         """Analyze article content and extract structured metadata"""
         logger.debug(f"Enriching article ID: {article_id}")
+        prepared = self.prepare_content(content, title)
+        system_prompt = self._prompt_for({'route': route})
         try:
-            response = self.llm.analyze(self.system_prompt, content)
-            enriched_data = json.loads(response)
-            
-            # Log useful metadata for debugging
-            content_type = enriched_data.get("content_type", ["unknown"])[0]
-            locations = enriched_data.get("locations", {})
-            primary_location = locations.get("primary", "unknown")
-            
-            logger.info(f"Article {article_id} enriched: type={content_type}, location={primary_location}")
-            
-            return ProcessedArticle(
-                fetched_article_id=article_id,
-                processed_date=datetime.now(),
-                **enriched_data
+            response = self.llm.analyze(
+                system_prompt, prepared['text'], self.response_format,
+                caller="enrichment", article_ids=[article_id], validate=self._validator(article_id)
             )
-        except ValidationError as e:
-            logger.error(f"Validation error on article {article_id}: {str(e)}")
-            raise e
-        except json.JSONDecodeError:
+            try:
+                processed = self._parse_response(article_id, response)
+            except ValueError as e:
+                processed = self._fix_response(article_id, response, e)
+            processed.prompt_version = self.prompt_version_for(route)
+            return self._with_token_counts(processed, prepared)
+        except ValueError as e:
+            raise LLMBadOutputError(f"Invalid enrichment output: {str(e)}") from e
+        except LLMError:
+            raise
+        except Exception as e:
+            logger.error(f"General error enriching article {article_id}: {str(e)}")
+            raise LLMError(f"Error enriching article: {str(e)}") from e
+
+    async def enrich_prepared_async(self, article_id: int, prepared: Dict, route: str = "full") -> ProcessedArticle:
+        """Async enrichment of content already fitted by prepare_content"""
+        logger.debug(f"Enriching article ID: {article_id}")
+        system_prompt = self._prompt_for({'route': route})
+        try:
+            response = await self.llm.analyze_async(
+                system_prompt, prepared['text'], self.response_format,
+                caller="enrichment", article_ids=[article_id], validate=self._validator(article_id)
+            )
+            try:
+                processed = self._parse_response(article_id, response)
+            except ValueError as e:
+                processed = await self._fix_response_async(article_id, response, e)
+            processed.prompt_version = self.prompt_version_for(route)
+            return self._with_token_counts(processed, prepared)
+        except ValueError as e:
+            raise LLMBadOutputError(f"Invalid enrichment output: {str(e)}") from e
+        except LLMError:
+            raise
+        except Exception as e:
+            logger.error(f"General error enriching article {article_id}: {str(e)}")
+            raise LLMError(f"Error enriching article: {str(e)}") from e
+
+    def save_articles(self, articles: List[ProcessedArticle]) -> int:
+        """Save enriched articles together with their location index entries"""
+        saved = self.processed_db.save_articles(articles)
+        if saved:
+            self.processed_db.save_article_locations({
+                article.fetched_article_id: self.gazetteer.location_rows(article) for article in articles
+            })
+        return saved
+
+    def index_locations(self) -> int:
+        """Index the locations of articles enriched before the location index existed"""
+        locations = {}
+        for row in self.processed_db.get_unindexed_articles():
+            try:
+                article = ProcessedArticle(
+                    fetched_article_id=row['fetched_article_id'],
+                    content_type=json.loads(row['content_type']),
+                    deal_data=json.loads(row['deal_data']) if row['deal_data'] else None,
+                    locations=json.loads(row['locations']),
+                    audience=[],
+                    key_themes=[],
+                    seasonality=[],
+                    processed_date=row['processed_date']
+                )
+            except (ValueError, TypeError) as e:
+                logger.error(f"Can't index locations of article {row['fetched_article_id']}: {str(e)}")
+                continue
+            locations[article.fetched_article_id] = self.gazetteer.location_rows(article)
+
+        self.processed_db.save_article_locations(locations)
+        if locations:
+            logger.info(f"Indexed locations of {len(locations)} previously enriched articles")
+        # Locations indexed before the gazetteer had coordinates for them
+        self.processed_db.fill_location_coordinates(self.gazetteer.coordinates())
+        return len(locations)
+
+    def record_failure(self, article_id: int, error: Exception):
+        """Record a failed enrichment; only errors that will recur count toward the dead-letter limit"""
+        transient = getattr(error, 'transient', False)
+        dead = self.processed_db.record_enrichment_failure(
+            article_id, type(error).__name__, str(error),
+            counted=not transient, max_attempts=self.max_enrichment_attempts
+        )
+        if dead:
+            logger.warning(f"Article {article_id} dead-lettered after {self.max_enrichment_attempts} failed attempts")
+
+    @staticmethod
+    def _with_token_counts(processed: ProcessedArticle, prepared: Dict) -> ProcessedArticle:
+        processed.input_tokens = prepared['tokens']
+        processed.original_tokens = prepared['original_tokens']
+        return processed
+
+    def _parse_response(self, article_id: int, response: str) -> ProcessedArticle:
+        """Validate an LLM response into a ProcessedArticle, repairing common defects locally"""
+        try:
+            enriched_data = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            enriched_data = repair_json(response)
+            if enriched_data is not None:
+                logger.info(f"Repaired malformed JSON for article {article_id}")
+
+        if not isinstance(enriched_data, dict):
             logger.error(f"JSON decode error on article {article_id}")
             raise ValueError("Failed to parse LLM response as JSON")
+
+        try:
+            return self._build_article(article_id, enriched_data)
+        except ValidationError as e:
+            try:
+                processed = self._build_article(article_id, repair_fields(enriched_data))
+                logger.info(f"Repaired invalid fields for article {article_id}")
+                return processed
+            except ValidationError:
+                logger.error(f"Validation error on article {article_id}: {str(e)}")
+                raise e
+
+    def _validator(self, article_id: int) -> Callable[[str], ProcessedArticle]:
+        """Check of a response before it is cached, so output that needs the model again is never replayed"""
+        return lambda response: self._parse_response(article_id, response)
+
+    def _pack_validator(self, pack: List[Dict]) -> Callable[[str], None]:
+        def validate(response: str):
+            _, failed = self._parse_packed_response(pack, response)
+            if failed:
+                raise ValueError(f"Packed response left {len(failed)} articles unparsed")
+        return validate
+
+    def _build_article(self, article_id: int, enriched_data: Dict) -> ProcessedArticle:
+        # Log useful metadata for debugging
+        content_type = (enriched_data.get("content_type") or ["unknown"])[0]
+        locations = enriched_data.get("locations") or {}
+        primary_location = locations.get("primary", "unknown") if isinstance(locations, dict) else locations
+
+        processed = ProcessedArticle(
+            fetched_article_id=article_id,
+            processed_date=datetime.now(),
+            **{key: value for key, value in enriched_data.items() if key not in BOOKKEEPING_FIELDS}
+        )
+        self.gazetteer.canonicalize(processed)
+        logger.info(f"Article {article_id} enriched: type={content_type}, location={primary_location}")
+        return processed
+
+    def _repair_request(self, response: str, error: Exception) -> str:
+        return f"Validation error:\n{str(error)}\n\nInvalid JSON:\n{response}"
+
+    def _fix_response(self, article_id: int, response: str, error: Exception) -> ProcessedArticle:
+        """Ask the model to fix its own output; much cheaper than re-sending the article"""
+        logger.info(f"Requesting JSON fix for article {article_id}")
+        fixed = self.llm.analyze(
+            self.repair_prompt, self._repair_request(response, error), self.response_format,
+            caller="enrichment_repair", article_ids=[article_id], validate=self._validator(article_id)
+        )
+        return self._parse_response(article_id, fixed)
+
+    async def _fix_response_async(self, article_id: int, response: str, error: Exception) -> ProcessedArticle:
+        logger.info(f"Requesting JSON fix for article {article_id}")
+        fixed = await self.llm.analyze_async(
+            self.repair_prompt, self._repair_request(response, error), self.response_format,
+            caller="enrichment_repair", article_ids=[article_id], validate=self._validator(article_id)
+        )
+        return self._parse_response(article_id, fixed)
+
+    def pack_articles(self, articles: List[Dict]) -> Tuple[List[List[Dict]], List[Dict]]:
+        """
+        Group short articles into packs under the pack token budget
+
+        Returns:
+            Packs of prepared articles, and the prepared articles to send on their own.
+            Each prepared article is the article dict plus a "prepared" entry from prepare_content.
+        """
+        packs: List[List[Dict]] = []
+        singles: List[Dict] = []
+        # Articles on different pre-classifier routes use different prompts, so pack them apart
+        current: Dict[str, List[Dict]] = defaultdict(list)
+        current_tokens: Dict[str, int] = defaultdict(int)
+
+        for article in articles:
+            prepared = {**article, 'prepared': self.prepare_content(article['content'], article.get('title', ''))}
+            tokens = prepared['prepared']['tokens']
+            route = article.get('route', 'full')
+            if tokens > self.short_article_tokens:
+                singles.append(prepared)
+                continue
+            if current[route] and (current_tokens[route] + tokens > self.pack_token_budget
+                                   or len(current[route]) >= self.max_pack_size):
+                packs.append(current[route])
+                current[route], current_tokens[route] = [], 0
+            current[route].append(prepared)
+            current_tokens[route] += tokens
+
+        for pack in current.values():
+            if len(pack) > 1:
+                packs.append(pack)
+            else:
+                # A pack of one is just a single request with a longer prompt
+                singles.extend(pack)
+        return packs, singles
+
+    @staticmethod
+    def _pack_content(pack: List[Dict]) -> str:
+        return "\n\n".join(f"### ARTICLE {article['id']}\n{article['prepared']['text']}" for article in pack)
+
+    def _parse_packed_response(self, pack: List[Dict], response: str) -> Tuple[List[ProcessedArticle], List[Dict]]:
+        """Validate each element of a packed response, returning the articles that need a retry on their own"""
+        try:
+            parsed = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            parsed = repair_json(response)
+        results = parsed.get("results") if isinstance(parsed, dict) else None
+        if isinstance(results, list):
+            # Structured output tags each element with its article ID
+            results = {
+                str(element.pop("article_id")): element
+                for element in results if isinstance(element, dict) and "article_id" in element
+            }
+        if not isinstance(results, dict):
+            logger.error(f"JSON decode error on packed response for articles {[a['id'] for a in pack]}")
+            results = {}
+
+        processed: List[ProcessedArticle] = []
+        failed: List[Dict] = []
+        version = self.prompt_version_for(pack[0].get('route', 'full'), packed=True)
+        for article in pack:
+            element = results.get(str(article['id']))
+            if not isinstance(element, dict):
+                failed.append(article)
+                continue
+            try:
+                parsed = self._parse_response(article['id'], json.dumps(element))
+                parsed.prompt_version = version
+                processed.append(self._with_token_counts(parsed, article['prepared']))
+            except ValueError:
+                failed.append(article)
+
+        if failed:
+            logger.info(f"Packed request left {len(failed)} of {len(pack)} articles for single requests")
+        return processed, failed
+
+    def enrich_pack(self, pack: List[Dict]) -> Tuple[List[ProcessedArticle], List[Dict]]:
+        """Enrich several short articles with one request"""
+        logger.debug(f"Enriching packed articles: {[a['id'] for a in pack]}")
+        try:
+            response = self.llm.analyze(
+                self._prompt_for(pack[0], packed=True), self._pack_content(pack), self.packed_response_format,
+                caller="enrichment_pack", article_ids=[article['id'] for article in pack],
+                validate=self._pack_validator(pack)
+            )
         except Exception as e:
-            logger.error(f"General error enriching article {article_id}: {str(e)}")
-            raise Exception(f"Error enriching article: {str(e)}")
+            logger.error(f"Packed request failed for articles {[a['id'] for a in pack]}: {str(e)}")
+            return [], pack
+        return self._parse_packed_response(pack, response)
 
-    def process_pending_articles(self):
-        """Process all unprocessed articles"""
+    async def enrich_pack_async(self, pack: List[Dict]) -> Tuple[List[ProcessedArticle], List[Dict]]:
+        """Async variant of enrich_pack used by the concurrent processing mode"""
+        logger.debug(f"Enriching packed articles: {[a['id'] for a in pack]}")
+        try:
+            response = await self.llm.analyze_async(
+                self._prompt_for(pack[0], packed=True), self._pack_content(pack), self.packed_response_format,
+                caller="enrichment_pack", article_ids=[article['id'] for article in pack],
+                validate=self._pack_validator(pack)
+            )
+        except Exception as e:
+            logger.error(f"Packed request failed for articles {[a['id'] for a in pack]}: {str(e)}")
+            return [], pack
+        return self._parse_packed_response(pack, response)
+
+    def process_pending_articles(self, packed: bool = False, time_budget: Optional[float] = None):
+        """
+        Process unprocessed articles most urgent first, packing short ones into shared requests if requested
+
+        Args:
+            packed: Group short articles into shared requests
+            time_budget: Seconds after which no new request is started; the rest waits for the next run
+        """
         logger.info("Starting to process pending articles")
-        unprocessed = self.get_unprocessed_articles()
+        started = self.clock()
+        unprocessed = self.prioritize(self.triage(self.get_unprocessed_articles()))
         processed_count = 0
         error_count = 0
-        
-        for article in unprocessed:
+        deferred = 0
+
+        if packed:
+            units = self.work_units(unprocessed, packed=True)
+            packs = [unit for unit in units if len(unit) > 1]
+            logger.info(f"Packed {sum(len(pack) for pack in packs)} short articles into {len(packs)} requests")
+        else:
+            units = [[article] for article in unprocessed]
+
+        def enrich_single(article: Dict) -> int:
+            nonlocal error_count
             try:
-                processed = self.enrich_article(article['id'], article['content'])
-                self.processed_db.save_article(processed)
-                processed_count += 1
+                processed = self.enrich_article(
+                    article['id'], article['content'], article.get('title', ''), article.get('route', 'full')
+                )
+                return self.save_articles([processed])
             except Exception as e:
                 error_count += 1
                 logger.error(f"Failed to process article {article['id']}: {str(e)}")
                 print(f"Error processing article {article['id']}: {str(e)}")
+                self.record_failure(article['id'], e)
+                return 0
+
+        for index, unit in enumerate(units):
+            if time_budget is not None and self.clock() - started >= time_budget:
+                deferred = sum(len(remaining) for remaining in units[index:])
+                break
+            if len(unit) == 1:
+                processed_count += enrich_single(unit[0])
                 continue
-        
+            processed, failed = self.enrich_pack(unit)
+            processed_count += self.save_articles(processed)
+            # Elements that failed validation fall back to single-article requests
+            for article in failed:
+                processed_count += enrich_single(article)
+
+        if deferred:
+            logger.info(f"Time budget of {time_budget}s reached, {deferred} articles deferred to the next run")
+        logger.info(f"Processing complete. Processed: {processed_count}, Errors: {error_count}")
+        return processed_count
+
+    def process_pending_articles_concurrent(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 200000,
+        save_batch_size: int = 25,
+        packed: bool = False,
+        time_budget: Optional[float] = None
+    ) -> int:
+        """
+        Process all unprocessed articles with several LLM requests in flight at once, most urgent first
+
+        Args:
+            max_concurrency: Maximum number of requests awaiting a response at any time
+            requests_per_minute: Request budget of the API quota
+            tokens_per_minute: Token budget of the API quota
+            save_batch_size: Number of enriched articles written per database transaction
+            packed: Group short articles into shared requests
+            time_budget: Seconds after which no new request is started; the rest waits for the next run
+        """
+        return asyncio.run(self._process_pending_articles_async(
+            max_concurrency, requests_per_minute, tokens_per_minute, save_batch_size, packed, time_budget
+        ))
+
+    async def _process_pending_articles_async(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        save_batch_size: int,
+        packed: bool,
+        time_budget: Optional[float] = None
+    ) -> int:
+        logger.info(f"Starting to process pending articles concurrently (max in flight: {max_concurrency})")
+        started = self.clock()
+        unprocessed = self.prioritize(self.triage(self.get_unprocessed_articles()))
+        if not unprocessed:
+            logger.info("Processing complete. Processed: 0, Errors: 0")
+            return 0
+
+        units = self.work_units(unprocessed, packed)
+        if packed:
+            packs = [unit for unit in units if len(unit) > 1]
+            logger.info(f"Packed {sum(len(pack) for pack in packs)} short articles into {len(packs)} requests")
+
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        prompt_tokens: Dict[str, int] = {}
+
+        def prompt_size(article: Dict, packed: bool = False) -> int:
+            prompt = self._prompt_for(article, packed)
+            if prompt not in prompt_tokens:
+                prompt_tokens[prompt] = count_tokens(prompt, self.token_budget.model)
+            return prompt_tokens[prompt]
+        pending_saves: List[ProcessedArticle] = []
+        processed_count = 0
+        error_count = 0
+        deferred = 0
+
+        def out_of_time() -> bool:
+            return time_budget is not None and self.clock() - started >= time_budget
+
+        def flush():
+            nonlocal processed_count, error_count
+            saved = self.save_articles(pending_saves)
+            processed_count += saved
+            error_count += len(pending_saves) - saved
+            pending_saves.clear()
+
+        async def enrich_single(article: Dict) -> Optional[ProcessedArticle]:
+            """An enriched article, or None when it failed or was deferred"""
+            nonlocal error_count, deferred
+            async with semaphore:
+                # Checked once a slot is free: every task is created at once and most of them
+                # spend the run waiting for the semaphore. Deferred articles take no limiter tokens
+                if out_of_time():
+                    deferred += 1
+                    return None
+                await limiter.acquire(prompt_size(article) + article['prepared']['tokens'])
+                try:
+                    return await self.enrich_prepared_async(
+                        article['id'], article['prepared'], article.get('route', 'full')
+                    )
+                except Exception as e:
+                    error_count += 1
+                    logger.error(f"Failed to process article {article['id']}: {str(e)}")
+                    self.record_failure(article['id'], e)
+                    return None
+
+        async def enrich(unit: List[Dict]) -> List[ProcessedArticle]:
+            """Enrich a pack, or a single article passed as a one-element list"""
+            nonlocal deferred
+            if len(unit) == 1:
+                processed = await enrich_single(unit[0])
+                return [processed] if processed else []
+
+            async with semaphore:
+                if out_of_time():
+                    deferred += len(unit)
+                    return []
+                await limiter.acquire(prompt_size(unit[0], packed=True) + sum(a['prepared']['tokens'] for a in unit))
+                processed, failed = await self.enrich_pack_async(unit)
+
+            # Elements that failed validation fall back to single-article requests
+            retried = await asyncio.gather(*(enrich_single(article) for article in failed))
+            processed.extend(result for result in retried if result)
+            return processed
+
+        # Units start in queue order: waiters on the semaphore and rate limiter are served first come, first served
+        tasks = [asyncio.create_task(enrich(unit)) for unit in units]
+        for task in asyncio.as_completed(tasks):
+            pending_saves.extend(await task)
+            if len(pending_saves) >= save_batch_size:
+                flush()
+        flush()
+
+        if deferred:
+            logger.info(f"Time budget of {time_budget}s reached, {deferred} articles deferred to the next run")
         logger.info(f"Processing complete. Processed: {processed_count}, Errors: {error_count}")
         return processed_count
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from content.enriching.article_enricher import ArticleEnricher
+from models.schemas import ProcessedArticle
+from services.openai.errors import LLMBadOutputError, LLMRequestError
+from config.logging_config import fetch_logger as logger
+
+# Batch job states that will never change again
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchEnricher:
+    def __init__(self, enricher: ArticleEnricher, batch_dir: Optional[str] = None,
+                 max_batch_size: int = 50000, save_batch_size: int = 100):
+        """
+        Offline enrichment through the batch API, for backfills that don't need real-time answers
+
+        Args:
+            enricher: Enricher providing the prompt, client and response parsing
+            batch_dir: Directory for generated JSONL batch files (defaults to the temp directory)
+            max_batch_size: Maximum number of articles per batch job
+            save_batch_size: Number of results written per database transaction
+        """
+        self.enricher = enricher
+        self.processed_db = enricher.processed_db
+        self.llm = enricher.llm
+        self.batch_dir = batch_dir or tempfile.gettempdir()
+        self.max_batch_size = max_batch_size
+        self.save_batch_size = save_batch_size
+
+    @staticmethod
+    def custom_id(article_id: int) -> str:
+        """Stable batch request ID for an article"""
+        return f"article-{article_id}"
+
+    @staticmethod
+    def article_id_from_custom_id(custom_id: str) -> int:
+        return int(custom_id.rsplit("-", 1)[1])
+
+    def write_batch_file(self, articles: List[Dict]) -> Tuple[str, List[Dict]]:
+        """Serialize articles into a JSONL batch file, returning its path and per-article token counts"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.batch_dir, f"enrichment_batch_{timestamp}.jsonl")
+        items = []
+        with open(path, "w") as batch_file:
+            for article in articles:
+                prepared = self.enricher.prepare_content(article['content'], article.get('title', ''))
+                line = self.llm.batch_request(
+                    self.custom_id(article['id']),
+                    self.enricher._prompt_for(article),
+                    prepared['text'],
+                    self.enricher.response_format
+                )
+                batch_file.write(json.dumps(line) + "\n")
+                items.append({
+                    "fetched_article_id": article['id'],
+                    "input_tokens": prepared['tokens'],
+                    "original_tokens": prepared['original_tokens'],
+                    "prompt_version": self.enricher.prompt_version_for(article.get('route', 'full'))
+                })
+        return path, items
+
+    def submit_pending(self) -> Optional[str]:
+        """Submit unprocessed articles that aren't already in an open batch, returning the batch ID"""
+        in_flight = set(self.processed_db.get_open_batch_article_ids())
+        unprocessed = [
+            article for article in self.enricher.get_unprocessed_articles()
+            if article['id'] not in in_flight
+        ]
+        pending = self.enricher.triage(unprocessed)[:self.max_batch_size]
+
+        if not pending:
+            logger.info("No articles to submit for batch enrichment")
+            return None
+
+        path, items = self.write_batch_file(pending)
+        try:
+            batch = self.llm.submit_batch(path)
+        finally:
+            os.remove(path)
+
+        self.processed_db.save_enrichment_batch(batch['batch_id'], batch['input_file_id'], batch['status'], items)
+        logger.info(f"Submitted enrichment batch {batch['batch_id']} with {len(pending)} articles")
+        return batch['batch_id']
+
+    def ingest_results(self, batch_id: str, file_id: str) -> Dict[str, int]:
+        """Stream a batch result file into the processed articles table"""
+        token_counts = self.processed_db.get_batch_item_token_counts(batch_id)
+        processed_count = 0
+        error_count = 0
+        pending_saves: List[ProcessedArticle] = []
+
+        for result in self.llm.iter_batch_results(file_id):
+            article_id = self.article_id_from_custom_id(result['custom_id'])
+            self._record_usage(article_id, result)
+            if result['error']:
+                error_count += 1
+                logger.error(f"Batch request failed for article {article_id}: {result['error']}")
+                self.enricher.record_failure(article_id, LLMRequestError(str(result['error'])))
+                continue
+            try:
+                try:
+                    processed = self.enricher._parse_response(article_id, result['content'])
+                except ValueError as parse_error:
+                    processed = self.enricher._fix_response(article_id, result['content'], parse_error)
+            except ValueError as e:
+                error_count += 1
+                logger.error(f"Failed to process batch result for article {article_id}: {str(e)}")
+                self.enricher.record_failure(article_id, LLMBadOutputError(str(e)))
+                continue
+            except Exception as e:
+                error_count += 1
+                logger.error(f"Failed to process batch result for article {article_id}: {str(e)}")
+                self.enricher.record_failure(article_id, e)
+                continue
+
+            counts = token_counts.get(article_id, {})
+            processed.input_tokens = counts.get('input_tokens')
+            processed.original_tokens = counts.get('original_tokens')
+            processed.prompt_version = counts.get('prompt_version')
+            pending_saves.append(processed)
+
+            if len(pending_saves) >= self.save_batch_size:
+                processed_count += self.enricher.save_articles(pending_saves)
+                pending_saves.clear()
+
+        processed_count += self.enricher.save_articles(pending_saves)
+        return {"processed": processed_count, "errors": error_count}
+
+    def _record_usage(self, article_id: int, result: Dict):
+        """Record a batch result in the LLM telemetry; latency isn't known for batch requests"""
+        telemetry = getattr(self.llm, 'telemetry', None)
+        if not telemetry:
+            return
+        usage = result.get('usage') or {}
+        telemetry.record(
+            caller="batch_enrichment",
+            model=self.llm.model,
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0),
+            batch=True,
+            error_type="LLMRequestError" if result['error'] else None,
+            article_ids=[article_id]
+        )
+
+    def poll_open_batches(self) -> Dict[str, int]:
+        """Check every open batch job and ingest the results of finished ones"""
+        totals = {"processed": 0, "errors": 0, "open": 0}
+
+        for open_batch in self.processed_db.get_open_enrichment_batches():
+            batch_id = open_batch['batch_id']
+            batch = self.llm.get_batch(batch_id)
+            status = batch['status']
+
+            if status not in TERMINAL_STATUSES:
+                self.processed_db.update_enrichment_batch(batch_id, status)
+                totals["open"] += 1
+                logger.info(f"Enrichment batch {batch_id} still {status}")
+                continue
+
+            # Expired and cancelled jobs can still carry partial results
+            if batch['output_file_id']:
+                results = self.ingest_results(batch_id, batch['output_file_id'])
+                totals["processed"] += results["processed"]
+                totals["errors"] += results["errors"]
+                logger.info(
+                    f"Ingested enrichment batch {batch_id}: "
+                    f"Processed: {results['processed']}, Errors: {results['errors']}"
+                )
+            else:
+                logger.error(f"Enrichment batch {batch_id} finished as {status} without results")
+
+            self.processed_db.update_enrichment_batch(
+                batch_id, status, output_file_id=batch['output_file_id'], completed=True
+            )
+
+        return totals
+
+    def run(self) -> Dict[str, int]:
+        """Poll open jobs, ingest finished ones and submit anything still pending"""
+        totals = self.poll_open_batches()
+        batch_id = self.submit_pending()
+        totals["submitted"] = 1 if batch_id else 0
+        return totals
@@ -0,0 +1,127 @@
+import json
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from content.enriching.gazetteer import Gazetteer, load_gazetteer, normalize_key
+from database.processed_database import ProcessedDatabase
+from config.logging_config import fetch_logger as logger
+
+
+def _parse_date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+class DealClusterer:
+    def __init__(self, processed_db: ProcessedDatabase, gazetteer: Optional[Gazetteer] = None):
+        """
+        Collapse the same deal reported by several sources into one cluster representative
+
+        Deals are blocked on deal type, normalized origin, destination and price tier, so
+        only deals sharing a block are compared, and deals without a destination never
+        are; inside a block, deals whose travel windows overlap (or, without a window,
+        whose booking deadlines match) form one cluster. The representative stays
+        selectable and the others are marked as its duplicates.
+
+        Args:
+            processed_db: Database holding the enriched deals
+            gazetteer: Resolves origin and destination names to place IDs
+        """
+        self.processed_db = processed_db
+        self.gazetteer = gazetteer or load_gazetteer()
+
+    def _place_key(self, names) -> Tuple[str, ...]:
+        if isinstance(names, str):
+            names = [names]
+        return tuple(sorted({
+            self.gazetteer.location_id(name) or normalize_key(name) for name in names or [] if name
+        }))
+
+    @staticmethod
+    def _label_key(labels) -> Tuple[str, ...]:
+        if isinstance(labels, str):
+            labels = [labels]
+        return tuple(sorted({normalize_key(label) for label in labels or [] if label}))
+
+    def block_key(self, deal_data: Dict) -> Optional[Tuple]:
+        """Deals can only be duplicates of deals with the same block key; None for deals without a destination"""
+        destination = self._place_key(deal_data.get('destination'))
+        if not destination:
+            return None
+        return (
+            self._label_key(deal_data.get('type')),
+            self._place_key(deal_data.get('origin')),
+            destination,
+            self._label_key(deal_data.get('price_tier')),
+        )
+
+    @staticmethod
+    def travel_window(deal_data: Dict) -> Tuple[Optional[date], Optional[date]]:
+        window = deal_data.get('travel_window') or {}
+        start, end = _parse_date(window.get('start')), _parse_date(window.get('end'))
+        return start or end, end or start
+
+    @staticmethod
+    def _split_by_window(block: List[Tuple[Dict, Tuple]]) -> List[List[Dict]]:
+        """Clusters of deals with chained overlapping travel windows; deals without one need the same deadline"""
+        undated: Dict[Optional[date], List[Dict]] = {}
+        for deal, (start, _) in block:
+            if start is None:
+                undated.setdefault(_parse_date(deal['deal_data'].get('booking_deadline')), []).append(deal)
+        clusters = list(undated.values())
+        cluster_end = None
+        for deal, (start, end) in sorted((item for item in block if item[1][0] is not None), key=lambda item: item[1]):
+            if cluster_end is not None and start <= cluster_end:
+                clusters[-1].append(deal)
+                cluster_end = max(cluster_end, end)
+            else:
+                clusters.append([deal])
+                cluster_end = end
+        return clusters
+
+    @staticmethod
+    def representative(cluster: List[Dict]) -> Dict:
+        """An already featured deal, else the best valued one, else the first stored"""
+        return min(cluster, key=lambda deal: (
+            deal['last_used'] is None,
+            -(deal['deal_data'].get('value_score') or 0),
+            deal['id']
+        ))
+
+    def cluster(self, deals: List[Dict]) -> List[List[Dict]]:
+        """Clusters of the given deal rows (with decoded deal_data), representative first"""
+        blocks: Dict[Tuple, List[Tuple[Dict, Tuple]]] = {}
+        clusters = []
+        for deal in deals:
+            key = self.block_key(deal['deal_data'])
+            if key is None:
+                # Nothing to tell where the deal goes, so it can't be matched to another one
+                clusters.append([deal])
+                continue
+            blocks.setdefault(key, []).append((deal, self.travel_window(deal['deal_data'])))
+        for block in blocks.values():
+            for cluster in self._split_by_window(block):
+                representative = self.representative(cluster)
+                clusters.append([representative] + [deal for deal in cluster if deal is not representative])
+        return clusters
+
+    def run(self) -> int:
+        """Re-cluster the live deals, returning how many are hidden as duplicates"""
+        deals = []
+        for row in self.processed_db.get_live_deals():
+            try:
+                deal_data = json.loads(row['deal_data'])
+            except (TypeError, ValueError):
+                continue
+            if isinstance(deal_data, dict):
+                deals.append({**row, 'deal_data': deal_data})
+
+        duplicates = {
+            deal['id']: cluster[0]['id']
+            for cluster in self.cluster(deals) if len(cluster) > 1
+            for deal in cluster[1:]
+        }
+        self.processed_db.save_deal_clusters(duplicates)
+        logger.info(f"Clustered {len(deals)} live deals, {len(duplicates)} duplicates hidden")
+        return len(duplicates)
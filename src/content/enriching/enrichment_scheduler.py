@@ -0,0 +1,134 @@
+import math
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from content.enriching.token_budget import PRICE_PATTERN
+
+MONTH_NUMBERS = {
+    name: number
+    for number, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",),
+        ("june", "jun"), ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"),
+        ("october", "oct"), ("november", "nov"), ("december", "dec")
+    ], 1)
+    for name in names
+}
+_MONTHS = "|".join(sorted(MONTH_NUMBERS, key=len, reverse=True))
+
+# A date introduced by deadline wording: "book by March 5", "sale ends 2025-03-05", "expires 3/5"
+DEADLINE_DATE = re.compile(
+    rf"\b(?:book(?:ing)? by|ends?|ending|expires?|valid (?:until|through)|until|through|deadline:?)\s+"
+    rf"(?:(?P<month>{_MONTHS})\.? (?P<day>\d{{1,2}})|(?P<iso>\d{{4}}-\d{{2}}-\d{{2}})|(?P<m>\d{{1,2}})/(?P<d>\d{{1,2}}))\b",
+    re.IGNORECASE
+)
+# Urgency wording without a usable date
+DEADLINE_TERMS = re.compile(
+    r"\b(ends? (?:today|tonight|tomorrow|soon|this week|sunday|monday|friday)|last chance|limited time|"
+    r"flash sale|while (?:seats|supplies) last|book (?:now|by|soon)|only \d+ days?|\d+[- ]hour sale|expires? soon)\b",
+    re.IGNORECASE
+)
+
+# How time-sensitive each source category's content usually is
+CATEGORY_URGENCY = {"budget": 1.0, "luxury": 0.6, "travel_tips": 0.0}
+
+DEFAULT_WEIGHTS = {
+    "deadline": 4.0,        # explicit deadline inside the horizon, scaled by how close it is
+    "deadline_terms": 1.5,  # "last chance", "ends soon" and the like
+    "price": 1.0,           # prices or fares, the mark of a deal
+    "email_deal": 1.5,      # deal newsletters from email sources
+    "category": 1.0,        # scaled by CATEGORY_URGENCY of the source
+    "recency": 2.0,         # halves every recency_half_life_hours
+    "deal_route": 1.0,      # pre-classifier sent the article to full deal extraction
+}
+
+
+def find_deadline(text: str, today: date) -> Optional[date]:
+    """Earliest upcoming deadline date mentioned in deadline wording, if any"""
+    deadlines = []
+    for match in DEADLINE_DATE.finditer(text or ""):
+        try:
+            if match.group("iso"):
+                deadlines.append(date.fromisoformat(match.group("iso")))
+                continue
+            if match.group("month"):
+                month, day = MONTH_NUMBERS[match.group("month").lower()], int(match.group("day"))
+            else:
+                month, day = int(match.group("m")), int(match.group("d"))
+            deadline = date(today.year, month, day)
+            # Dates without a year that are well past refer to next year
+            if (today - deadline).days > 60:
+                deadline = date(today.year + 1, month, day)
+            deadlines.append(deadline)
+        except ValueError:
+            continue
+    return min(deadlines) if deadlines else None
+
+
+class EnrichmentScheduler:
+    def __init__(self, source_categories: Optional[Dict[str, str]] = None, weights: Optional[Dict[str, float]] = None,
+                 deadline_horizon_days: int = 30, recency_half_life_hours: float = 48.0,
+                 now: Optional[datetime] = None):
+        """
+        Orders the enrichment queue by urgency signals available before any LLM call
+
+        Args:
+            source_categories: Source name to category, from the sources config
+            weights: Overrides of DEFAULT_WEIGHTS
+            deadline_horizon_days: Deadlines further out than this add no urgency
+            recency_half_life_hours: Age at which the recency signal has halved
+            now: Reference time (defaults to the current time)
+        """
+        self.source_categories = source_categories or {}
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.deadline_horizon_days = deadline_horizon_days
+        self.recency_half_life_hours = recency_half_life_hours
+        self.now = now
+
+    @staticmethod
+    def from_sources(sources: List[Dict], **kwargs) -> "EnrichmentScheduler":
+        """Scheduler knowing the categories of the configured sources"""
+        return EnrichmentScheduler({source['name']: source.get('category') for source in sources}, **kwargs)
+
+    def _age_hours(self, published, now: datetime) -> Optional[float]:
+        if not published:
+            return None
+        try:
+            published = published if isinstance(published, datetime) else datetime.fromisoformat(str(published))
+        except ValueError:
+            return None
+        if published.tzinfo is not None:
+            published = published.astimezone().replace(tzinfo=None)
+        return max(0.0, (now - published).total_seconds() / 3600)
+
+    def urgency(self, article: Dict) -> float:
+        """Urgency score of an unprocessed article; higher is enriched first"""
+        now = self.now or datetime.now()
+        text = f"{article.get('title') or ''} {article.get('content') or ''}"
+        weights = self.weights
+        score = 0.0
+
+        deadline = find_deadline(text, now.date())
+        if deadline is not None:
+            days_left = (deadline - now.date()).days
+            if 0 <= days_left <= self.deadline_horizon_days:
+                score += weights["deadline"] * (1 - days_left / (self.deadline_horizon_days + 1))
+        if DEADLINE_TERMS.search(text):
+            score += weights["deadline_terms"]
+        if PRICE_PATTERN.search(text):
+            score += weights["price"]
+        if "@" in (article.get('source_url') or ""):
+            score += weights["email_deal"]
+
+        category = self.source_categories.get(article.get('source_name'))
+        score += weights["category"] * CATEGORY_URGENCY.get(category, 0.5)
+
+        age = self._age_hours(article.get('published_date'), now)
+        if age is not None:
+            score += weights["recency"] * math.pow(0.5, age / self.recency_half_life_hours)
+        if article.get('route') == 'full':
+            score += weights["deal_route"]
+        return score
+
+    def order(self, articles: List[Dict]) -> List[Dict]:
+        """Articles most urgent first; ties keep their original order"""
+        return sorted(articles, key=self.urgency, reverse=True)
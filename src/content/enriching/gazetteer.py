@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import yaml
+from models.schemas import Place, ProcessedArticle
+from config.logging_config import fetch_logger as logger
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent.parent.parent.parent / "config/gazetteer.yaml"
+
+# Longest phrase, in words, tried when scanning free text for a known place
+MAX_PHRASE_WORDS = 4
+# Shorter keys (airport codes, "uk", "la") only match a whole value, never a word inside one
+MIN_PHRASE_KEY_LENGTH = 4
+
+_default_gazetteer = None
+
+
+def normalize_key(name: str) -> str:
+    """Lookup key of a place name: lowercase ASCII letters and digits only"""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = name.lower().replace("&", "and")
+    return re.sub(r"[^a-z0-9]", "", name)
+
+
+def clean_name(name: str) -> str:
+    """Lowercased, whitespace-collapsed form kept for places the gazetteer doesn't know"""
+    return " ".join((name or "").lower().split())
+
+
+class Gazetteer:
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Offline lookup of countries, cities and regions with their aliases
+
+        Args:
+            path: YAML gazetteer file (defaults to config/gazetteer.yaml)
+        """
+        self.path = Path(path) if path else DEFAULT_GAZETTEER_PATH
+        self.places: Dict[str, Place] = {}
+        # Normalized name or alias -> place ID
+        self.index: Dict[str, str] = {}
+        self.load()
+
+    def load(self):
+        with open(self.path, "r") as f:
+            data = yaml.safe_load(f) or {}
+
+        for country_id, names in (data.get("countries") or {}).items():
+            self._add(Place(id=country_id, name=names[0], kind="country", country=country_id), names)
+        for country_id, cities in (data.get("cities") or {}).items():
+            for name, aliases in (cities or {}).items():
+                city_id = f"{country_id}:{name.replace(' ', '-')}"
+                self._add(Place(id=city_id, name=name, kind="city", country=country_id), [name] + (aliases or []))
+        for name, aliases in (data.get("regions") or {}).items():
+            region_id = f"region:{name.replace(' ', '-')}"
+            self._add(Place(id=region_id, name=name, kind="region"), [name] + (aliases or []))
+        for place_id, (latitude, longitude) in (data.get("coordinates") or {}).items():
+            place = self.places.get(place_id)
+            if place is None:
+                logger.debug(f"Gazetteer has coordinates for unknown place {place_id}")
+                continue
+            place.latitude, place.longitude = float(latitude), float(longitude)
+
+        logger.debug(f"Gazetteer loaded {len(self.places)} places with {len(self.index)} names")
+
+    def _add(self, place: Place, names: List[str]):
+        self.places[place.id] = place
+        for name in names:
+            key = normalize_key(str(name))
+            existing = self.index.get(key)
+            if existing and existing != place.id:
+                # Earlier entries win, so countries take precedence over cities of the same name
+                logger.debug(f"Gazetteer name '{name}' of {place.id} already maps to {existing}")
+                continue
+            self.index[key] = place.id
+
+    def get(self, place_id: str) -> Optional[Place]:
+        return self.places.get(place_id)
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """
+        Resolve a free-form location to a known place
+
+        Tries the whole value, then each comma separated part (most specific first),
+        then the longest known phrase inside the value.
+        """
+        if not name:
+            return None
+        place_id = self.index.get(normalize_key(name))
+        if place_id:
+            return self.places[place_id]
+
+        parts = [part for part in re.split(r"[,/;|]", name) if part.strip()]
+        if len(parts) > 1:
+            for part in parts:
+                place_id = self.index.get(normalize_key(part))
+                if place_id:
+                    return self.places[place_id]
+
+        words = re.findall(r"[^\W_]+", name)
+        for size in range(min(MAX_PHRASE_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                key = normalize_key("".join(words[start:start + size]))
+                if len(key) >= MIN_PHRASE_KEY_LENGTH and key in self.index:
+                    return self.places[self.index[key]]
+        return None
+
+    def canonical_name(self, name: str) -> str:
+        """Canonical name of a known place, or the cleaned original"""
+        place = self.lookup(name)
+        return place.name if place else clean_name(name)
+
+    def location_id(self, name: str) -> Optional[str]:
+        """Place ID used by the location index; unknown places are keyed by their cleaned name"""
+        place = self.lookup(name)
+        if place:
+            return place.id
+        return clean_name(name) or None
+
+    def coordinates(self) -> Dict[str, Tuple[float, float]]:
+        """(latitude, longitude) of every place that has them, keyed by place ID"""
+        return {
+            place_id: (place.latitude, place.longitude)
+            for place_id, place in self.places.items()
+            if place.latitude is not None
+        }
+
+    def _canonical_value(self, value: Union[str, List[str]]) -> Union[str, List[str]]:
+        if isinstance(value, list):
+            return self._canonical_list(value)
+        return self.canonical_name(value) if value else value
+
+    def _canonical_list(self, names: List[str]) -> List[str]:
+        canonical = []
+        for name in names:
+            name = self.canonical_name(name)
+            if name and name not in canonical:
+                canonical.append(name)
+        return canonical
+
+    def canonicalize(self, article: ProcessedArticle) -> ProcessedArticle:
+        """Replace the article's location and deal origin/destination names with canonical ones"""
+        locations = article.locations
+        if locations.primary and clean_name(locations.primary) != "worldwide":
+            locations.primary = self.canonical_name(locations.primary)
+        else:
+            locations.primary = "worldwide"
+        locations.secondary = [
+            name for name in self._canonical_list(locations.secondary) if name != locations.primary
+        ]
+
+        if article.deal_data:
+            article.deal_data.origin = self._canonical_value(article.deal_data.origin)
+            article.deal_data.destination = self._canonical_value(article.deal_data.destination)
+        return article
+
+    def location_rows(self, article: ProcessedArticle) -> List[Dict]:
+        """
+        Location index entries of an article
+
+        Returns:
+            Dicts with location_id, country_id (None for regions and unknown places), role,
+            latitude and longitude (None for places without coordinates)
+        """
+        named = [("primary", article.locations.primary)]
+        named.extend(("secondary", name) for name in article.locations.secondary)
+        if article.deal_data:
+            destinations = article.deal_data.destination
+            if isinstance(destinations, str):
+                destinations = [destinations]
+            named.extend(("destination", name) for name in destinations)
+
+        rows = []
+        seen = set()
+        for role, name in named:
+            if not name or clean_name(name) == "worldwide":
+                continue
+            location_id = self.location_id(name)
+            if not location_id or (location_id, role) in seen:
+                continue
+            seen.add((location_id, role))
+            place = self.get(location_id)
+            rows.append({
+                "location_id": location_id,
+                "country_id": place.country if place else None,
+                "role": role,
+                "latitude": place.latitude if place else None,
+                "longitude": place.longitude if place else None
+            })
+        return rows
+
+
+def load_gazetteer() -> Gazetteer:
+    """Shared instance of the bundled gazetteer"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer()
+    return _default_gazetteer
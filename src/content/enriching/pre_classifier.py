@@ -0,0 +1,204 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from config.logging_config import fetch_logger as logger
+
+WORD_PATTERN = re.compile(r"[a-z][a-z']+")
+
+# Regex features that separate content types better than single words
+FEATURE_PATTERNS = {
+    "price": re.compile(r"[$€£]\s?\d|\d+\s?(usd|eur|dollars|points|miles)\b", re.IGNORECASE),
+    "deal_terms": re.compile(r"\b(deal|sale|fare|fares|discount|promo|code|off|error fare|flash sale|bogo)\b", re.IGNORECASE),
+    "deadline": re.compile(r"\b(book by|ends|expires|until|through|last chance|limited time|today only|hours left)\b", re.IGNORECASE),
+    "guide_terms": re.compile(r"\b(guide|itinerary|things to do|where to stay|where to eat|neighborhood|day trip)\b", re.IGNORECASE),
+    "news_terms": re.compile(r"\b(announced|announces|launch|launches|new route|reported|according to|policy|strike)\b", re.IGNORECASE),
+    "tip_terms": re.compile(r"\b(tips?|how to|hacks?|packing|mistakes|should you|checklist)\b", re.IGNORECASE),
+}
+
+TRAVEL_TERMS = re.compile(
+    r"\b(travel|trip|flight|flights|fly|airline|airport|hotel|resort|cruise|vacation|destination|"
+    r"beach|tour|visa|passport|itinerary|booking|book|miles|points|lounge|airbnb|hostel|train|rail|"
+    r"island|city|country|abroad|international|domestic|nonstop|round-trip|roundtrip)\b",
+    re.IGNORECASE
+)
+JUNK_TERMS = re.compile(
+    r"\b(unsubscribe from|giveaway|sweepstakes|webinar|podcast episode|sponsored post|"
+    r"verify your email|confirm your subscription|password reset|account statement)\b",
+    re.IGNORECASE
+)
+# Junk terms only count near the top: email footers ("Unsubscribe from this list") end real newsletters too
+JUNK_HEAD_LINES = 3
+JUNK_HEAD_CHARS = 300
+
+
+def extract_features(title: str, content: str, max_words: int = 400) -> List[str]:
+    """Bag of words plus regex feature tokens for the start of an article"""
+    text = f"{title or ''} {content or ''}"
+    words = WORD_PATTERN.findall(text.lower())[:max_words]
+    head = " ".join(words)
+
+    features = list(words)
+    for name, pattern in FEATURE_PATTERNS.items():
+        # Repeat feature tokens so they weigh more than a single word
+        features.extend([f"__{name}__"] * min(len(pattern.findall(head)), 3) * 3)
+    return features
+
+
+class PreClassifier:
+    def __init__(self, deal_threshold: float = 0.25, min_travel_density: float = 0.5,
+                 min_words: int = 40, min_training_examples: int = 50):
+        """
+        Cheap local triage run before LLM enrichment
+
+        A multinomial naive Bayes model (linear in log space) trained on existing
+        processed_articles labels predicts the content type; keyword rules decide relevance.
+
+        Args:
+            deal_threshold: Minimum deal probability to send an article through deal extraction
+            min_travel_density: Minimum travel terms per 100 words for an article to be relevant
+            min_words: Articles shorter than this are treated as junk, unless they mention a price or deadline
+            min_training_examples: Labels needed before the model is trusted
+        """
+        self.deal_threshold = deal_threshold
+        self.min_travel_density = min_travel_density
+        self.min_words = min_words
+        self.min_training_examples = min_training_examples
+
+        self.class_log_priors: Dict[str, float] = {}
+        self.feature_log_probs: Dict[str, Dict[str, float]] = {}
+        self.unseen_log_probs: Dict[str, float] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.class_log_priors)
+
+    @property
+    def version(self) -> str:
+        """Short hash of the relevance rules, stored with skipped articles so a rule change revisits them"""
+        digest = hashlib.sha256()
+        for part in (TRAVEL_TERMS.pattern, JUNK_TERMS.pattern, FEATURE_PATTERNS["price"].pattern,
+                     FEATURE_PATTERNS["deadline"].pattern, JUNK_HEAD_LINES, JUNK_HEAD_CHARS,
+                     self.min_travel_density, self.min_words):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()[:12]
+
+    def train(self, examples: List[Tuple[str, str, str]]) -> bool:
+        """
+        Fit the content type model
+
+        Args:
+            examples: (title, content, content_type) tuples
+        Returns:
+            Whether enough labels were available to train
+        """
+        if len(examples) < self.min_training_examples or len({label for _, _, label in examples}) < 2:
+            logger.info(f"Pre-classifier not trained: only {len(examples)} labeled articles")
+            self.class_log_priors = {}
+            return False
+
+        class_counts = Counter()
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        vocabulary = set()
+        for title, content, label in examples:
+            features = extract_features(title, content)
+            class_counts[label] += 1
+            feature_counts[label].update(features)
+            vocabulary.update(features)
+
+        total = sum(class_counts.values())
+        vocabulary_size = len(vocabulary)
+        self.class_log_priors = {label: math.log(count / total) for label, count in class_counts.items()}
+        self.feature_log_probs = {}
+        self.unseen_log_probs = {}
+        for label, counts in feature_counts.items():
+            # Laplace smoothing
+            denominator = sum(counts.values()) + vocabulary_size
+            self.feature_log_probs[label] = {
+                feature: math.log((count + 1) / denominator) for feature, count in counts.items()
+            }
+            self.unseen_log_probs[label] = math.log(1 / denominator)
+
+        logger.info(f"Pre-classifier trained on {total} articles: {dict(class_counts)}")
+        return True
+
+    def train_from_database(self, conn, limit: int = 5000) -> bool:
+        """Train on the most recent enriched articles"""
+        cursor = conn.execute("""
+            SELECT a.title, a.content, p.content_type
+            FROM processed_articles p
+            JOIN articles a ON a.id = p.fetched_article_id
+            WHERE json_extract(p.content_type, '$[0]') != 'irrelevant'
+            ORDER BY p.id DESC
+            LIMIT ?
+        """, (limit,))
+        examples = []
+        for row in cursor.fetchall():
+            content_types = json.loads(row["content_type"]) if row["content_type"] else []
+            if content_types:
+                examples.append((row["title"], row["content"], content_types[0]))
+        return self.train(examples)
+
+    def predict_proba(self, title: str, content: str) -> Dict[str, float]:
+        """Content type probabilities, empty when the model isn't trained"""
+        if not self.is_trained:
+            return {}
+
+        features = extract_features(title, content)
+        scores = {}
+        for label, prior in self.class_log_priors.items():
+            log_probs = self.feature_log_probs[label]
+            unseen = self.unseen_log_probs[label]
+            scores[label] = prior + sum(log_probs.get(feature, unseen) for feature in features)
+
+        # Normalize with log-sum-exp
+        best = max(scores.values())
+        exp_scores = {label: math.exp(score - best) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: score / total for label, score in exp_scores.items()}
+
+    def relevance(self, title: str, content: str) -> float:
+        """
+        Travel terms per 100 words, zero for junk
+
+        Junk terms are looked for in the title and first lines only, and short texts are
+        junk unless they carry a price or deadline, as deal blurbs do.
+        """
+        text = f"{title or ''} {content or ''}"
+        word_count = len(text.split())
+        if not word_count:
+            return 0.0
+        head = f"{title or ''}\n" + "\n".join((content or '').strip().splitlines()[:JUNK_HEAD_LINES])
+        if JUNK_TERMS.search(head[:JUNK_HEAD_CHARS]):
+            return 0.0
+        if word_count < self.min_words and not (
+            FEATURE_PATTERNS["price"].search(text) or FEATURE_PATTERNS["deadline"].search(text)
+        ):
+            return 0.0
+        return 100.0 * len(TRAVEL_TERMS.findall(text)) / word_count
+
+    def route(self, article: Dict) -> Dict:
+        """
+        Decide how an article is enriched
+
+        Returns:
+            Dict with route ("skip", "light" or "full"), predicted content type and relevance
+        """
+        title = article.get('title', '')
+        content = article.get('content', '')
+
+        relevance = self.relevance(title, content)
+        if relevance < self.min_travel_density:
+            return {"route": "skip", "content_type": "irrelevant", "relevance": relevance}
+
+        probabilities = self.predict_proba(title, content)
+        if not probabilities:
+            # Without a model every relevant article gets the full extraction
+            return {"route": "full", "content_type": None, "relevance": relevance}
+
+        content_type = max(probabilities, key=probabilities.get)
+        route = "full" if probabilities.get("deal", 0.0) >= self.deal_threshold else "light"
+        return {"route": route, "content_type": content_type, "relevance": relevance}
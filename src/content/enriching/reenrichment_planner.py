@@ -0,0 +1,81 @@
+from typing import Dict, List
+from content.enriching.article_enricher import ArticleEnricher
+from config.logging_config import fetch_logger as logger
+
+
+class ReenrichmentPlanner:
+    def __init__(self, enricher: ArticleEnricher, call_budget: int = 20, max_age_days: int = 30,
+                 max_used_count: int = 3, packed: bool = True):
+        """
+        Incremental re-enrichment of articles whose enrichment predates the current prompt
+
+        Only articles that can still be selected are considered, so a prompt change
+        refreshes what the next newsletters will use instead of the whole corpus.
+
+        Args:
+            enricher: Enricher providing the current prompts, client and parsing
+            call_budget: Maximum number of enrichment requests per run
+            max_age_days: Age after which news and tips are no longer worth refreshing
+            max_used_count: Uses after which guides and experiences are no longer worth refreshing
+            packed: Group short articles into shared requests, so the budget covers more articles
+        """
+        self.enricher = enricher
+        self.processed_db = enricher.processed_db
+        self.call_budget = call_budget
+        self.max_age_days = max_age_days
+        self.max_used_count = max_used_count
+        self.packed = packed
+
+    def plan(self) -> List[Dict]:
+        """Outdated articles in priority order, as many as the call budget can cover"""
+        if self.call_budget <= 0:
+            return []
+        per_call = self.enricher.max_pack_size if self.packed else 1
+        return self.processed_db.get_outdated_articles(
+            self.enricher.current_prompt_versions(),
+            max_age_days=self.max_age_days,
+            max_used_count=self.max_used_count,
+            limit=self.call_budget * per_call
+        )
+
+    def run(self) -> Dict[str, int]:
+        """Re-enrich the planned articles until the call budget is spent"""
+        planned = self.plan()
+        if not planned:
+            return {"planned": 0, "reenriched": 0, "calls": 0}
+
+        articles = self.enricher.triage(planned)
+        # Articles the pre-classifier now skips were re-stored as irrelevant by triage
+        reenriched = len(planned) - len(articles)
+        calls = 0
+
+        if self.packed:
+            packs, singles = self.enricher.pack_articles(articles)
+        else:
+            packs, singles = [], articles
+        for pack in packs:
+            if calls >= self.call_budget:
+                break
+            calls += 1
+            processed, failed = self.enricher.enrich_pack(pack)
+            reenriched += self.enricher.save_articles(processed)
+            # Elements that failed validation fall back to single requests within the same budget
+            singles.extend(failed)
+
+        for article in singles:
+            if calls >= self.call_budget:
+                break
+            calls += 1
+            try:
+                processed = self.enricher.enrich_article(
+                    article['id'], article['content'], article.get('title', ''), article.get('route', 'full')
+                )
+                reenriched += self.enricher.save_articles([processed])
+            except Exception as e:
+                logger.error(f"Failed to re-enrich article {article['id']}: {str(e)}")
+                self.enricher.record_failure(article['id'], e)
+
+        logger.info(
+            f"Re-enriched {reenriched} of {len(planned)} outdated articles with {calls} of {self.call_budget} calls"
+        )
+        return {"planned": len(planned), "reenriched": reenriched, "calls": calls}
@@ -0,0 +1,184 @@
+import copy
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+from models.schemas import EnrichmentOutput
+
+# Fields set by the pipeline rather than the model
+BOOKKEEPING_FIELDS = {
+    "id", "fetched_article_id", "processed_date", "input_tokens", "original_tokens", "prompt_version"
+}
+LIST_FIELDS = ("content_type", "audience", "key_themes", "seasonality")
+
+_enrichment_schema: Optional[Dict] = None
+
+
+def strict_schema(schema: Any) -> Any:
+    """
+    A JSON schema in the form strict structured output accepts
+
+    Every object lists all its properties as required and allows no others; defaults are
+    dropped, as optional values are expressed as nullable types instead.
+    """
+    if isinstance(schema, list):
+        return [strict_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {key: strict_schema(value) for key, value in schema.items() if key != "default"}
+    if "properties" in schema:
+        strict["properties"] = {name: strict_schema(value) for name, value in schema["properties"].items()}
+        strict["required"] = list(schema["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+def enrichment_schema() -> Dict:
+    """JSON schema of the enrichment output, generated from the EnrichmentOutput model"""
+    global _enrichment_schema
+    if _enrichment_schema is None:
+        _enrichment_schema = strict_schema(EnrichmentOutput.model_json_schema())
+    return copy.deepcopy(_enrichment_schema)
+
+
+def enrichment_response_format(packed: bool = False) -> Dict:
+    """Structured output request for a single enrichment, or a list of them tagged with article IDs when packed"""
+    schema = enrichment_schema()
+    if packed:
+        definitions = schema.pop("$defs", {})
+        element = {
+            **schema,
+            "properties": {"article_id": {"type": "integer"}, **schema["properties"]},
+            "required": ["article_id", *schema["required"]]
+        }
+        schema = {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": element}},
+            "required": ["results"],
+            "additionalProperties": False,
+            "$defs": definitions
+        }
+
+    # Output is constrained to the schema; local repair only covers providers that ignore it
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "packed_articles" if packed else "processed_article",
+            "schema": schema,
+            "strict": True
+        }
+    }
+
+
+def prompt_version(system_prompt: str, response_format: Dict) -> str:
+    """Short hash of what shapes an enrichment; whitespace is ignored so reindenting a prompt keeps its version"""
+    digest = hashlib.sha256()
+    digest.update(" ".join(system_prompt.split()).encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(json.dumps(response_format, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _extract_json_object(text: str) -> str:
+    """Strip code fences and surrounding prose down to the outermost JSON object"""
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1:
+        return text
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _close_brackets(text: str) -> str:
+    """Append the closers of a truncated object, outside of strings"""
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse model output, fixing common syntax defects; returns None if it can't be repaired"""
+    if not text:
+        return None
+    candidate = _extract_json_object(text)
+
+    attempts = [candidate]
+    # Trailing commas before a closing bracket
+    fixed = re.sub(r",\s*([}\]])", r"\1", candidate)
+    # Python literals instead of JSON ones
+    fixed = re.sub(r"\bNone\b", "null", fixed)
+    fixed = re.sub(r"\bTrue\b", "true", fixed)
+    fixed = re.sub(r"\bFalse\b", "false", fixed)
+    attempts.append(fixed)
+    attempts.append(_close_brackets(fixed))
+    # Single quoted keys and strings
+    if '"' not in fixed:
+        attempts.append(_close_brackets(fixed.replace("'", '"')))
+
+    for attempt in attempts:
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def repair_fields(data: Dict) -> Dict:
+    """Fill and coerce fields the model commonly gets slightly wrong"""
+    data = dict(data)
+
+    for field in LIST_FIELDS:
+        value = data.get(field)
+        if value is None:
+            data[field] = []
+        elif isinstance(value, str):
+            data[field] = [value]
+
+    locations = data.get("locations")
+    if isinstance(locations, str):
+        locations = {"primary": locations}
+    if not isinstance(locations, dict):
+        locations = {}
+    locations = dict(locations)
+    if not locations.get("primary"):
+        locations["primary"] = "worldwide"
+    secondary = locations.get("secondary")
+    if secondary is None:
+        locations["secondary"] = []
+    elif isinstance(secondary, str):
+        locations["secondary"] = [secondary]
+    data["locations"] = locations
+
+    deal_data = data.get("deal_data")
+    if isinstance(deal_data, dict):
+        deal_data = dict(deal_data)
+        score = deal_data.get("value_score")
+        if isinstance(score, float):
+            deal_data["value_score"] = int(round(score))
+        elif isinstance(score, str):
+            match = re.search(r"\d+(\.\d+)?", score)
+            deal_data["value_score"] = int(round(float(match.group()))) if match else None
+        if deal_data.get("travel_window") == {} or deal_data.get("travel_window") == "":
+            deal_data["travel_window"] = None
+        data["deal_data"] = deal_data
+    elif deal_data is not None:
+        data["deal_data"] = None
+
+    return data
@@ -0,0 +1,148 @@
+import re
+from typing import Dict, List, Tuple
+from services.openai.rate_limiter import estimate_tokens
+from config.logging_config import fetch_logger as logger
+
+# tiktoken is optional; without it token counts fall back to a character based estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoders = {}
+
+MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december|"
+    "jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+
+# Signals that a sentence carries deal details the enrichment prompt asks for
+PRICE_PATTERN = re.compile(
+    r"[$€£¥]\s?\d|\d+\s?(usd|eur|gbp|dollars|euros|points|miles|avios|cpm)\b|"
+    r"\b(fare|fares|round[- ]trip|one[- ]way|per night|nonstop|sale|discount|off)\b",
+    re.IGNORECASE
+)
+DATE_PATTERN = re.compile(
+    rf"\b({MONTHS})\b|\d{{4}}-\d{{2}}-\d{{2}}|\b\d{{1,2}}/\d{{1,2}}\b|"
+    r"\b(book by|expires?|ends?|deadline|until|through|travel dates?|departing)\b",
+    re.IGNORECASE
+)
+# Capitalized words that don't start a sentence are a cheap proxy for place names
+PLACE_PATTERN = re.compile(r"(?<=[a-z,] )[A-Z][a-z]+(?: [A-Z][a-z]+)*")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens locally, using the model's tokenizer when tiktoken is installed"""
+    if not text:
+        return 0
+    if tiktoken is None:
+        return estimate_tokens(text)
+
+    encoder = _encoders.get(model)
+    if encoder is None:
+        try:
+            encoder = tiktoken.encoding_for_model(model)
+        except Exception:
+            try:
+                encoder = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # Encodings are downloaded on first use, which can fail offline
+                logger.debug(f"Tokenizer unavailable, estimating token counts: {e}")
+                return estimate_tokens(text)
+        _encoders[model] = encoder
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+class TokenBudget:
+    def __init__(self, max_tokens: int = 3000, model: str = "gpt-4o-mini", lead_sentences: int = 3):
+        """
+        Caps article content at a token budget, keeping the highest-signal spans
+
+        Args:
+            max_tokens: Maximum tokens of article text sent to the LLM
+            model: Model whose tokenizer is used for counting
+            lead_sentences: Number of opening sentences always kept
+        """
+        self.max_tokens = max_tokens
+        self.model = model
+        self.lead_sentences = lead_sentences
+
+    def score_span(self, span: str) -> int:
+        """Signal score of a span: mentions of prices, dates and places"""
+        score = 3 * len(PRICE_PATTERN.findall(span))
+        score += 2 * len(DATE_PATTERN.findall(span))
+        score += len(PLACE_PATTERN.findall(span))
+        return score
+
+    def fit(self, content: str, title: str = "") -> Dict:
+        """
+        Fit article content to the budget
+
+        Returns:
+            Dict with the text to send, its token count and the untruncated token count
+        """
+        content = content or ""
+        header = f"{title}\n\n" if title else ""
+        full_text = header + content
+        original_tokens = count_tokens(full_text, self.model)
+
+        if original_tokens <= self.max_tokens:
+            return {"text": full_text, "tokens": original_tokens, "original_tokens": original_tokens, "truncated": False}
+
+        spans = self._split_spans(content)
+        # Leave some room for the gap markers added between non-adjacent spans
+        budget = int(self.max_tokens * 0.95) - count_tokens(header, self.model)
+        kept = self._select_spans(spans, budget)
+
+        # Mark gaps so the model knows text was left out
+        parts: List[str] = []
+        previous = -1
+        for index in kept:
+            if index != previous + 1:
+                parts.append("[...]")
+            parts.append(spans[index])
+            previous = index
+        if previous != len(spans) - 1:
+            parts.append("[...]")
+
+        text = header + " ".join(parts)
+        return {
+            "text": text,
+            "tokens": count_tokens(text, self.model),
+            "original_tokens": original_tokens,
+            "truncated": True
+        }
+
+    def _split_spans(self, content: str, max_words: int = 120) -> List[str]:
+        """Split content into sentences, chunking run-on text that has no sentence breaks"""
+        spans = []
+        for sentence in SENTENCE_SPLIT.split(content):
+            words = sentence.split()
+            for start in range(0, len(words), max_words):
+                spans.append(" ".join(words[start:start + max_words]))
+        return spans
+
+    def _select_spans(self, spans: List[str], budget: int) -> List[int]:
+        """Pick span indices within budget: the lead first, then by signal score"""
+        costs = [count_tokens(span, self.model) + 1 for span in spans]
+        kept = []
+        used = 0
+
+        lead = range(min(self.lead_sentences, len(spans)))
+        for index in lead:
+            if used + costs[index] > budget:
+                break
+            kept.append(index)
+            used += costs[index]
+
+        ranked: List[Tuple[int, int]] = sorted(
+            ((self.score_span(spans[index]), index) for index in range(len(lead), len(spans))),
+            key=lambda item: (-item[0], item[1])
+        )
+        for score, index in ranked:
+            if used + costs[index] <= budget:
+                kept.append(index)
+                used += costs[index]
+
+        return sorted(kept)
@@ -9,19 +9,24 @@ class RssFullFetch:
         self.headers = {'User-Agent': 'Mozilla/5.0'}
 
     def fetch_pending_content(self, batch_size=10):
+        """Fetch full content for articles without it, returning the number fetched"""
         batch_number = 0
+        fetched = 0
         while articles := self.db.get_articles_without_content(batch_size):
             for article in articles:
-                self._process_article(article)
+                fetched += self._process_article(article)
             batch_number += 1
             logger.info(f"Processed batch {batch_number} of {batch_size} articles")
+        return fetched
 
     def _process_article(self, article):
         try:
             content = self._fetch_url(article['url'])
             self.db.update_article_content(article['id'], content)
+            return 1
         except Exception as e:
             logger.error(f"Error fetching {article['url']}: {e}")
+            return 0
 
     def _fetch_url(self, url):
         response = requests.get(url, headers=self.headers, timeout=10)
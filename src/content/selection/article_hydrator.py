@@ -0,0 +1,45 @@
+from typing import Dict, Iterable, List
+from database.processed_database import ProcessedDatabase
+from models.schemas import SelectedArticle
+from config.logging_config import fetch_logger as logger
+
+
+class ArticleHydrator:
+    def __init__(self, processed_db: ProcessedDatabase):
+        """
+        Loads selected articles with their full text, each at most once
+
+        Args:
+            processed_db: Database holding processed articles and their articles
+        """
+        self.processed_db = processed_db
+        # Processed article ID -> loaded record; shared by every edition selected with this hydrator
+        self.identity_map: Dict[int, SelectedArticle] = {}
+        self.usage_version = processed_db.usage_version
+        self.queries = 0
+
+    def hydrate(self, processed_ids: Iterable[int]) -> List[SelectedArticle]:
+        """
+        Records of processed articles in the given order, loading the missing ones with one query
+
+        Records are dropped once usage has been recorded since they were loaded, so their
+        used_count and last_used are current; articles no longer stored are left out.
+        """
+        if self.processed_db.usage_version != self.usage_version:
+            self.clear()
+        processed_ids = list(processed_ids)
+        missing = [
+            processed_id for processed_id in dict.fromkeys(processed_ids)
+            if processed_id not in self.identity_map
+        ]
+        if missing:
+            self.queries += 1
+            for row in self.processed_db.get_selected_articles(missing):
+                self.identity_map[row['id']] = SelectedArticle(**row)
+            logger.info(f"Hydrated {len(missing)} selected articles")
+        return [self.identity_map[processed_id] for processed_id in processed_ids if processed_id in self.identity_map]
+
+    def clear(self):
+        """Forget loaded records, so they are read again with current usage stats"""
+        self.identity_map = {}
+        self.usage_version = self.processed_db.usage_version
@@ -1,12 +1,37 @@
 import json
 from typing import List, Dict, Any, Optional, Tuple
 from database.processed_database import ProcessedDatabase
-from datetime import datetime
+from content.enriching.gazetteer import Gazetteer, load_gazetteer
+from content.selection.spatial_index import SpatialIndex
+from content.selection.candidate_pool import Candidate, CandidatePool, day_number, utc_now
+from content.selection.scoring_engine import ScoringEngine, top_k
+from content.selection.diversity import AttributeSimilarity, Similarity, mmr_top_k
+from content.selection.article_hydrator import ArticleHydrator
+from config.logging_config import fetch_logger as logger
+import numpy as np
+from datetime import datetime, timedelta
+
+# Newsletter sections holding lists of articles
+ITEM_SECTIONS = ('featured_deals', 'featured_destination_guides', 'travel_news', 'practical_tips')
 
 
 class ArticleSelector:
-    def __init__(self, processed_db: ProcessedDatabase):
+    def __init__(self, processed_db: ProcessedDatabase, gazetteer: Optional[Gazetteer] = None,
+                 guide_radius_km: float = 800, scoring_engine: Optional[ScoringEngine] = None,
+                 diversity: float = 0.0, similarity: Optional[Similarity] = None):
         self.processed_db = processed_db
+        # Ranks pooled candidates by weighted score instead of the fixed per-section orderings
+        self.scoring_engine = scoring_engine
+        # Trade-off between score and variety of location, source and type within a scored section (0 = by score)
+        self.diversity = diversity
+        self.similarity = similarity or AttributeSimilarity()
+        # Loads the selected articles once, however many editions select them
+        self.hydrator = ArticleHydrator(processed_db)
+        # Resolves location names to the IDs stored in the article_locations index
+        self.gazetteer = gazetteer or load_gazetteer()
+        # Nearby guides are used when none matches a location exactly
+        self.guide_radius_km = guide_radius_km
+        self._guide_index: Optional[SpatialIndex] = None
         # Content type reuse policies
         self.content_policies = {
             'deal': {
@@ -38,19 +63,44 @@ class ArticleSelector:
     
     def get_article_details(self, processed_article_ids: List[int]) -> List[Dict]:
         """Get original article details for processed articles"""
-        if not processed_article_ids:
-            return []
-            
-        placeholders = ','.join('?' * len(processed_article_ids))
-        query = f"""
-            SELECT a.*, p.* 
-            FROM articles a
-            JOIN processed_articles p ON a.id = p.fetched_article_id
-            WHERE p.id IN ({placeholders})
+        return [record.item() for record in self.hydrator.hydrate(processed_article_ids)]
+
+    def hydrate_content(self, newsletter_content: Dict[str, Any], extras: Optional[Dict[int, Dict]] = None) -> Dict[str, Any]:
         """
-        cursor = self.processed_db.conn.execute(query, processed_article_ids)
-        return [dict(row) for row in cursor.fetchall()]
-    
+        Replace the processed article IDs of every section with full newsletter items
+
+        All selected articles are loaded with one query, after selection is complete. Articles
+        deleted since they were selected are left out of their section and the metadata.
+
+        Args:
+            newsletter_content: Sections holding processed article IDs, and metadata listing all of them
+            extras: Per-article additions to the items, keyed by processed article ID
+        """
+        extras = extras or {}
+        article_ids = newsletter_content['metadata']['article_ids']
+        records = {record.id: record for record in self.hydrator.hydrate(article_ids)}
+        missing = [processed_id for processed_id in article_ids if processed_id not in records]
+        if missing:
+            logger.warning(f"Selected articles {missing} no longer exist, leaving them out of the newsletter")
+            newsletter_content['metadata']['article_ids'] = [
+                processed_id for processed_id in article_ids if processed_id in records
+            ]
+
+        def item(processed_id: int) -> Dict:
+            return {**records[processed_id].item(), **extras.get(processed_id, {})}
+
+        for section in ITEM_SECTIONS:
+            if section in newsletter_content:
+                newsletter_content[section] = [
+                    item(processed_id) for processed_id in newsletter_content[section] if processed_id in records
+                ]
+        if 'seasonal_experience' in newsletter_content:
+            if newsletter_content['seasonal_experience'] in records:
+                newsletter_content['seasonal_experience'] = item(newsletter_content['seasonal_experience'])
+            else:
+                del newsletter_content['seasonal_experience']
+        return newsletter_content
+
     def get_freshness_clause(self, content_type: str) -> str:
         """Build SQL clause for content freshness based on type policies"""
         policy = self.content_policies.get(content_type, {
@@ -158,13 +208,9 @@ class ArticleSelector:
             )
             {guide_freshness}
             {ids_clause}
-            AND (
-                json_extract(locations, '$.primary') = ?
-                OR (
-                    json_extract(locations, '$.secondary') LIKE ?
-                    OR json_extract(locations, '$.secondary') LIKE ?
-                    OR json_extract(locations, '$.secondary') LIKE ?
-                )
+            AND fetched_article_id IN (
+                SELECT fetched_article_id FROM article_locations
+                WHERE location_id = ? OR country_id = ?
             )
             ORDER BY
                 {seasonal_boost}
@@ -175,30 +221,74 @@ class ArticleSelector:
             LIMIT 2
         """
         
-        location_param = location.lower()
-        cursor = self.processed_db.conn.execute(
-            query, 
-            used_ids_params + [
-                location_param, 
-                f'%"{location_param}"%',
-                f'%{location_param}%',
-                f'%{location_param.replace(" ", "")}%'
-            ]
-        )
+        # A country matches articles about the country itself and about its cities
+        location_id = self.gazetteer.location_id(location)
+        cursor = self.processed_db.conn.execute(query, used_ids_params + [location_id, location_id])
         
         return [dict(row) for row in cursor.fetchall()]
     
-    def select_newsletter_content(self) -> Dict[str, Any]:
+    def get_guide_index(self) -> SpatialIndex:
+        """Spatial index of located guides and experiences, built once per selector"""
+        if self._guide_index is None:
+            rows = self.processed_db.get_guide_coordinates()
+            self._guide_index = SpatialIndex(
+                [row['latitude'] for row in rows],
+                [row['longitude'] for row in rows],
+                [row['id'] for row in rows]
+            )
+        return self._guide_index
+
+    def find_nearby_guides(self, location: str, used_ids: List[int] = None, limit: int = 2,
+                           max_candidates: int = 500) -> List[Dict]:
+        """Find the closest fresh guides within guide_radius_km of a location, nearest first"""
+        place = self.gazetteer.lookup(location) if location else None
+        if not place or place.latitude is None:
+            return []
+
+        used = set(used_ids or [])
+        nearby = [
+            (guide_id, distance) for guide_id, distance
+            in self.get_guide_index().query_radius(place.latitude, place.longitude, self.guide_radius_km)
+            if guide_id not in used
+        ][:max_candidates]
+        if not nearby:
+            return []
+
+        # Freshness depends on usage, so it is checked in SQL on the spatial candidates
+        distances = dict(nearby)
+        placeholders = ','.join('?' * len(distances))
+        cursor = self.processed_db.conn.execute(f"""
+            SELECT * FROM processed_articles
+            WHERE id IN ({placeholders})
+            {self.get_freshness_clause('guide')}
+        """, list(distances))
+        guides = [{**dict(row), 'distance_km': round(distances[row['id']])} for row in cursor.fetchall()]
+        guides.sort(key=lambda guide: distances[guide['id']])
+        return guides[:limit]
+
+    def load_candidate_pool(self) -> CandidatePool:
+        """Load every selectable article once, for selecting one or more editions in memory"""
+        return CandidatePool(self.processed_db, self.content_policies)
+
+    def select_newsletter_content(self, pool: Optional[CandidatePool] = None) -> Dict[str, Any]:
         """
         Select cohesive content for a tri-weekly travel newsletter.
         
         Focuses on multiple deals and news, with less emphasis on seasonal content.
         Guides are still relevant to featured deals but seasonal content is reduced.
+        With a candidate pool every section is selected in memory instead of with its own queries.
         
         Returns a structured content object for the LLM to use.
         """
+        if pool is not None and self.scoring_engine is not None:
+            return self.select_scored(pool)
+        if pool is not None:
+            return self.select_from_pool(pool)
+
         newsletter_content = {}
         selected_article_ids = []
+        # Per-article additions to the hydrated items, such as the distance of nearby guides
+        extras = {}
         seasonal_boost, season_params = self.get_seasonal_boost()
         current_season = season_params['current_season']
         next_season = season_params['next_season']
@@ -210,8 +300,9 @@ class ArticleSelector:
             WHERE json_array_length(content_type) > 0
             AND json_extract(content_type, '$[0]') = 'deal'
             AND json_extract(deal_data, '$.value_score') IS NOT NULL
-            AND json_extract(deal_data, '$.booking_deadline') IS NOT NULL
-            AND date(json_extract(deal_data, '$.booking_deadline')) > date('now')
+            AND archived_date IS NULL
+            AND duplicate_of IS NULL
+            AND booking_deadline > date('now')
             {deal_freshness}
             ORDER BY 
                 CASE 
@@ -221,8 +312,8 @@ class ArticleSelector:
                 END DESC,
                 CAST(json_extract(deal_data, '$.value_score') AS REAL) DESC,
                 CASE
-                    WHEN date(json_extract(deal_data, '$.booking_deadline')) < date('now', '+14 days') THEN 2
-                    WHEN date(json_extract(deal_data, '$.booking_deadline')) < date('now', '+30 days') THEN 1
+                    WHEN booking_deadline < date('now', '+14 days') THEN 2
+                    WHEN booking_deadline < date('now', '+30 days') THEN 1
                     ELSE 0
                 END DESC
             LIMIT 3
@@ -235,9 +326,10 @@ class ArticleSelector:
                 SELECT * FROM processed_articles 
                 WHERE json_array_length(content_type) > 0
                 AND json_extract(content_type, '$[0]') = 'deal'
-                AND json_extract(deal_data, '$.booking_deadline') IS NOT NULL
-                AND date(json_extract(deal_data, '$.booking_deadline')) > date('now')
-                ORDER BY date(json_extract(deal_data, '$.booking_deadline')) ASC
+                AND archived_date IS NULL
+                AND duplicate_of IS NULL
+                AND booking_deadline > date('now')
+                ORDER BY booking_deadline ASC
                 LIMIT 3
             """)
             featured_deals = cursor.fetchall()
@@ -245,11 +337,7 @@ class ArticleSelector:
         if not featured_deals:
             raise ValueError("No future deals found for newsletter")
         
-        featured_deal_details = self.get_article_details([deal['id'] for deal in featured_deals])
-        newsletter_content['featured_deals'] = [
-            {**dict(deal), **next((d for d in featured_deal_details if d['id'] == deal['fetched_article_id']), {})}
-            for deal in featured_deals
-        ]
+        newsletter_content['featured_deals'] = [deal['id'] for deal in featured_deals]
         selected_article_ids.extend([deal['id'] for deal in featured_deals])
         
         # Extract primary featured deal location for related content
@@ -274,13 +362,18 @@ class ArticleSelector:
         # If no guides found for destination, try primary location
         if not location_guides and featured_location and featured_location != 'worldwide':
             location_guides = self.find_location_matching_guides(featured_location, selected_article_ids)
+
+        # Otherwise fall back to the closest guides around the destination
+        for location in (deal_destination, featured_location):
+            if location_guides:
+                break
+            location_guides = self.find_nearby_guides(location, selected_article_ids)
         
         if location_guides:
-            guide_details = self.get_article_details([guide['id'] for guide in location_guides])
-            newsletter_content['featured_destination_guides'] = [
-                {**dict(guide), **next((d for d in guide_details if d['id'] == guide['fetched_article_id']), {})}
-                for guide in location_guides
-            ]
+            newsletter_content['featured_destination_guides'] = [guide['id'] for guide in location_guides]
+            extras.update({
+                guide['id']: {'distance_km': guide['distance_km']} for guide in location_guides if 'distance_km' in guide
+            })
             selected_article_ids.extend([guide['id'] for guide in location_guides])
             
             # Set destination focus based on the guides
@@ -298,8 +391,9 @@ class ArticleSelector:
                 SELECT * FROM processed_articles 
                 WHERE json_array_length(content_type) > 0
                 AND json_extract(content_type, '$[0]') = 'deal'
-                AND json_extract(deal_data, '$.booking_deadline') IS NOT NULL
-                AND date(json_extract(deal_data, '$.booking_deadline')) > date('now')
+                AND archived_date IS NULL
+                AND duplicate_of IS NULL
+                AND booking_deadline > date('now')
                 AND id NOT IN ({placeholders})
                 {deal_freshness}
                 ORDER BY 
@@ -308,12 +402,9 @@ class ArticleSelector:
             """, selected_article_ids + [more_deals_needed])
             more_deals = cursor.fetchall()
             
-            if more_deals:
-                more_deal_details = self.get_article_details([deal['id'] for deal in more_deals])
-                # Add to featured deals list
-                for deal, details in zip(more_deals, more_deal_details):
-                    newsletter_content['featured_deals'].append({**dict(deal), **dict(details)})
-                selected_article_ids.extend([deal['id'] for deal in more_deals])
+            # Add to featured deals list
+            newsletter_content['featured_deals'].extend([deal['id'] for deal in more_deals])
+            selected_article_ids.extend([deal['id'] for deal in more_deals])
         
         # 4. Add multiple travel news items (2-3 articles)
         news_freshness = self.get_freshness_clause('news')
@@ -332,15 +423,8 @@ class ArticleSelector:
         """, selected_article_ids)
         travel_news = cursor.fetchall()
         
-        if travel_news:
-            news_details = self.get_article_details([news['id'] for news in travel_news])
-            newsletter_content['travel_news'] = [
-                {**dict(news), **next((d for d in news_details if d['id'] == news['fetched_article_id']), {})}
-                for news in travel_news
-            ]
-            selected_article_ids.extend([news['id'] for news in travel_news])
-        else:
-            newsletter_content['travel_news'] = []
+        newsletter_content['travel_news'] = [news['id'] for news in travel_news]
+        selected_article_ids.extend([news['id'] for news in travel_news])
         
         # 5. Practical travel tips (1-2 universal ones)
         tip_freshness = self.get_freshness_clause('tip')
@@ -359,15 +443,8 @@ class ArticleSelector:
         """, selected_article_ids)
         universal_tips = cursor.fetchall()
         
-        if universal_tips:
-            tip_details = self.get_article_details([tip['id'] for tip in universal_tips])
-            newsletter_content['practical_tips'] = [
-                {**dict(tip), **next((d for d in tip_details if d['id'] == tip['fetched_article_id']), {})}
-                for tip in universal_tips
-            ]
-            selected_article_ids.extend([tip['id'] for tip in universal_tips])
-        else:
-            newsletter_content['practical_tips'] = []
+        newsletter_content['practical_tips'] = [tip['id'] for tip in universal_tips]
+        selected_article_ids.extend([tip['id'] for tip in universal_tips])
         
         # 6. Occasional seasonal experience (only include in every 3rd newsletter)
         # Check if this is the 3rd newsletter in the cycle based on week number
@@ -398,8 +475,7 @@ class ArticleSelector:
             seasonal_experience = cursor.fetchone()
             
             if seasonal_experience:
-                exp_details = self.get_article_details([seasonal_experience['id']])[0]
-                newsletter_content['seasonal_experience'] = {**dict(seasonal_experience), **dict(exp_details)}
+                newsletter_content['seasonal_experience'] = seasonal_experience['id']
                 selected_article_ids.append(seasonal_experience['id'])
         
         # 7. Add metadata to help with newsletter generation
@@ -412,4 +488,264 @@ class ArticleSelector:
             'include_seasonal': include_seasonal
         }
         
-        return newsletter_content
\ No newline at end of file
+        return self.hydrate_content(newsletter_content, extras)
+
+    def find_pool_guides(self, pool: CandidatePool, location: str, used_ids: List[int],
+                         season_params: Dict[str, Any], limit: int = 2) -> List[Candidate]:
+        """In-memory form of find_location_matching_guides"""
+        if not location or location == 'worldwide':
+            return []
+        location_id = self.gazetteer.location_id(location)
+        guides = [
+            guide for guide in pool.fresh(('guide', 'experience'), used_ids, policy_type='guide')
+            if location_id in guide.location_ids
+        ]
+        # Newest first, then stable sorted by the remaining keys of the SQL ordering
+        guides.sort(key=lambda guide: guide.processed_date, reverse=True)
+        guides.sort(key=lambda guide: (
+            -guide.season_rank(season_params['current_season'], season_params['next_season']),
+            guide.content_type != 'guide',
+            guide.last_used is not None,
+            guide.used_count
+        ))
+        return guides[:limit]
+
+    def find_pool_nearby_guides(self, pool: CandidatePool, location: str, used_ids: List[int],
+                                limit: int = 2) -> List[Tuple[Candidate, int]]:
+        """In-memory form of find_nearby_guides: closest fresh guides with their distance in km"""
+        place = self.gazetteer.lookup(location) if location else None
+        if not place or place.latitude is None:
+            return []
+        fresh = {guide.id: guide for guide in pool.fresh(('guide', 'experience'), used_ids, policy_type='guide')}
+        nearby = pool.guide_index().query_radius(place.latitude, place.longitude, self.guide_radius_km)
+        return [(fresh[guide_id], round(distance)) for guide_id, distance in nearby if guide_id in fresh][:limit]
+
+    def select_from_pool(self, pool: CandidatePool) -> Dict[str, Any]:
+        """select_newsletter_content over an in-memory candidate pool: same sections, no further queries"""
+        newsletter_content = {}
+        selected_article_ids = []
+        _, season_params = self.get_seasonal_boost()
+        current_season = season_params['current_season']
+        next_season = season_params['next_season']
+        now = utc_now()
+        today = now.date()
+
+        # 1. Featured deals (2-3) - high value, future deadline, never used
+        deals = [deal for deal in pool.fresh(('deal',), now=now) if deal.value_score is not None
+                 and deal.booking_deadline and deal.booking_deadline > today]
+        deals.sort(key=lambda deal: (
+            deal.season_rank(current_season, next_season),
+            deal.value_score,
+            2 if deal.booking_deadline < today + timedelta(days=14)
+            else 1 if deal.booking_deadline < today + timedelta(days=30) else 0
+        ), reverse=True)
+        featured_deals = deals[:3]
+
+        if not featured_deals:
+            # Fallback to any future deal
+            featured_deals = sorted(
+                (deal for deal in pool.by_type.get('deal', []) if deal.booking_deadline and deal.booking_deadline > today),
+                key=lambda deal: deal.booking_deadline
+            )[:3]
+
+        if not featured_deals:
+            raise ValueError("No future deals found for newsletter")
+
+        newsletter_content['featured_deals'] = [deal.id for deal in featured_deals]
+        selected_article_ids.extend([deal.id for deal in featured_deals])
+
+        # Extract primary featured deal location for related content
+        featured_location = featured_deals[0].primary_location
+        deal_destination = featured_deals[0].destination
+
+        # 2. Find guides relevant to the featured deal destination, then its primary location
+        location_guides = []
+        for location in (deal_destination, featured_location):
+            if location_guides:
+                break
+            location_guides = self.find_pool_guides(pool, location, selected_article_ids, season_params)
+
+        # Otherwise fall back to the closest guides around the destination
+        extras = {}
+        for location in (deal_destination, featured_location):
+            if location_guides:
+                break
+            nearby = self.find_pool_nearby_guides(pool, location, selected_article_ids)
+            location_guides = [guide for guide, _ in nearby]
+            extras = {guide.id: {'distance_km': distance} for guide, distance in nearby}
+
+        if location_guides:
+            newsletter_content['featured_destination_guides'] = [guide.id for guide in location_guides]
+            selected_article_ids.extend([guide.id for guide in location_guides])
+
+            # Set destination focus based on the guides
+            guide_location = location_guides[0].primary_location
+            if guide_location and guide_location != 'worldwide':
+                newsletter_content['destination_focus'] = guide_location
+
+        # 3. Add more deals from different locations if needed
+        if len(featured_deals) < 3:
+            more_deals = sorted(
+                (deal for deal in pool.fresh(('deal',), selected_article_ids, now=now)
+                 if deal.booking_deadline and deal.booking_deadline > today),
+                key=lambda deal: deal.value_score if deal.value_score is not None else float('-inf'),
+                reverse=True
+            )[:3 - len(featured_deals)]
+            newsletter_content['featured_deals'].extend(deal.id for deal in more_deals)
+            selected_article_ids.extend([deal.id for deal in more_deals])
+
+        # 4. Add multiple travel news items (2-3 articles)
+        travel_news = sorted(
+            pool.fresh(('news',), selected_article_ids, now=now),
+            key=lambda news: (news.processed_date, news.last_used is None),
+            reverse=True
+        )[:3]
+        newsletter_content['travel_news'] = [news.id for news in travel_news]
+        selected_article_ids.extend([news.id for news in travel_news])
+
+        # 5. Practical travel tips (1-2 universal ones)
+        universal_tips = sorted(
+            pool.fresh(('tip',), selected_article_ids, now=now),
+            key=lambda tip: (tip.last_used is not None, tip.used_count)
+        )[:2]
+        newsletter_content['practical_tips'] = [tip.id for tip in universal_tips]
+        selected_article_ids.extend([tip.id for tip in universal_tips])
+
+        # 6. Occasional seasonal experience (only include in every 3rd newsletter)
+        current_week = datetime.now().isocalendar()[1]
+        include_seasonal = (current_week % 3 == 0)
+
+        if include_seasonal:
+            experiences = sorted(
+                pool.fresh(('experience',), selected_article_ids, now=now),
+                key=lambda experience: experience.processed_date, reverse=True
+            )
+            experiences.sort(key=lambda experience: (
+                -experience.season_rank(current_season, next_season),
+                experience.last_used is not None,
+                experience.used_count
+            ))
+            if experiences:
+                newsletter_content['seasonal_experience'] = experiences[0].id
+                selected_article_ids.append(experiences[0].id)
+
+        # 7. Add metadata to help with newsletter generation
+        newsletter_content['metadata'] = {
+            'generation_date': datetime.now().isoformat(),
+            'season': season_params['current_season'],
+            'upcoming_season': season_params['next_season'],
+            'destination_focus': featured_location if featured_location and featured_location != 'worldwide' else None,
+            'article_ids': selected_article_ids,  # For tracking/updating later
+            'include_seasonal': include_seasonal
+        }
+
+        return self.hydrate_content(newsletter_content, extras)
+
+    def select_scored(self, pool: CandidatePool) -> Dict[str, Any]:
+        """
+        select_newsletter_content ranked by the scoring engine
+
+        Every candidate is scored once; each section is a masked top-k over that score vector,
+        diversified by maximal marginal relevance when diversity is set.
+        """
+        return self.hydrate_content(*self.select_scored_ids(pool))
+
+    def select_scored_ids(self, pool: CandidatePool, scores: Optional[np.ndarray] = None,
+                          available: Optional[np.ndarray] = None) -> Tuple[Dict[str, Any], Dict[int, Dict]]:
+        """
+        Sections of processed article IDs and their item extras, before hydration
+
+        Args:
+            pool: Candidates to select from
+            scores: Precomputed score vector over pool.columns() (defaults to the scoring engine's)
+            available: Precomputed mask of candidates the reuse policies allow
+        """
+        columns = pool.columns()
+        candidates = columns.candidates
+        _, season_params = self.get_seasonal_boost()
+        now = utc_now()
+        today = np.floor(day_number(now))
+        if scores is None:
+            scores = self.scoring_engine.score(
+                columns, season_params['current_season'], season_params['next_season'], now
+            )
+        if available is None:
+            available = columns.fresh_mask(self.content_policies, now)
+        taken = np.zeros(len(columns), dtype=bool)
+        selected_article_ids = []
+
+        def select(positions) -> List[Candidate]:
+            taken[positions] = True
+            selected_article_ids.extend(candidates[position].id for position in positions)
+            return [candidates[position] for position in positions]
+
+        def take(mask: np.ndarray, k: int) -> List[Candidate]:
+            if self.diversity > 0:
+                return select(mmr_top_k(scores, mask & available & ~taken, k, columns, self.similarity, self.diversity))
+            return select(top_k(scores, mask & available & ~taken, k))
+
+        newsletter_content = {}
+        with np.errstate(invalid='ignore'):
+            future_deals = columns.type_mask('deal') & (columns.deadlines > today)
+
+        # 1. Featured deals: best scored deals with a value score, then any other future deal
+        featured_deals = take(future_deals & ~np.isnan(columns.value_scores), 3)
+        featured_deals += take(future_deals, 3 - len(featured_deals))
+        if not featured_deals:
+            # Fallback to any future deal, even a used one, soonest deadline first
+            featured_deals = select(top_k(-columns.deadlines, future_deals, 3))
+        if not featured_deals:
+            raise ValueError("No future deals found for newsletter")
+        newsletter_content['featured_deals'] = [deal.id for deal in featured_deals]
+
+        featured_location = featured_deals[0].primary_location
+        deal_destination = featured_deals[0].destination
+
+        # 2. Guides for the deal destination or location, else the closest ones around it
+        guide_mask = columns.type_mask('guide', 'experience')
+        location_guides = []
+        extras = {}
+        for location in (deal_destination, featured_location):
+            if location and location != 'worldwide':
+                location_guides = take(guide_mask & columns.location_mask(self.gazetteer.location_id(location)), 2)
+            if location_guides:
+                break
+        for location in (deal_destination, featured_location):
+            if location_guides:
+                break
+            place = self.gazetteer.lookup(location) if location else None
+            if not place or place.latitude is None:
+                continue
+            for guide_id, distance in pool.guide_index().query_radius(place.latitude, place.longitude,
+                                                                      self.guide_radius_km):
+                position = columns.positions[guide_id]
+                if available[position] and not taken[position]:
+                    guide = select([position])[0]
+                    location_guides.append(guide)
+                    extras[guide.id] = {'distance_km': round(distance)}
+                if len(location_guides) == 2:
+                    break
+        if location_guides:
+            newsletter_content['featured_destination_guides'] = [guide.id for guide in location_guides]
+            guide_location = location_guides[0].primary_location
+            if guide_location and guide_location != 'worldwide':
+                newsletter_content['destination_focus'] = guide_location
+
+        # 3-5. News, tips and, in every 3rd newsletter, a seasonal experience
+        newsletter_content['travel_news'] = [news.id for news in take(columns.type_mask('news'), 3)]
+        newsletter_content['practical_tips'] = [tip.id for tip in take(columns.type_mask('tip'), 2)]
+        include_seasonal = (datetime.now().isocalendar()[1] % 3 == 0)
+        if include_seasonal:
+            experiences = take(columns.type_mask('experience'), 1)
+            if experiences:
+                newsletter_content['seasonal_experience'] = experiences[0].id
+
+        newsletter_content['metadata'] = {
+            'generation_date': datetime.now().isoformat(),
+            'season': season_params['current_season'],
+            'upcoming_season': season_params['next_season'],
+            'destination_focus': featured_location if featured_location and featured_location != 'worldwide' else None,
+            'article_ids': selected_article_ids,  # For tracking/updating later
+            'include_seasonal': include_seasonal
+        }
+        return newsletter_content, extras
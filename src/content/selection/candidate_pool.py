@@ -0,0 +1,326 @@
+import json
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from database.processed_database import ProcessedDatabase
+from content.selection.spatial_index import SpatialIndex
+from config.logging_config import fetch_logger as logger
+
+DEFAULT_POLICY = {'can_reuse': True, 'cooldown_days': 30, 'max_used_count': 3}
+SEASONS = ('winter', 'spring', 'summer', 'fall')
+
+
+def utc_now() -> datetime:
+    """Current time in the naive UTC form SQLite's datetime('now') stores"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _decode(value, default):
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return default
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_date(value) -> Optional[date]:
+    parsed = _parse_datetime(value)
+    return parsed.date() if parsed else None
+
+
+def day_number(value) -> float:
+    """Days since 0001-01-01 of a date or naive datetime, NaN for None"""
+    if value is None:
+        return math.nan
+    if isinstance(value, datetime):
+        return value.toordinal() + (value.hour * 3600 + value.minute * 60 + value.second) / 86400
+    return float(value.toordinal())
+
+
+class Candidate:
+    """One selectable article with its JSON decoded and dates parsed once"""
+    __slots__ = (
+        "id", "fetched_article_id", "content_type", "deal_data", "locations", "seasonality", "audience",
+        "value_score", "booking_deadline", "destination", "processed_date", "published_date", "last_used",
+        "used_count", "source_name", "location_ids", "coordinates", "region"
+    )
+
+    def __init__(self, row: Dict):
+        self.id = row['id']
+        self.fetched_article_id = row['fetched_article_id']
+        content_types = _decode(row.get('content_type'), [])
+        self.content_type = content_types[0] if content_types else None
+        self.deal_data = _decode(row.get('deal_data'), None) or {}
+        self.locations = _decode(row.get('locations'), None) or {}
+        self.seasonality = _decode(row.get('seasonality'), [])
+        self.audience = [str(tag).lower() for tag in _decode(row.get('audience'), None) or []]
+        value_score = self.deal_data.get('value_score')
+        self.value_score = float(value_score) if isinstance(value_score, (int, float)) else None
+        self.booking_deadline = _parse_date(self.deal_data.get('booking_deadline'))
+        self.destination = (self.deal_data.get('destination') or '').lower()
+        self.processed_date = _parse_datetime(row.get('processed_date')) or datetime.min
+        self.published_date = _parse_datetime(row.get('published_date')) or self.processed_date
+        self.last_used = _parse_datetime(row.get('last_used'))
+        self.used_count = row.get('used_count') or 0
+        self.source_name = row.get('source_name')
+
+        # Location and country IDs of the location index, matched like find_location_matching_guides
+        self.location_ids: Set[str] = set()
+        self.coordinates = []
+        # Country of the primary location (else of any indexed one), for telling apart where articles are about
+        self.region = None
+        for location_id, country_id, latitude, longitude, role in _decode(row.get('location_index'), []):
+            self.location_ids.add(location_id)
+            if country_id:
+                self.location_ids.add(country_id)
+            if latitude is not None and longitude is not None:
+                self.coordinates.append((latitude, longitude))
+            if role == 'primary' or self.region is None:
+                self.region = country_id or location_id
+
+    @property
+    def primary_location(self) -> str:
+        return (self.locations.get('primary') or '').lower() if isinstance(self.locations, dict) else ''
+
+    def in_season(self, season: str) -> bool:
+        """Whether the article is tagged with a season, as a list entry or a positive score"""
+        if isinstance(self.seasonality, dict):
+            score = self.seasonality.get(season)
+            return isinstance(score, (int, float)) and score > 0
+        return season in (self.seasonality or [])
+
+    def season_rank(self, current_season: str, next_season: str) -> int:
+        if self.in_season(current_season):
+            return 3
+        if self.in_season(next_season):
+            return 2
+        return 1
+
+
+class CandidatePool:
+    def __init__(self, processed_db: ProcessedDatabase, content_policies: Dict[str, Dict]):
+        """
+        Every selectable article loaded with one query, for selecting sections in memory
+
+        Candidates hold what ranking needs; article text is loaded afterwards for the
+        selected ones only (see ArticleHydrator).
+
+        A pool can serve several editions; mark_used keeps its usage stats in step with
+        what earlier editions picked, so cooldowns apply between them.
+
+        Args:
+            processed_db: Database holding processed articles and their articles
+            content_policies: Reuse policy per content type, as on ArticleSelector
+        """
+        self.processed_db = processed_db
+        self.content_policies = content_policies
+        self.candidates: Dict[int, Candidate] = {}
+        self.by_type: Dict[str, List[Candidate]] = {}
+        self._guide_index: Optional[SpatialIndex] = None
+        self._columns: Optional["CandidateColumns"] = None
+        self.load()
+
+    def load(self):
+        """(Re)load the candidates from the database"""
+        rows = self.processed_db.get_selection_candidates(list(self.content_policies))
+        self.candidates = {}
+        self.by_type = {content_type: [] for content_type in self.content_policies}
+        for row in rows:
+            candidate = Candidate(row)
+            self.candidates[candidate.id] = candidate
+            self.by_type.setdefault(candidate.content_type, []).append(candidate)
+        self._guide_index = None
+        self._columns = None
+        logger.info(f"Loaded {len(self.candidates)} selection candidates")
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def policy(self, content_type: str) -> Dict:
+        return self.content_policies.get(content_type, DEFAULT_POLICY)
+
+    def is_fresh(self, candidate: Candidate, policy: Dict, now: datetime) -> bool:
+        """In-memory form of ArticleSelector.get_freshness_clause"""
+        if candidate.last_used is None:
+            return True
+        if not policy['can_reuse']:
+            return False
+        return (candidate.last_used + timedelta(days=policy['cooldown_days']) < now
+                and candidate.used_count < policy['max_used_count'])
+
+    def fresh(self, content_types: Iterable[str], exclude: Iterable[int] = (), policy_type: Optional[str] = None,
+              now: Optional[datetime] = None) -> List[Candidate]:
+        """
+        Candidates of the given types that their reuse policy allows, minus excluded IDs
+
+        Args:
+            content_types: Primary content types to include
+            exclude: Processed article IDs already selected
+            policy_type: Apply this type's policy to all of them instead of each one's own
+            now: Reference time in naive UTC (defaults to the current time)
+        """
+        now = now or utc_now()
+        excluded = set(exclude)
+        return [
+            candidate
+            for content_type in content_types
+            for candidate in self.by_type.get(content_type, [])
+            if candidate.id not in excluded
+            and self.is_fresh(candidate, self.policy(policy_type or content_type), now)
+        ]
+
+    def guide_index(self) -> SpatialIndex:
+        """Spatial index of located guides and experiences in the pool"""
+        if self._guide_index is None:
+            points = [
+                (latitude, longitude, candidate.id)
+                for content_type in ('guide', 'experience')
+                for candidate in self.by_type.get(content_type, [])
+                for latitude, longitude in candidate.coordinates
+            ]
+            self._guide_index = SpatialIndex(
+                [point[0] for point in points], [point[1] for point in points], [point[2] for point in points]
+            )
+        return self._guide_index
+
+    def columns(self) -> "CandidateColumns":
+        """Columnar view of the pool for vectorized scoring, built once"""
+        if self._columns is None:
+            self._columns = CandidateColumns(list(self.candidates.values()))
+        return self._columns
+
+    def mark_used(self, candidate_ids: Iterable[int], when: Optional[datetime] = None):
+        """Record a use of candidates, as NewsletterWriter.update_usage_statistics does in the database"""
+        when = when or utc_now()
+        for candidate_id in candidate_ids:
+            candidate = self.candidates.get(candidate_id)
+            if candidate is None:
+                continue
+            candidate.used_count += 1
+            candidate.last_used = when
+            if self._columns is not None:
+                self._columns.mark_used(candidate, when)
+
+
+class CandidateColumns:
+    def __init__(self, candidates: List[Candidate]):
+        """
+        Candidate attributes as parallel NumPy arrays, one entry per candidate
+
+        Dates are day numbers (see day_number) so ages and deadlines are plain subtractions.
+
+        Args:
+            candidates: Pool candidates; their order is the array order
+        """
+        self.candidates = candidates
+        self.positions = {candidate.id: index for index, candidate in enumerate(candidates)}
+        self.content_types = sorted({candidate.content_type for candidate in candidates if candidate.content_type})
+        type_codes = {content_type: code for code, content_type in enumerate(self.content_types)}
+        self.source_names = sorted({candidate.source_name or '' for candidate in candidates})
+        source_codes = {name: code for code, name in enumerate(self.source_names)}
+        self.regions = sorted({candidate.region for candidate in candidates if candidate.region})
+        region_codes = {region: code for code, region in enumerate(self.regions)}
+
+        self.ids = np.array([candidate.id for candidate in candidates], dtype=np.int64)
+        self.type_codes = np.array([type_codes.get(candidate.content_type, -1) for candidate in candidates],
+                                   dtype=np.int16)
+        self.source_codes = np.array([source_codes[candidate.source_name or ''] for candidate in candidates],
+                                     dtype=np.int32)
+        # -1 where the candidate has no indexed location
+        self.region_codes = np.array([region_codes.get(candidate.region, -1) for candidate in candidates],
+                                     dtype=np.int32)
+        self.value_scores = np.array([
+            candidate.value_score if candidate.value_score is not None else np.nan for candidate in candidates
+        ], dtype=np.float64)
+        self.deadlines = np.array([day_number(candidate.booking_deadline) for candidate in candidates])
+        self.processed = np.array([day_number(candidate.processed_date) for candidate in candidates])
+        self.published = np.array([day_number(candidate.published_date) for candidate in candidates])
+        self.last_used = np.array([day_number(candidate.last_used) for candidate in candidates])
+        self.used_counts = np.array([candidate.used_count for candidate in candidates], dtype=np.int32)
+        # Bit i set when the candidate is tagged with SEASONS[i]
+        self.season_bits = np.array([
+            sum(1 << bit for bit, season in enumerate(SEASONS) if candidate.in_season(season))
+            for candidate in candidates
+        ], dtype=np.uint8)
+
+        # Location or country ID -> positions of the candidates indexed under it
+        postings: Dict[str, List[int]] = {}
+        for index, candidate in enumerate(candidates):
+            for location_id in candidate.location_ids:
+                postings.setdefault(location_id, []).append(index)
+        self.location_postings = {key: np.array(value, dtype=np.int64) for key, value in postings.items()}
+        # Audience tag -> positions of the candidates tagged with it
+        postings = {}
+        for index, candidate in enumerate(candidates):
+            for tag in set(candidate.audience):
+                postings.setdefault(tag, []).append(index)
+        self.audience_postings = {key: np.array(value, dtype=np.int64) for key, value in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def type_mask(self, *content_types: str) -> np.ndarray:
+        codes = [self.content_types.index(content_type) for content_type in content_types
+                 if content_type in self.content_types]
+        return np.isin(self.type_codes, codes)
+
+    def location_mask(self, location_id: Optional[str]) -> np.ndarray:
+        mask = np.zeros(len(self.candidates), dtype=bool)
+        if location_id in self.location_postings:
+            mask[self.location_postings[location_id]] = True
+        return mask
+
+    def audience_positions(self, *tags: str) -> np.ndarray:
+        """Positions of candidates tagged with any of the audience tags"""
+        postings = [self.audience_postings[tag] for tag in tags if tag in self.audience_postings]
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(postings))
+
+    def source_positions(self, source_names: Iterable[str]) -> np.ndarray:
+        """Positions of candidates from any of the sources"""
+        source_names = set(source_names)
+        codes = [code for code, name in enumerate(self.source_names) if name in source_names]
+        return np.flatnonzero(np.isin(self.source_codes, codes))
+
+    def season_mask(self, season: str) -> np.ndarray:
+        if season not in SEASONS:
+            return np.zeros(len(self.candidates), dtype=bool)
+        return (self.season_bits & (1 << SEASONS.index(season))) > 0
+
+    def fresh_mask(self, content_policies: Dict[str, Dict], now: datetime) -> np.ndarray:
+        """Vectorized CandidatePool.is_fresh under each candidate's own type policy"""
+        policies = [content_policies.get(content_type, DEFAULT_POLICY) for content_type in self.content_types]
+        policies.append(DEFAULT_POLICY)  # type code -1
+        can_reuse = np.array([policy['can_reuse'] for policy in policies])[self.type_codes]
+        cooldown = np.array([policy['cooldown_days'] for policy in policies], dtype=np.float64)[self.type_codes]
+        max_used = np.array([policy['max_used_count'] for policy in policies])[self.type_codes]
+
+        never_used = np.isnan(self.last_used)
+        with np.errstate(invalid='ignore'):
+            cooled_down = self.last_used + cooldown < day_number(now)
+        return never_used | (can_reuse & cooled_down & (self.used_counts < max_used))
+
+    def mark_used(self, candidate: Candidate, when: datetime):
+        index = self.positions.get(candidate.id)
+        if index is not None:
+            self.used_counts[index] = candidate.used_count
+            self.last_used[index] = day_number(when)
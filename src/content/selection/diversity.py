@@ -0,0 +1,67 @@
+from typing import Callable, Dict, Optional
+import numpy as np
+from content.selection.candidate_pool import CandidateColumns
+
+DEFAULT_SIMILARITY_WEIGHTS = {
+    "location": 0.5,      # same country (or place, when it has no country)
+    "source": 0.3,        # same source
+    "content_type": 0.2,  # same content type
+}
+
+# (columns, position, positions) -> similarity in [0, 1] of the candidate at position to each of positions
+Similarity = Callable[[CandidateColumns, int, np.ndarray], np.ndarray]
+
+
+class AttributeSimilarity:
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Weighted share of attributes two candidates have in common
+
+        Args:
+            weights: Overrides of DEFAULT_SIMILARITY_WEIGHTS; a weight of 0 ignores the attribute
+        """
+        unknown = set(weights or {}) - set(DEFAULT_SIMILARITY_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown similarity weights: {', '.join(sorted(unknown))}")
+        self.weights = {**DEFAULT_SIMILARITY_WEIGHTS, **(weights or {})}
+        self.total = sum(self.weights.values()) or 1.0
+
+    def __call__(self, columns: CandidateColumns, position: int, positions: np.ndarray) -> np.ndarray:
+        similarity = np.zeros(len(positions))
+        region = columns.region_codes[position]
+        if self.weights["location"] and region >= 0:
+            similarity += self.weights["location"] * (columns.region_codes[positions] == region)
+        if self.weights["source"]:
+            similarity += self.weights["source"] * (columns.source_codes[positions] == columns.source_codes[position])
+        if self.weights["content_type"]:
+            similarity += self.weights["content_type"] * (columns.type_codes[positions] == columns.type_codes[position])
+        return similarity / self.total
+
+
+def mmr_top_k(scores: np.ndarray, mask: np.ndarray, k: int, columns: CandidateColumns,
+              similarity: Similarity, diversity: float = 0.3) -> np.ndarray:
+    """
+    Positions of k candidates where mask is set, by maximal marginal relevance, in pick order
+
+    Each pick maximizes (1 - diversity) * relevance - diversity * (highest similarity to an
+    earlier pick), with relevance the score rescaled to 0-1 over the masked candidates. The
+    highest similarity is kept per candidate and updated against the latest pick only, so a
+    selection costs k similarity rows rather than a pairwise matrix. A diversity of 0 is top_k.
+    """
+    candidates = np.flatnonzero(mask)
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+    relevance = scores[candidates].astype(np.float64)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(len(candidates))
+
+    closest = np.zeros(len(candidates))
+    picked = np.zeros(len(candidates), dtype=bool)
+    picks = []
+    for _ in range(min(k, len(candidates))):
+        marginal = np.where(picked, -np.inf, (1.0 - diversity) * relevance - diversity * closest)
+        best = int(np.argmax(marginal))  # first of equals keeps array order on ties
+        picked[best] = True
+        picks.append(candidates[best])
+        np.maximum(closest, similarity(columns, candidates[best], candidates), out=closest)
+    return np.array(picks, dtype=candidates.dtype)
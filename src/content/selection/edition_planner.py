@@ -0,0 +1,356 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from content.selection.article_selector import ArticleSelector
+from content.selection.candidate_pool import CandidateColumns, CandidatePool, day_number, utc_now
+from content.selection.scoring_engine import ScoringEngine, top_k
+from config.logging_config import fetch_logger as logger
+
+# Articles per edition of each planned section; guides follow the lead deal of their edition
+SECTION_SIZES = {'featured_deals': 3, 'travel_news': 3, 'practical_tips': 2, 'seasonal_experience': 1}
+GUIDES_PER_EDITION = 2
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def include_seasonal(edition_date: datetime) -> bool:
+    """Every 3rd newsletter carries a seasonal experience, as in select_newsletter_content"""
+    return edition_date.isocalendar()[1] % 3 == 0
+
+
+class EditionPlanner:
+    def __init__(self, selector: ArticleSelector, editions: int = 6, interval_days: float = 2.5,
+                 shortlist_factor: int = 2):
+        """
+        Plans the content of the next editions together instead of one greedy edition at a time
+
+        Every edition of the plan is filled in one pass over a shared score vector: articles that
+        can only go out soon (deals expiring before later editions) are placed first, the rest are
+        spread so each edition gets a similar total score, and deals to the same destination are
+        spread across editions. An article is used at most once per plan, so plans should span
+        less than the shortest cooldown in content_policies. The plan is stored, and later runs
+        only fill gaps and let new articles displace weaker planned ones.
+
+        Args:
+            selector: Selector providing content policies, scoring, gazetteer and hydration
+            editions: Number of upcoming editions kept planned
+            interval_days: Days between editions
+            shortlist_factor: Candidates considered per slot, beyond which lower scores are ignored
+        """
+        self.selector = selector
+        self.processed_db = selector.processed_db
+        self.scoring_engine = selector.scoring_engine or ScoringEngine()
+        self.editions = editions
+        self.interval_days = interval_days
+        self.shortlist_factor = shortlist_factor
+
+    def _new_edition(self, edition_date: datetime) -> Dict:
+        return {
+            'edition_date': edition_date.replace(microsecond=0),
+            'sections': {section: [] for section in list(SECTION_SIZES) + ['featured_destination_guides']},
+            'distances': {}
+        }
+
+    def plan(self, pool: Optional[CandidatePool] = None, start: Optional[datetime] = None) -> List[Dict]:
+        """Plan the next editions from scratch and store the plan"""
+        pool = pool or self.selector.load_candidate_pool()
+        start = start or utc_now()
+        editions = [
+            self._new_edition(start + timedelta(days=self.interval_days * index)) for index in range(self.editions)
+        ]
+        self._fill(pool, editions)
+        self.save(editions)
+        return editions
+
+    def refresh(self, pool: Optional[CandidatePool] = None) -> List[Dict]:
+        """
+        Bring the stored plan up to date, re-planning only what changed
+
+        Planned articles that became unusable are dropped, the horizon is extended to the
+        configured number of editions, and articles processed since the plan was made may
+        take open slots or displace weaker planned articles.
+        """
+        editions, planned_at = self.load()
+        if not editions:
+            return self.plan(pool)
+        pool = pool or self.selector.load_candidate_pool()
+        columns = pool.columns()
+
+        dropped = self._drop_unusable(pool, editions)
+        added = 0
+        while len(editions) < self.editions:
+            editions.append(self._new_edition(editions[-1]['edition_date'] + timedelta(days=self.interval_days)))
+            added += 1
+        # planned_at is UTC while enrichment stores processed_date in local time
+        planned_local = planned_at.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        with np.errstate(invalid='ignore'):
+            new_articles = columns.processed > day_number(planned_local)
+        new_articles &= ~self._planned_mask(columns, editions)
+        if not dropped and not added and not new_articles.any():
+            return editions
+
+        logger.info(f"Re-planning editions: {dropped} planned articles dropped, {int(new_articles.sum())} new")
+        self._fill(pool, editions, displacing=new_articles)
+        self.save(editions)
+        return editions
+
+    def next_edition(self, pool: Optional[CandidatePool] = None) -> Tuple[Dict, str]:
+        """
+        Newsletter content of the next planned edition, with its plan key
+
+        The edition stays planned; pass the key to ProcessedDatabase.delete_planned_edition once
+        it has been sent, so a failed write or send takes the same edition again.
+        """
+        editions = self.refresh(pool)
+        if not editions or not editions[0]['sections']['featured_deals']:
+            raise ValueError("No future deals found for newsletter")
+        edition = editions[0]
+        return self.edition_content(edition), edition['edition_date'].strftime(DATE_FORMAT)
+
+    def edition_content(self, edition: Dict) -> Dict:
+        """Planned edition in the form select_newsletter_content returns"""
+        sections = edition['sections']
+        _, season_params = self.selector.get_seasonal_boost()
+        article_ids = [
+            processed_id
+            for section in ('featured_deals', 'featured_destination_guides', 'travel_news', 'practical_tips',
+                            'seasonal_experience')
+            for processed_id in sections[section]
+        ]
+        content = {
+            'featured_deals': sections['featured_deals'],
+            'travel_news': sections['travel_news'],
+            'practical_tips': sections['practical_tips'],
+            'metadata': {
+                'generation_date': datetime.now().isoformat(),
+                'edition_date': edition['edition_date'].isoformat(),
+                'season': season_params['current_season'],
+                'upcoming_season': season_params['next_season'],
+                'article_ids': article_ids,
+                'include_seasonal': include_seasonal(edition['edition_date'])
+            }
+        }
+        if sections['featured_destination_guides']:
+            content['featured_destination_guides'] = sections['featured_destination_guides']
+        if sections['seasonal_experience']:
+            content['seasonal_experience'] = sections['seasonal_experience'][0]
+        content = self.selector.hydrate_content(
+            content, {processed_id: {'distance_km': km} for processed_id, km in edition['distances'].items()}
+        )
+
+        featured_location = (content['featured_deals'][0]['locations'].get('primary') or '').lower() \
+            if content['featured_deals'] else ''
+        content['metadata']['destination_focus'] = featured_location if featured_location not in ('', 'worldwide') else None
+        if content.get('featured_destination_guides'):
+            guide_location = (content['featured_destination_guides'][0]['locations'].get('primary') or '').lower()
+            if guide_location and guide_location != 'worldwide':
+                content['destination_focus'] = guide_location
+        return content
+
+    def save(self, editions: List[Dict]) -> bool:
+        planned_at = utc_now().strftime(DATE_FORMAT)
+        return self.processed_db.save_edition_plan([
+            {
+                'edition_date': edition['edition_date'].strftime(DATE_FORMAT),
+                'section': section,
+                'position': position,
+                'processed_article_id': processed_id,
+                'distance_km': edition['distances'].get(processed_id),
+                'planned_at': planned_at
+            }
+            for edition in editions
+            for section, processed_ids in edition['sections'].items()
+            for position, processed_id in enumerate(processed_ids)
+        ])
+
+    def load(self):
+        """Stored editions, earliest first, and when the plan was last made"""
+        editions: Dict[str, Dict] = {}
+        planned_at = None
+        for slot in self.processed_db.get_edition_plan():
+            edition = editions.get(slot['edition_date'])
+            if edition is None:
+                edition = editions[slot['edition_date']] = self._new_edition(
+                    datetime.strptime(slot['edition_date'], DATE_FORMAT)
+                )
+            edition['sections'].setdefault(slot['section'], []).append(slot['processed_article_id'])
+            if slot['distance_km'] is not None:
+                edition['distances'][slot['processed_article_id']] = slot['distance_km']
+            planned_at = max(planned_at or slot['planned_at'], slot['planned_at'])
+        planned_at = datetime.strptime(planned_at, DATE_FORMAT) if planned_at else None
+        return list(editions.values()), planned_at
+
+    def _planned_mask(self, columns: CandidateColumns, editions: List[Dict]) -> np.ndarray:
+        planned = np.zeros(len(columns), dtype=bool)
+        for edition in editions:
+            for processed_ids in edition['sections'].values():
+                planned[[columns.positions[i] for i in processed_ids if i in columns.positions]] = True
+        return planned
+
+    def _usable(self, columns: CandidateColumns, fresh: np.ndarray, edition_day: float, position: int) -> bool:
+        """Whether the reuse policy allows the article in an edition, and a deal is still bookable then"""
+        if not fresh[position]:
+            return False
+        deadline = columns.deadlines[position]
+        return math.isnan(deadline) or deadline > edition_day
+
+    def _drop_unusable(self, pool: CandidatePool, editions: List[Dict]) -> int:
+        """Remove planned articles that left the pool, were used since, or expire before their edition"""
+        columns = pool.columns()
+        dropped = 0
+        for edition in editions:
+            fresh = columns.fresh_mask(self.selector.content_policies, edition['edition_date'])
+            edition_day = math.floor(day_number(edition['edition_date']))
+            lead = edition['sections']['featured_deals'][:1]
+            for section, processed_ids in edition['sections'].items():
+                kept = [
+                    processed_id for processed_id in processed_ids
+                    if processed_id in columns.positions
+                    and self._usable(columns, fresh, edition_day, columns.positions[processed_id])
+                ]
+                dropped += len(processed_ids) - len(kept)
+                edition['sections'][section] = kept
+            # Guides follow the lead deal, so they are re-picked when it was dropped
+            if edition['sections']['featured_deals'][:1] != lead:
+                edition['sections']['featured_destination_guides'] = []
+                edition['distances'] = {}
+        return dropped
+
+    def _fill(self, pool: CandidatePool, editions: List[Dict], displacing: Optional[np.ndarray] = None):
+        """
+        Fill the open slots of every edition in one pass over a shared score vector
+
+        Args:
+            pool: Candidates to plan from
+            editions: Editions to fill; articles already planned stay
+            displacing: Candidates allowed to replace a weaker planned article when no slot is open
+        """
+        columns = pool.columns()
+        _, season_params = self.selector.get_seasonal_boost()
+        scores = self.scoring_engine.score(
+            columns, season_params['current_season'], season_params['next_season'], editions[0]['edition_date']
+        )
+        fresh = [columns.fresh_mask(self.selector.content_policies, edition['edition_date']) for edition in editions]
+        edition_days = [math.floor(day_number(edition['edition_date'])) for edition in editions]
+        available = ~self._planned_mask(columns, editions)
+        displacing = displacing if displacing is not None else np.zeros(len(columns), dtype=bool)
+        leads = [edition['sections']['featured_deals'][:1] for edition in editions]
+
+        def usable(position: int, index: int) -> bool:
+            return self._usable(columns, fresh[index], edition_days[index], position)
+
+        def capacity(section: str) -> Callable[[int], int]:
+            if section == 'seasonal_experience':
+                return lambda index: SECTION_SIZES[section] if include_seasonal(editions[index]['edition_date']) else 0
+            return lambda index: SECTION_SIZES[section]
+
+        with np.errstate(invalid='ignore'):
+            future_deals = columns.type_mask('deal') & (columns.deadlines > edition_days[0])
+        section_masks = {
+            'featured_deals': future_deals,
+            'travel_news': columns.type_mask('news'),
+            'practical_tips': columns.type_mask('tip'),
+            'seasonal_experience': columns.type_mask('experience'),
+        }
+        for section, mask in section_masks.items():
+            shortlist = top_k(
+                scores, mask & (available | displacing),
+                SECTION_SIZES[section] * len(editions) * self.shortlist_factor
+            )
+            spread = (lambda position: columns.candidates[position].destination) if section == 'featured_deals' else None
+            self._assign(columns, editions, section, shortlist, scores, usable, capacity(section), available,
+                         displacing, spread)
+
+        previous_lead = None
+        for index, edition in enumerate(editions):
+            deals = sorted(edition['sections']['featured_deals'],
+                           key=lambda processed_id: scores[columns.positions[processed_id]], reverse=True)
+            # Lead with a different destination than the previous edition when the edition allows it
+            for position, processed_id in enumerate(deals):
+                if columns.candidates[columns.positions[processed_id]].destination != previous_lead:
+                    deals.insert(0, deals.pop(position))
+                    break
+            edition['sections']['featured_deals'] = deals
+            if deals:
+                previous_lead = columns.candidates[columns.positions[deals[0]]].destination
+            if deals[:1] != leads[index]:
+                for processed_id in edition['sections']['featured_destination_guides']:
+                    available[columns.positions[processed_id]] = True
+                edition['sections']['featured_destination_guides'] = []
+                edition['distances'] = {}
+            if deals and not edition['sections']['featured_destination_guides']:
+                self._pick_guides(pool, edition, deals[0], scores, fresh[index], available)
+
+    def _assign(self, columns: CandidateColumns, editions: List[Dict], section: str, shortlist: np.ndarray,
+                scores: np.ndarray, usable, capacity, available: np.ndarray, displacing: np.ndarray, spread=None):
+        """Place shortlisted candidates, most constrained first, in the least loaded edition they fit"""
+        def load(index: int) -> float:
+            return sum(scores[columns.positions[i]] for i in editions[index]['sections'][section])
+
+        options = []
+        for position in shortlist:
+            allowed = [index for index in range(len(editions)) if capacity(index) > 0 and usable(position, index)]
+            if allowed:
+                options.append((position, allowed))
+        # Stable sort: candidates with fewer usable editions first, best score first among equals
+        options.sort(key=lambda option: len(option[1]))
+
+        for position, allowed in options:
+            if not available[position] and not displacing[position]:
+                continue
+            open_editions = [index for index in allowed if len(editions[index]['sections'][section]) < capacity(index)]
+            if open_editions:
+                key = spread(position) if spread else None
+                index = min(open_editions, key=lambda index: (
+                    key is not None and any(
+                        spread(columns.positions[i]) == key for i in editions[index]['sections'][section]
+                    ),
+                    load(index),
+                    index
+                ))
+                editions[index]['sections'][section].append(columns.ids[position].item())
+                available[position] = False
+                continue
+            if not displacing[position]:
+                continue
+            # A new article may replace the weakest planned one of an edition it fits
+            index, weakest = min(
+                ((index, processed_id) for index in allowed for processed_id in editions[index]['sections'][section]),
+                key=lambda slot: scores[columns.positions[slot[1]]]
+            )
+            if scores[position] > scores[columns.positions[weakest]]:
+                planned = editions[index]['sections'][section]
+                planned[planned.index(weakest)] = columns.ids[position].item()
+                available[position] = False
+
+    def _pick_guides(self, pool: CandidatePool, edition: Dict, lead_deal: int, scores: np.ndarray,
+                     fresh: np.ndarray, available: np.ndarray):
+        """Guides for the lead deal's destination or location, else the closest ones around it"""
+        columns = pool.columns()
+        deal = columns.candidates[columns.positions[lead_deal]]
+        guides = columns.type_mask('guide', 'experience') & fresh & available
+        locations = [location for location in (deal.destination, deal.primary_location)
+                     if location and location != 'worldwide']
+        picked = []
+        for location in locations:
+            location_id = self.selector.gazetteer.location_id(location)
+            picked = [columns.ids[position].item()
+                      for position in top_k(scores, guides & columns.location_mask(location_id), GUIDES_PER_EDITION)]
+            if picked:
+                break
+        for location in locations:
+            if picked:
+                break
+            place = self.selector.gazetteer.lookup(location)
+            if not place or place.latitude is None:
+                continue
+            for guide_id, distance in pool.guide_index().query_radius(place.latitude, place.longitude,
+                                                                      self.selector.guide_radius_km):
+                if guides[columns.positions[guide_id]]:
+                    picked.append(guide_id)
+                    edition['distances'][guide_id] = round(distance)
+                if len(picked) == GUIDES_PER_EDITION:
+                    break
+        for processed_id in picked:
+            available[columns.positions[processed_id]] = False
+        edition['sections']['featured_destination_guides'] = picked
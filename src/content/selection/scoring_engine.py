@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+from content.selection.candidate_pool import CandidateColumns, day_number, utc_now
+
+DEFAULT_SCORE_WEIGHTS = {
+    "value": 1.0,           # deal value_score, scaled to 0-1
+    "urgency": 1.0,         # booking deadline inside urgency_horizon_days, closer is higher
+    "freshness": 0.5,       # halves every freshness_half_life_days since publication
+    "seasonality": 0.75,    # 1 for the current season, 0.5 for the next one
+    "source_quality": 0.25, # quality_score of the source, scaled to 0-1
+    "reuse_penalty": 0.5,   # subtracted per previous use
+}
+
+
+def top_k(scores: np.ndarray, mask: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores where mask is set, best first; ties keep array order"""
+    candidates = np.flatnonzero(mask)
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+    if len(candidates) > k:
+        candidates = np.sort(candidates[np.argpartition(-scores[candidates], k - 1)[:k]])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class ScoringEngine:
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 source_quality: Optional[Dict[str, float]] = None, urgency_horizon_days: float = 30,
+                 freshness_half_life_days: float = 14):
+        """
+        Weighted score of every candidate, computed in one vectorized pass
+
+        Args:
+            weights: Overrides of DEFAULT_SCORE_WEIGHTS
+            source_quality: Source name to quality_score (1-10); unknown sources count as 5
+            urgency_horizon_days: Deadlines further out than this add no urgency
+            freshness_half_life_days: Age at which the freshness signal has halved
+        """
+        unknown = set(weights or {}) - set(DEFAULT_SCORE_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown score weights: {', '.join(sorted(unknown))}")
+        self.weights = {**DEFAULT_SCORE_WEIGHTS, **(weights or {})}
+        self.source_quality = source_quality or {}
+        self.urgency_horizon_days = urgency_horizon_days
+        self.freshness_half_life_days = freshness_half_life_days
+
+    @staticmethod
+    def from_sources(sources, **kwargs) -> "ScoringEngine":
+        """Engine knowing the quality_score of the configured sources"""
+        return ScoringEngine(
+            source_quality={source['name']: source['quality_score'] for source in sources if 'quality_score' in source},
+            **kwargs
+        )
+
+    def score(self, columns: CandidateColumns, current_season: str, next_season: str,
+              now: Optional[datetime] = None) -> np.ndarray:
+        """Score vector aligned with the columns; higher is better"""
+        now_day = day_number(now or utc_now())
+        weights = self.weights
+
+        value = np.nan_to_num(columns.value_scores / 10.0, nan=0.0)
+
+        days_left = columns.deadlines - np.floor(now_day)
+        with np.errstate(invalid="ignore"):
+            urgency = np.where(
+                (days_left >= 0) & (days_left <= self.urgency_horizon_days),
+                1.0 - days_left / (self.urgency_horizon_days + 1),
+                0.0
+            )
+
+        age = np.maximum(now_day - columns.published, 0.0)
+        freshness = np.nan_to_num(np.exp2(-age / self.freshness_half_life_days), nan=0.0)
+
+        seasonality = np.where(columns.season_mask(current_season), 1.0,
+                               np.where(columns.season_mask(next_season), 0.5, 0.0))
+
+        qualities = np.array([self.source_quality.get(name, 5) for name in columns.source_names], dtype=np.float64)
+        source_quality = qualities[columns.source_codes] / 10.0 if len(qualities) else np.zeros(len(columns))
+
+        return (
+            weights["value"] * value
+            + weights["urgency"] * urgency
+            + weights["freshness"] * freshness
+            + weights["seasonality"] * seasonality
+            + weights["source_quality"] * source_quality
+            - weights["reuse_penalty"] * columns.used_counts
+        )
@@ -0,0 +1,85 @@
+from typing import Dict, List, Optional
+import numpy as np
+from content.selection.article_selector import ArticleSelector
+from content.selection.candidate_pool import CandidatePool, utc_now
+from content.selection.scoring_engine import ScoringEngine
+from config.logging_config import fetch_logger as logger
+
+# Audience tags of processed articles and source categories that make up each segment
+DEFAULT_SEGMENTS = {
+    'budget': {'audiences': ['budget', 'backpacker', 'student'], 'categories': ['budget']},
+    'luxury': {'audiences': ['luxury'], 'categories': ['luxury']},
+    'family': {'audiences': ['family'], 'categories': []},
+    'adventure': {'audiences': ['adventure'], 'categories': []},
+}
+
+
+class SegmentSelector:
+    def __init__(self, selector: ArticleSelector, segments: Optional[Dict[str, Dict]] = None,
+                 source_categories: Optional[Dict[str, str]] = None, audience_boost: float = 1.0,
+                 category_boost: float = 0.5):
+        """
+        Per-segment editions selected from one candidate pool and one base score vector
+
+        A segment only adds a boost to the candidates tagged with its audiences or coming from
+        sources of its categories; policies, scores and hydration are shared by all segments.
+
+        Args:
+            selector: Selector whose scoring engine provides the base scores
+            segments: Segment name to {'audiences': [...], 'categories': [...]} (defaults to DEFAULT_SEGMENTS)
+            source_categories: Source name to category, from the sources config
+            audience_boost: Score added to candidates matching a segment's audiences
+            category_boost: Score added to candidates from a segment's source categories
+        """
+        self.selector = selector
+        self.scoring_engine = selector.scoring_engine or ScoringEngine()
+        self.segments = segments or DEFAULT_SEGMENTS
+        self.source_categories = source_categories or {}
+        self.audience_boost = audience_boost
+        self.category_boost = category_boost
+
+    @staticmethod
+    def from_sources(selector: ArticleSelector, sources: List[Dict], **kwargs) -> "SegmentSelector":
+        """Segment selector knowing the categories of the configured sources"""
+        return SegmentSelector(selector, source_categories={
+            source['name']: source.get('category') for source in sources
+        }, **kwargs)
+
+    def segment_scores(self, pool: CandidatePool, base: np.ndarray, segment: Dict) -> np.ndarray:
+        """Base scores plus the segment's boosts, touching only the matching candidates"""
+        columns = pool.columns()
+        scores = base.copy()
+        scores[columns.audience_positions(*segment.get('audiences', []))] += self.audience_boost
+        categories = set(segment.get('categories', []))
+        if categories:
+            sources = [name for name, category in self.source_categories.items() if category in categories]
+            scores[columns.source_positions(sources)] += self.category_boost
+        return scores
+
+    def select_segments(self, pool: CandidatePool, names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Newsletter content per segment, in the form select_newsletter_content returns"""
+        names = names or list(self.segments)
+        unknown = [name for name in names if name not in self.segments]
+        if unknown:
+            raise ValueError(f"Unknown segments: {', '.join(unknown)}")
+
+        columns = pool.columns()
+        _, season_params = self.selector.get_seasonal_boost()
+        now = utc_now()
+        base = self.scoring_engine.score(columns, season_params['current_season'], season_params['next_season'], now)
+        available = columns.fresh_mask(self.selector.content_policies, now)
+
+        selections = {
+            name: self.selector.select_scored_ids(pool, self.segment_scores(pool, base, self.segments[name]), available)
+            for name in names
+        }
+        # One query loads every article any segment selected; hydrating each segment then reads the identity map
+        self.selector.hydrator.hydrate(
+            processed_id for content, _ in selections.values() for processed_id in content['metadata']['article_ids']
+        )
+        editions = {}
+        for name, (content, extras) in selections.items():
+            content['metadata']['segment'] = name
+            editions[name] = self.selector.hydrate_content(content, extras)
+        logger.info(f"Selected {len(editions)} segment editions")
+        return editions
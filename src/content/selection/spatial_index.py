@@ -0,0 +1,138 @@
+import math
+from typing import Hashable, List, Sequence, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_unit_vectors(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Points on the unit sphere, so straight-line distance grows monotonically with great-circle distance"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    """Great-circle distance of a chord length on the unit sphere"""
+    return 2.0 * np.arcsin(np.minimum(np.asarray(chord) / 2.0, 1.0)) * EARTH_RADIUS_KM
+
+
+def km_to_chord(distance_km: float) -> float:
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2.0 * math.sin(angle / 2.0)
+
+
+class SpatialIndex:
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                 ids: Sequence[Hashable], leaf_size: int = 32):
+        """
+        KD-tree over points on the earth's surface, stored in flat NumPy arrays
+
+        Points are indexed as 3D unit vectors, which avoids the antimeridian and pole
+        special cases of a latitude/longitude tree.
+
+        Args:
+            latitudes: Latitude of each point in degrees
+            longitudes: Longitude of each point in degrees
+            ids: Identifier returned for each point; several points may share one
+            leaf_size: Maximum number of points in a leaf, scanned with one vectorized distance
+        """
+        self.ids = list(ids)
+        self.leaf_size = max(1, leaf_size)
+        points = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+
+        # Nodes own a contiguous slice of the permuted point array
+        self.order = np.arange(len(self.ids))
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._lows: List[np.ndarray] = []
+        self._highs: List[np.ndarray] = []
+        self._children: List[Tuple[int, int]] = []
+        if len(self.ids):
+            self._build(points)
+        self.points = points[self.order]
+
+        self.starts = np.array(self._starts, dtype=np.int64)
+        self.ends = np.array(self._ends, dtype=np.int64)
+        self.lows = np.array(self._lows).reshape(-1, 3)
+        self.highs = np.array(self._highs).reshape(-1, 3)
+        self.children = np.array(self._children, dtype=np.int64).reshape(-1, 2)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _new_node(self, points: np.ndarray, start: int, end: int) -> int:
+        node_points = points[self.order[start:end]]
+        self._starts.append(start)
+        self._ends.append(end)
+        self._lows.append(node_points.min(axis=0))
+        self._highs.append(node_points.max(axis=0))
+        self._children.append((-1, -1))
+        return len(self._starts) - 1
+
+    def _build(self, points: np.ndarray):
+        stack = [self._new_node(points, 0, len(self.ids))]
+        while stack:
+            node = stack.pop()
+            start, end = self._starts[node], self._ends[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split at the median of the widest dimension
+            dimension = int(np.argmax(self._highs[node] - self._lows[node]))
+            segment = self.order[start:end]
+            middle = (end - start) // 2
+            partition = np.argpartition(points[segment, dimension], middle)
+            self.order[start:end] = segment[partition]
+
+            left = self._new_node(points, start, start + middle)
+            right = self._new_node(points, start + middle, end)
+            self._children[node] = (left, right)
+            stack.extend((left, right))
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        Points within a great-circle radius
+
+        Returns:
+            (id, distance in km) pairs nearest first, with one entry per ID at its closest point
+        """
+        if not len(self.ids):
+            return []
+        query = to_unit_vectors([latitude], [longitude])[0]
+        limit = km_to_chord(radius_km) ** 2
+
+        indices = []
+        squared = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            # Squared distance from the query to the node's bounding box
+            gap = np.maximum(np.maximum(self.lows[node] - query, query - self.highs[node]), 0.0)
+            if gap.dot(gap) > limit:
+                continue
+            left, right = self.children[node]
+            if left >= 0:
+                stack.extend((left, right))
+                continue
+            start, end = self.starts[node], self.ends[node]
+            offsets = self.points[start:end] - query
+            distances = np.einsum("ij,ij->i", offsets, offsets)
+            within = np.nonzero(distances <= limit)[0]
+            if within.size:
+                indices.append(within + start)
+                squared.append(distances[within])
+
+        if not indices:
+            return []
+        indices = np.concatenate(indices)
+        distances_km = chord_to_km(np.sqrt(np.concatenate(squared)))
+        results = []
+        seen = set()
+        for position in np.argsort(distances_km, kind="stable"):
+            point_id = self.ids[self.order[indices[position]]]
+            if point_id not in seen:
+                seen.add(point_id)
+                results.append((point_id, float(distances_km[position])))
+        return results
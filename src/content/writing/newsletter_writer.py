@@ -4,19 +4,41 @@ import time
 import re
 import markdown
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Sequence
 from database.processed_database import ProcessedDatabase
+from services.openai.errors import LLMBadOutputError
 from services.openai.openai_client import OpenAIClient
+from services.openai.telemetry import LLMTelemetry
+from content.writing.section_stream import SECTION_ORDER, SectionStreamParser
 from config.logging_config import fetch_logger as logger
 
+# Newsletter sections written from selected articles, with the selection key holding them
+SECTION_CONTENT = {
+    "featured_deals": "featured_deals",
+    "destination_guides": "featured_destination_guides",
+    "travel_news": "travel_news",
+    "travel_tips": "practical_tips",
+}
+
 class NewsletterWriter:
-    def __init__(self, processed_db, openai_model: str = "gpt-4o-mini"):
+    def __init__(self, processed_db, openai_model: str = "gpt-4o-mini", telemetry: Optional[LLMTelemetry] = None,
+                 stream: bool = False):
         self.processed_db = processed_db
-        self.llm = OpenAIClient(model=openai_model)
+        self.llm = OpenAIClient(model=openai_model, telemetry=telemetry)
+        # Convert each section as soon as the streamed completion finishes it, instead of after the whole newsletter
+        self.stream = stream
         logger.info(f"NewsletterWriter initialized with model: {openai_model}")
             
-    def generate_newsletter(self, newsletter_content: Dict[str, Any], mode: str = "real") -> Dict[str, Any]:
-        """Generate a newsletter based on the content provided and return it as a structured JSON object."""
+    def generate_newsletter(self, newsletter_content: Dict[str, Any], mode: str = "real",
+                            on_section: Optional[Callable[[str, Any], None]] = None,
+                            record_usage: bool = True) -> Dict[str, Any]:
+        """
+        Generate a newsletter based on the content provided and return it as a structured JSON object.
+
+        When streaming, on_section is called with each section's JSON as soon as it is complete.
+        Callers writing several editions of one send pass record_usage=False and record their
+        usage once with update_editions_usage.
+        """
         logger.info(f"Generating newsletter in {mode} mode")
         
         # Get metadata for edition info
@@ -125,7 +147,8 @@ class NewsletterWriter:
             content += "## FEATURED DEALS\n"
             for i, deal in enumerate(newsletter_content['featured_deals']):
                 content += f"### Deal {i+1}: {deal.get('title', 'No title')}\n"
-                content += f"Deal Data: {deal.get('deal_data', '')}\n"
+                deal_data = deal.get('deal_data', '')
+                content += f"Deal Data: {deal_data if isinstance(deal_data, str) else json.dumps(deal_data)}\n"
                 content += f"Content: {deal.get('content', '')}\n\n"
         
         # Add featured destination guides (full content)
@@ -158,21 +181,34 @@ class NewsletterWriter:
         
         # Generate newsletter with LLM
         try:
-            markdown_newsletter = self.llm.analyze(system_prompt, content)
-            
-            # Parse the markdown into structured JSON for SendGrid
-            newsletter_json = self._markdown_to_sendgrid_json(
-                markdown_newsletter, 
-                edition_title.title(), 
-                edition_tagline, 
-                edition_date,
-                include_seasonal
-            )
+            if self.stream:
+                newsletter_json = self._stream_sendgrid_json(
+                    system_prompt,
+                    content,
+                    edition_title.title(),
+                    edition_tagline,
+                    edition_date,
+                    include_seasonal,
+                    on_section,
+                    self._required_sections(newsletter_content)
+                )
+            else:
+                markdown_newsletter = self.llm.analyze(system_prompt, content, caller="newsletter")
+
+                # Parse the markdown into structured JSON for SendGrid
+                newsletter_json = self._markdown_to_sendgrid_json(
+                    markdown_newsletter,
+                    edition_title.title(),
+                    edition_tagline,
+                    edition_date,
+                    include_seasonal
+                )
             
             # Update usage statistics if in real mode
             if mode.lower() == "real" and 'metadata' in newsletter_content and 'article_ids' in newsletter_content['metadata']:
-                self.update_usage_statistics(newsletter_content['metadata']['article_ids'])
-                logger.info("Updated usage statistics in real mode")
+                if record_usage:
+                    self.update_usage_statistics(newsletter_content['metadata']['article_ids'])
+                    logger.info("Updated usage statistics in real mode")
                 json_dir = os.getenv("REAL_JSON_DIR")
                 prefix = "real"
             elif mode.lower() == "test":
@@ -182,6 +218,9 @@ class NewsletterWriter:
 
             # Save to disc for backup
             timestamp = time.strftime("%Y%m%d_%H%M%S")
+            segment = newsletter_content.get('metadata', {}).get('segment')
+            if segment:
+                prefix = f"{prefix}_{segment}"
             filename = f"{prefix}_json_Data_{timestamp}.json"
             filepath = os.path.join(json_dir, filename)
             with open(filepath, 'w') as f:
@@ -220,8 +259,78 @@ class NewsletterWriter:
     
     def _markdown_to_sendgrid_json(self, markdown_text: str, edition_title: str, edition_tagline: str, edition_date: str, include_seasonal: bool = False) -> Dict[str, Any]:
         """Convert markdown newsletter to SendGrid-compatible JSON structure."""
-        # Default placeholder image URLs - using a consistent placeholder for now
-        default_image_url = "https://placehold.co/600x400/faedca/0c457d?text=Travel"
+        json_data = self._newsletter_skeleton(edition_title, edition_tagline, edition_date, include_seasonal)
+
+        # Split exactly like a streamed newsletter, but keep whatever sections a malformed one has
+        parser = SectionStreamParser(lambda section, body: self._apply_section(json_data, section, body), strict=False)
+        parser.feed(markdown_text)
+        parser.close()
+
+        return json_data
+
+    @staticmethod
+    def _required_sections(newsletter_content: Dict[str, Any]) -> List[str]:
+        """Sections a streamed newsletter must contain: its frame plus those with selected content"""
+        return ["introduction"] + [
+            section for section, key in SECTION_CONTENT.items() if newsletter_content.get(key)
+        ] + ["conclusion"]
+
+    def _stream_sendgrid_json(self, system_prompt: str, content: str, edition_title: str, edition_tagline: str,
+                              edition_date: str, include_seasonal: bool = False,
+                              on_section: Optional[Callable[[str, Any], None]] = None,
+                              required: Sequence[str] = ("introduction", "conclusion")) -> Dict[str, Any]:
+        """
+        Generate the newsletter as a stream, converting each section to JSON as soon as it is complete.
+
+        A malformed completion stops the stream early and the newsletter is requested again
+        without streaming and parsed as a whole; on_section is then called again with every
+        section of that newsletter, replacing what was streamed.
+        """
+        try:
+            return self._stream_sections(system_prompt, content, edition_title, edition_tagline, edition_date,
+                                         include_seasonal, on_section, required)
+        except LLMBadOutputError as e:
+            logger.warning(f"Streamed newsletter abandoned ({str(e)}), generating it without streaming")
+
+        markdown_newsletter = self.llm.analyze(system_prompt, content, caller="newsletter")
+        json_data = self._markdown_to_sendgrid_json(
+            markdown_newsletter, edition_title, edition_tagline, edition_date, include_seasonal
+        )
+        if on_section:
+            for section in SECTION_ORDER:
+                if section in json_data:
+                    on_section(section, json_data[section])
+        return json_data
+
+    def _stream_sections(self, system_prompt: str, content: str, edition_title: str, edition_tagline: str,
+                         edition_date: str, include_seasonal: bool,
+                         on_section: Optional[Callable[[str, Any], None]], required: Sequence[str]) -> Dict[str, Any]:
+        json_data = self._newsletter_skeleton(edition_title, edition_tagline, edition_date, include_seasonal)
+        started = time.perf_counter()
+        completed = []
+
+        def section_done(section: str, section_content: str):
+            self._apply_section(json_data, section, section_content)
+            if not completed:
+                logger.info(f"First newsletter section ready after {time.perf_counter() - started:.2f}s")
+            completed.append(section)
+            if on_section and section in json_data:
+                on_section(section, json_data[section])
+
+        parser = SectionStreamParser(section_done, required=required)
+        pieces = self.llm.analyze_stream(system_prompt, content, caller="newsletter")
+        try:
+            for piece in pieces:
+                parser.feed(piece)
+            parser.close()
+        finally:
+            pieces.close()
+        logger.info(f"Streamed {len(completed)} newsletter sections in {time.perf_counter() - started:.2f}s")
+        return json_data
+
+    def _newsletter_skeleton(self, edition_title: str, edition_tagline: str, edition_date: str, include_seasonal: bool = False) -> Dict[str, Any]:
+        """SendGrid-compatible JSON structure of an edition, with its sections still empty."""
+        # Default placeholder avatar URL - using a consistent placeholder for now
         default_avatar_url = "https://placehold.co/80x80/faedca/0c457d?text=JO"
         
         # Initialize the JSON structure
@@ -270,28 +379,21 @@ class NewsletterWriter:
                 "title": "Spring Travel Inspiration",
                 "content": ""
             }
-        
-        # Extract sections using regex
-        sections = {
-            "introduction": re.search(r'# Introduction\s+(.*?)(?=# Featured Deals|\Z)', markdown_text, re.DOTALL),
-            "featured_deals": re.search(r'# Featured Deals\s+(.*?)(?=# Destination Guides|\Z)', markdown_text, re.DOTALL),
-            "destination_guides": re.search(r'# Destination Guides\s+(.*?)(?=# Travel News|\Z)', markdown_text, re.DOTALL),
-            "travel_news": re.search(r'# Travel News\s+(.*?)(?=# Travel Tips|\Z)', markdown_text, re.DOTALL),
-            "travel_tips": re.search(r'# Travel Tips\s+(.*?)(?=# Seasonal Inspiration|# Conclusion|\Z)', markdown_text, re.DOTALL),
-            "conclusion": re.search(r'# Conclusion\s+(.*?)(?=\Z)', markdown_text, re.DOTALL)
-        }
-        
-        if include_seasonal:
-            sections["seasonal_inspiration"] = re.search(r'# Seasonal Inspiration\s+(.*?)(?=# Conclusion|\Z)', markdown_text, re.DOTALL)
-        
-        # Fill in the sections from the markdown
-        if sections["introduction"]:
-            intro_content = sections["introduction"].group(1).strip()
+
+        return json_data
+
+    def _apply_section(self, json_data: Dict[str, Any], section: str, section_content: str):
+        """Fill one section of the SendGrid JSON from its markdown, without the # heading."""
+        # Default placeholder image URL - using a consistent placeholder for now
+        default_image_url = "https://placehold.co/600x400/faedca/0c457d?text=Travel"
+
+        if section == "introduction":
+            intro_content = section_content
             json_data["introduction"]["content"] = self._convert_markdown_to_html(intro_content)
         
-        # Process featured deals (multiple)
-        if sections["featured_deals"]:
-            deals_content = sections["featured_deals"].group(1).strip()
+        elif section == "featured_deals":
+            # Process featured deals (multiple)
+            deals_content = section_content
             # Look for ## headings to separate individual deals
             deal_sections = re.findall(r'## (.*?)$(.*?)(?=## |\Z)', deals_content, re.DOTALL | re.MULTILINE)
             
@@ -314,8 +416,8 @@ class NewsletterWriter:
                 }
                 json_data["featured_deals"].append(deal)
         
-        if sections["destination_guides"]:
-            guides_content = sections["destination_guides"].group(1).strip()
+        elif section == "destination_guides":
+            guides_content = section_content
             # Look for ## headings to separate individual guides
             guide_sections = re.findall(r'## (.*?)$(.*?)(?=## |\Z)', guides_content, re.DOTALL | re.MULTILINE)
             
@@ -336,9 +438,9 @@ class NewsletterWriter:
                 }
                 json_data["destination_guides"].append(guide)
         
-        # Process travel news (multiple items)
-        if sections["travel_news"]:
-            news_content = sections["travel_news"].group(1).strip()
+        elif section == "travel_news":
+            # Process travel news (multiple items)
+            news_content = section_content
             # Look for ## headings to separate individual news items
             news_sections = re.findall(r'## (.*?)$(.*?)(?=## |\Z)', news_content, re.DOTALL | re.MULTILINE)
             
@@ -357,8 +459,8 @@ class NewsletterWriter:
                 }
                 json_data["travel_news"]["items"].append(news_item)
         
-        if sections["travel_tips"]:
-            tips_content = sections["travel_tips"].group(1).strip()
+        elif section == "travel_tips":
+            tips_content = section_content
             # Extract title if it exists
             title_match = re.search(r'^## (.*?)$', tips_content, re.MULTILINE)
             if title_match:
@@ -367,8 +469,8 @@ class NewsletterWriter:
                 tips_content = re.sub(r'^## .*?$\n', '', tips_content, 1, re.MULTILINE)
             json_data["travel_tips"]["content"] = self._convert_markdown_to_html(tips_content)
         
-        if include_seasonal and sections.get("seasonal_inspiration"):
-            seasonal_content = sections["seasonal_inspiration"].group(1).strip()
+        elif section == "seasonal_inspiration" and "seasonal_inspiration" in json_data:
+            seasonal_content = section_content
             # Extract title if it exists
             title_match = re.search(r'^## (.*?)$', seasonal_content, re.MULTILINE)
             if title_match:
@@ -377,24 +479,22 @@ class NewsletterWriter:
                 seasonal_content = re.sub(r'^## .*?$\n', '', seasonal_content, 1, re.MULTILINE)
             json_data["seasonal_inspiration"]["content"] = self._convert_markdown_to_html(seasonal_content)
         
-        if sections["conclusion"]:
-            conclusion_content = sections["conclusion"].group(1).strip()
+        elif section == "conclusion":
+            conclusion_content = section_content
             json_data["conclusion"]["content"] = self._convert_markdown_to_html(conclusion_content)
-        
-        return json_data
     
     def update_usage_statistics(self, article_ids: List[int]):
         """Update the usage statistics for the articles used in the newsletter"""
         if not article_ids:
             return
             
-        placeholders = ','.join('?' * len(article_ids))
-        self.processed_db.conn.execute(f"""
-            UPDATE processed_articles
-            SET used_count = COALESCE(used_count, 0) + 1,
-                last_used = datetime('now')
-            WHERE id IN ({placeholders})
-        """, article_ids)
-        self.processed_db.conn.commit()
-        
+        self.processed_db.record_usage(article_ids)
         logger.info(f"Updated usage statistics for {len(article_ids)} articles")
+
+    def update_editions_usage(self, editions: Dict[str, Dict[str, Any]]):
+        """Count one use of every article in any of the editions, however many segments shared it"""
+        article_ids = {
+            article_id for content in editions.values()
+            for article_id in content.get('metadata', {}).get('article_ids', [])
+        }
+        self.update_usage_statistics(sorted(article_ids))
@@ -0,0 +1,121 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+from services.openai.errors import LLMBadOutputError
+
+# Top-level headings of a newsletter in the order the prompt asks for them, with their JSON section
+SECTION_HEADINGS = {
+    "Introduction": "introduction",
+    "Featured Deals": "featured_deals",
+    "Destination Guides": "destination_guides",
+    "Travel News": "travel_news",
+    "Travel Tips": "travel_tips",
+    "Seasonal Inspiration": "seasonal_inspiration",
+    "Conclusion": "conclusion",
+}
+SECTION_ORDER = list(SECTION_HEADINGS.values())
+
+# Top-level headings only; "## ..." headings are items inside a section
+_HEADING = re.compile(r"^#(?!#)\s*(.+?)\s*$")
+
+
+def _heading_key(text: str) -> str:
+    """Heading text without case, numbering, emphasis, punctuation or emoji"""
+    return " ".join(re.sub(r"[^a-z]+", " ", text.lower()).split())
+
+
+_SECTION_KEYS = {_heading_key(heading): section for heading, section in SECTION_HEADINGS.items()}
+
+
+def section_for_heading(line: str) -> Optional[str]:
+    """Section a line opens, so "# 2. **FEATURED DEALS:**" counts as # Featured Deals"""
+    heading = _HEADING.match(line)
+    return _SECTION_KEYS.get(_heading_key(heading.group(1))) if heading else None
+
+
+class SectionStreamParser:
+    def __init__(self, on_section: Callable[[str, str], None], required: Sequence[str] = (),
+                 max_preamble_chars: int = 2000, strict: bool = True):
+        """
+        Split newsletter markdown into its # sections while it is still being generated
+
+        Text is fed in arbitrary pieces; a section is complete, and passed to on_section with
+        its markdown body, as soon as the next known heading (or the end) arrives. Headings
+        match whatever their case, numbering or emphasis. The output is abandoned with
+        LLMBadOutputError as soon as it can't become a valid newsletter: a required section
+        skipped or left empty, a section repeated or out of order, or too much text before
+        the first heading. A parser that isn't strict never abandons the output: text outside
+        a section is dropped and a repeated section keeps its first copy.
+
+        Args:
+            on_section: Called with the section name and its stripped body, in stream order
+            required: Sections (see SECTION_ORDER) the newsletter must contain
+            max_preamble_chars: Text allowed before the first heading
+            strict: Whether malformed output raises LLMBadOutputError
+        """
+        self.on_section = on_section
+        self.required = [section for section in SECTION_ORDER if section in set(required)]
+        self.max_preamble_chars = max_preamble_chars
+        self.strict = strict
+        self.sections: Dict[str, str] = {}
+        self.current: Optional[str] = None
+        self.lines: List[str] = []
+        self.preamble_chars = 0
+        self.buffer = ""
+
+    def feed(self, text: str):
+        """Consume the next piece of the completion"""
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> Dict[str, str]:
+        """Finish the last section once the completion has ended, returning every section's body"""
+        if self.buffer:
+            self._line(self.buffer)
+            self.buffer = ""
+        self._finish()
+        missing = [section for section in self.required if section not in self.sections]
+        if missing:
+            raise LLMBadOutputError(f"Newsletter is missing sections: {', '.join(missing)}")
+        return self.sections
+
+    def _line(self, line: str):
+        section = section_for_heading(line)
+        if section:
+            self._start(section)
+        elif self.current:
+            self.lines.append(line)
+        elif self.strict:
+            self.preamble_chars += len(line) + 1
+            if self.preamble_chars > self.max_preamble_chars:
+                raise LLMBadOutputError("Newsletter has no section heading")
+
+    def _start(self, section: str):
+        previous = self.current
+        self._finish()
+        if section in self.sections:
+            if not self.strict:
+                return
+            raise LLMBadOutputError(f"Newsletter repeats its {section} section")
+        position = SECTION_ORDER.index(section)
+        if self.strict and previous and position < SECTION_ORDER.index(previous):
+            raise LLMBadOutputError(f"Newsletter section {section} is out of order")
+        skipped = [
+            required for required in self.required
+            if SECTION_ORDER.index(required) < position and required not in self.sections
+        ]
+        if skipped:
+            raise LLMBadOutputError(f"Newsletter skipped sections: {', '.join(skipped)}")
+        self.current = section
+        self.lines = []
+
+    def _finish(self):
+        if not self.current:
+            return
+        body = "\n".join(self.lines).strip()
+        if not body and self.current in self.required:
+            raise LLMBadOutputError(f"Newsletter section {self.current} is empty")
+        self.sections[self.current] = body
+        self.on_section(self.current, body)
+        self.current = None
@@ -7,9 +7,9 @@ from content.fetching.parsers import email_feed_parser_gmail, rss_feed_parser, c
 
 
 class PopulateDB:
-    def __init__(self, db):
+    def __init__(self, db, sources_path: Optional[str] = None):
         self.db = db
-        self.source_manager = SourceManager()
+        self.source_manager = SourceManager(sources_path)
 
     def populate_single_source(self, source: Dict) -> Dict:
         """Populate database from a single source."""
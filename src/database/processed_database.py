@@ -2,11 +2,35 @@ import sqlite3
 import json
 from pathlib import Path
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from models.schemas import ProcessedArticle
 
 
 class ProcessedDatabase:
+    # Re-enrichment updates the row in place, keeping its ID and usage history
+    INSERT_QUERY = """
+        INSERT INTO processed_articles (
+            fetched_article_id, content_type, deal_data, locations, audience,
+            key_themes, seasonality, processed_date, input_tokens, original_tokens, prompt_version,
+            booking_deadline
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, date(?))
+        ON CONFLICT (fetched_article_id) DO UPDATE SET
+            content_type = excluded.content_type,
+            deal_data = excluded.deal_data,
+            booking_deadline = excluded.booking_deadline,
+            archived_date = NULL,
+            duplicate_of = NULL,
+            locations = excluded.locations,
+            audience = excluded.audience,
+            key_themes = excluded.key_themes,
+            seasonality = excluded.seasonality,
+            processed_date = excluded.processed_date,
+            input_tokens = excluded.input_tokens,
+            original_tokens = excluded.original_tokens,
+            prompt_version = excluded.prompt_version
+    """
+    CLEAR_FAILURE_QUERY = "DELETE FROM enrichment_failures WHERE fetched_article_id = ?"
+
     def __init__(self, db_path: str = ":memory:"):
         # Use the same database file as FetchDatabase
         if db_path == ":memory:":
@@ -19,6 +43,8 @@ class ProcessedDatabase:
             raise ValueError("Invalid database path")
 
         self.conn = None
+        # Bumped by every usage update, so cached selection records can tell they are stale
+        self.usage_version = 0
         self.setup_database()
 
     def setup_database(self):
@@ -40,12 +66,131 @@ class ProcessedDatabase:
                 processed_date DATETIME DEFAULT CURRENT_TIMESTAMP,
                 last_used DATETIME DEFAULT NULL,
                 used_count INTEGER DEFAULT 0,
+                input_tokens INTEGER DEFAULT NULL,
+                original_tokens INTEGER DEFAULT NULL,
+                prompt_version TEXT DEFAULT NULL,
+                booking_deadline DATE DEFAULT NULL,
+                archived_date DATETIME DEFAULT NULL,
+                duplicate_of INTEGER DEFAULT NULL,
                 FOREIGN KEY (fetched_article_id) REFERENCES articles (id),
                 UNIQUE(fetched_article_id)
             )
         """)
+
+        # Batch enrichment jobs, persisted so they can be polled across runs
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_batches (
+                batch_id TEXT PRIMARY KEY,
+                input_file_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                article_count INTEGER NOT NULL,
+                output_file_id TEXT,
+                submitted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                completed_date DATETIME DEFAULT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_batch_items (
+                batch_id TEXT NOT NULL,
+                fetched_article_id INTEGER NOT NULL,
+                input_tokens INTEGER DEFAULT NULL,
+                original_tokens INTEGER DEFAULT NULL,
+                prompt_version TEXT DEFAULT NULL,
+                FOREIGN KEY (batch_id) REFERENCES enrichment_batches (batch_id),
+                PRIMARY KEY (batch_id, fetched_article_id)
+            )
+        """)
+
+        # Articles whose enrichment failed; dead ones are no longer sent to the LLM
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_failures (
+                fetched_article_id INTEGER PRIMARY KEY,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error_type TEXT NOT NULL,
+                last_error TEXT,
+                first_failed DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_failed DATETIME DEFAULT CURRENT_TIMESTAMP,
+                dead INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (fetched_article_id) REFERENCES articles (id)
+            )
+        """)
+
+        # Articles planned for upcoming editions, one row per section slot
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS edition_plan (
+                edition_date DATETIME NOT NULL,
+                section TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                processed_article_id INTEGER NOT NULL,
+                distance_km INTEGER DEFAULT NULL,
+                planned_at DATETIME NOT NULL,
+                FOREIGN KEY (processed_article_id) REFERENCES processed_articles (id),
+                PRIMARY KEY (edition_date, section, position)
+            )
+        """)
+
+        # Canonical gazetteer IDs of article locations, for exact indexed matching
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_locations (
+                fetched_article_id INTEGER NOT NULL,
+                location_id TEXT NOT NULL,
+                country_id TEXT,
+                role TEXT NOT NULL,
+                latitude REAL DEFAULT NULL,
+                longitude REAL DEFAULT NULL,
+                FOREIGN KEY (fetched_article_id) REFERENCES articles (id),
+                PRIMARY KEY (fetched_article_id, location_id, role)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_article_locations_location ON article_locations (location_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_article_locations_country ON article_locations (country_id)")
+
+        # Databases created before these columns existed
+        token_columns = {
+            "input_tokens": "INTEGER DEFAULT NULL",
+            "original_tokens": "INTEGER DEFAULT NULL"
+        }
+        version_columns = {**token_columns, "prompt_version": "TEXT DEFAULT NULL"}
+        self._add_missing_columns("processed_articles", version_columns)
+        self._add_missing_columns("enrichment_batch_items", version_columns)
+        self._add_missing_columns("article_locations", {
+            "latitude": "REAL DEFAULT NULL",
+            "longitude": "REAL DEFAULT NULL"
+        })
+        added = self._add_missing_columns("processed_articles", {
+            "booking_deadline": "DATE DEFAULT NULL",
+            "archived_date": "DATETIME DEFAULT NULL",
+            "duplicate_of": "INTEGER DEFAULT NULL"
+        })
+        if "booking_deadline" in added:
+            self.conn.execute("""
+                UPDATE processed_articles SET booking_deadline = date(json_extract(deal_data, '$.booking_deadline'))
+                WHERE deal_data IS NOT NULL AND json_extract(content_type, '$[0]') = 'deal'
+            """)
+        # Only deals expire; undo deadlines (and their archiving) given to other content by earlier versions
+        self.conn.execute("""
+            UPDATE processed_articles SET booking_deadline = NULL, archived_date = NULL
+            WHERE booking_deadline IS NOT NULL AND json_extract(content_type, '$[0]') != 'deal'
+        """)
+
+        # Deadlines of live (not yet archived) articles in order, so deal queries and the
+        # expired-deal sweep only range over the live set
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_processed_articles_live_deadline
+            ON processed_articles (booking_deadline) WHERE archived_date IS NULL
+        """)
         self.conn.commit()
 
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]) -> List[str]:
+        """Add columns introduced after a table was first created, returning the added ones"""
+        existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        added = []
+        for name, definition in columns.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                added.append(name)
+        return added
+
     def is_connected(self) -> bool:
         """Check if database connection is active"""
         try:
@@ -54,40 +199,133 @@ class ProcessedDatabase:
         except (sqlite3.Error, AttributeError):
             return False
 
+    def _article_values(self, article: ProcessedArticle) -> tuple:
+        """Column values for a processed_articles insert"""
+        return (
+            article.fetched_article_id,
+            json.dumps(article.content_type),
+            article.deal_data.model_dump_json() if article.deal_data else None,
+            article.locations.model_dump_json(),
+            json.dumps(article.audience),
+            json.dumps(article.key_themes),
+            json.dumps(article.seasonality),
+            article.processed_date.isoformat(),
+            article.input_tokens,
+            article.original_tokens,
+            article.prompt_version,
+            str(article.deal_data.booking_deadline)
+            if article.deal_data and article.content_type[:1] == ["deal"] else None
+        )
+
     def save_article(self, article: ProcessedArticle) -> Optional[int]:
         """Save an enriched article to the database"""
         try:
-            query = """
-                INSERT OR REPLACE INTO processed_articles (
-                    fetched_article_id, content_type, deal_data, locations, audience,
-                    key_themes, seasonality, processed_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            values = (
-                article.fetched_article_id,
-                json.dumps(article.content_type),
-                article.deal_data.model_dump_json() if article.deal_data else None,
-                article.locations.model_dump_json(),
-                json.dumps(article.audience),
-                json.dumps(article.key_themes),
-                json.dumps(article.seasonality),
-                article.processed_date.isoformat()
-            )
-            
-            cursor = self.conn.execute(query, values)
+            cursor = self.conn.execute(self.INSERT_QUERY, self._article_values(article))
+            self.conn.execute(self.CLEAR_FAILURE_QUERY, (article.fetched_article_id,))
             self.conn.commit()
             return cursor.lastrowid
         except sqlite3.Error as e:
             print(f"Error saving processed article: {e}")
             return None
 
+    def save_articles(self, articles: List[ProcessedArticle]) -> int:
+        """Save a batch of enriched articles in a single transaction"""
+        if not articles:
+            return 0
+        try:
+            rows = [self._article_values(article) for article in articles]
+
+            # The connection context commits on success and rolls back the whole batch on error
+            with self.conn:
+                self.conn.executemany(self.INSERT_QUERY, rows)
+                self.conn.executemany(self.CLEAR_FAILURE_QUERY, [(article.fetched_article_id,) for article in articles])
+            return len(rows)
+        except sqlite3.Error as e:
+            print(f"Error saving processed articles batch: {e}")
+            return 0
+
+    def save_article_locations(self, locations: Dict[int, List[Dict]]) -> bool:
+        """Replace the location index entries of articles, keyed by fetched article ID"""
+        if not locations:
+            return True
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM article_locations WHERE fetched_article_id = ?",
+                    [(article_id,) for article_id in locations]
+                )
+                self.conn.executemany("""
+                    INSERT OR IGNORE INTO article_locations (
+                        fetched_article_id, location_id, country_id, role, latitude, longitude
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        article_id, row['location_id'], row.get('country_id'), row['role'],
+                        row.get('latitude'), row.get('longitude')
+                    )
+                    for article_id, rows in locations.items()
+                    for row in rows
+                ])
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving article locations: {e}")
+            return False
+
+    def fill_location_coordinates(self, coordinates: Dict[str, Tuple[float, float]]) -> int:
+        """Set coordinates on indexed locations that don't have them yet, keyed by location ID"""
+        try:
+            with self.conn:
+                cursor = self.conn.executemany("""
+                    UPDATE article_locations SET latitude = ?, longitude = ?
+                    WHERE location_id = ? AND latitude IS NULL
+                """, [(latitude, longitude, location_id) for location_id, (latitude, longitude) in coordinates.items()])
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error filling location coordinates: {e}")
+            return 0
+
+    def get_guide_coordinates(self) -> List[Dict]:
+        """Coordinates of every located guide and experience, one row per article location"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT p.id, l.latitude, l.longitude
+                FROM article_locations l
+                JOIN processed_articles p ON p.fetched_article_id = l.fetched_article_id
+                WHERE l.latitude IS NOT NULL
+                AND json_extract(p.content_type, '$[0]') IN ('guide', 'experience')
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting guide coordinates: {e}")
+            return []
+
+    def get_unindexed_articles(self, limit: int = 5000) -> List[Dict]:
+        """Get processed articles with named locations that have no location index entries yet"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT p.* FROM processed_articles p
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM article_locations l WHERE l.fetched_article_id = p.fetched_article_id
+                )
+                AND (
+                    json_extract(p.locations, '$.primary') != 'worldwide'
+                    OR json_array_length(json_extract(p.locations, '$.secondary')) > 0
+                )
+                LIMIT ?
+            """, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting unindexed articles: {e}")
+            return []
+
     def get_unprocessed_articles(self) -> List[Dict]:
         """Get articles that haven't been processed yet"""
         try:
             query = """
                 SELECT a.* FROM articles a
                 LEFT JOIN processed_articles p ON a.id = p.fetched_article_id
-                WHERE p.id IS NULL AND a.is_full_content_fetched = 1
+                LEFT JOIN enrichment_failures d ON a.id = d.fetched_article_id
+                WHERE p.id IS NULL AND a.is_full_content_fetched = 1 AND COALESCE(d.dead, 0) = 0
             """
             cursor = self.conn.execute(query)
             return [dict(row) for row in cursor.fetchall()]
@@ -95,6 +333,367 @@ class ProcessedDatabase:
             print(f"Error getting unprocessed articles: {e}")
             return []
 
+    def get_outdated_articles(self, current_versions: List[str], max_age_days: int = 30,
+                              max_used_count: int = 3, limit: int = 50) -> List[Dict]:
+        """
+        Get still-selectable articles enriched with an older prompt, most valuable first
+
+        Unexpired, unused deals come first, then guides and experiences under max_used_count,
+        then other content published in the last max_age_days; newest first within each group.
+        Articles without a recorded version predate versioning and count as outdated.
+        """
+        placeholders = ",".join("?" * len(current_versions))
+        try:
+            cursor = self.conn.execute(f"""
+                SELECT a.*, p.id AS processed_id, p.prompt_version,
+                    CASE json_extract(p.content_type, '$[0]')
+                        WHEN 'deal' THEN 0
+                        WHEN 'guide' THEN 1
+                        WHEN 'experience' THEN 1
+                        ELSE 2
+                    END AS priority
+                FROM processed_articles p
+                JOIN articles a ON a.id = p.fetched_article_id
+                LEFT JOIN enrichment_failures d ON a.id = d.fetched_article_id
+                WHERE (p.prompt_version IS NULL OR p.prompt_version NOT IN ({placeholders}))
+                AND a.is_full_content_fetched = 1
+                AND COALESCE(d.dead, 0) = 0
+                AND (
+                    (
+                        json_extract(p.content_type, '$[0]') = 'deal'
+                        AND p.last_used IS NULL
+                        AND p.archived_date IS NULL
+                        AND p.duplicate_of IS NULL
+                        AND p.booking_deadline > date('now')
+                    )
+                    OR (
+                        json_extract(p.content_type, '$[0]') IN ('guide', 'experience')
+                        AND COALESCE(p.used_count, 0) < ?
+                    )
+                    OR (
+                        json_extract(p.content_type, '$[0]') IN ('news', 'tip')
+                        AND datetime(a.published_date) > datetime('now', ?)
+                    )
+                )
+                ORDER BY priority, a.published_date DESC
+                LIMIT ?
+            """, (*current_versions, max_used_count, f"-{max_age_days} days", limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting outdated articles: {e}")
+            return []
+
+    def record_usage(self, processed_ids: List[int]) -> bool:
+        """Count a newsletter use of the given processed articles"""
+        if not processed_ids:
+            return True
+        placeholders = ",".join("?" * len(processed_ids))
+        try:
+            with self.conn:
+                self.conn.execute(f"""
+                    UPDATE processed_articles
+                    SET used_count = COALESCE(used_count, 0) + 1,
+                        last_used = datetime('now')
+                    WHERE id IN ({placeholders})
+                """, list(processed_ids))
+            self.usage_version += 1
+            return True
+        except sqlite3.Error as e:
+            print(f"Error recording article usage: {e}")
+            return False
+
+    def get_selected_articles(self, processed_ids: List[int]) -> List[Dict]:
+        """Get processed articles joined with their fetched article"""
+        if not processed_ids:
+            return []
+        placeholders = ",".join("?" * len(processed_ids))
+        try:
+            cursor = self.conn.execute(f"""
+                SELECT p.id, p.fetched_article_id, a.title, a.url, a.content, a.published_date,
+                    a.source_name, a.source_url, p.content_type, p.deal_data, p.locations, p.audience,
+                    p.key_themes, p.seasonality, p.processed_date, p.last_used, p.used_count
+                FROM processed_articles p
+                JOIN articles a ON a.id = p.fetched_article_id
+                WHERE p.id IN ({placeholders})
+            """, list(processed_ids))
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting selected articles: {e}")
+            return []
+
+    def get_selection_candidates(self, content_types: List[str]) -> List[Dict]:
+        """
+        Get every processed article a newsletter section could pick, without its article text
+
+        Deals are limited to live cluster representatives with a future booking deadline. Each row carries its
+        location index entries as a JSON array of [location_id, country_id, latitude, longitude, role].
+        """
+        placeholders = ",".join("?" * len(content_types))
+        try:
+            cursor = self.conn.execute(f"""
+                SELECT p.id, p.fetched_article_id, p.content_type, p.deal_data, p.locations, p.seasonality,
+                    p.audience, p.processed_date, p.last_used, p.used_count, a.published_date, a.source_name,
+                    (
+                        SELECT json_group_array(json_array(l.location_id, l.country_id, l.latitude, l.longitude, l.role))
+                        FROM article_locations l
+                        WHERE l.fetched_article_id = p.fetched_article_id
+                    ) AS location_index
+                FROM processed_articles p
+                JOIN articles a ON a.id = p.fetched_article_id
+                WHERE json_extract(p.content_type, '$[0]') IN ({placeholders})
+                AND p.archived_date IS NULL
+                AND p.duplicate_of IS NULL
+                AND (
+                    json_extract(p.content_type, '$[0]') != 'deal'
+                    OR p.booking_deadline > date('now')
+                )
+            """, content_types)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting selection candidates: {e}")
+            return []
+
+    def sweep_expired_deals(self) -> int:
+        """
+        Archive deals whose booking deadline has passed, returning how many were archived
+
+        Only deals expire, whatever deadline the model gave other content. Archived deals
+        stay in the table for usage history but are skipped by every deal query; the sweep
+        reads the live deadline index from its earliest entry up to today.
+        """
+        try:
+            with self.conn:
+                cursor = self.conn.execute("""
+                    UPDATE processed_articles SET archived_date = datetime('now')
+                    WHERE archived_date IS NULL AND booking_deadline <= date('now')
+                    AND json_extract(content_type, '$[0]') = 'deal'
+                """)
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error sweeping expired deals: {e}")
+            return 0
+
+    def get_live_deals(self) -> List[Dict]:
+        """Deal data and usage of every unarchived deal, for clustering"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT p.id, p.deal_data, p.last_used
+                FROM processed_articles p
+                WHERE p.archived_date IS NULL
+                AND json_extract(p.content_type, '$[0]') = 'deal'
+                AND p.deal_data IS NOT NULL
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting live deals: {e}")
+            return []
+
+    def save_deal_clusters(self, duplicates: Dict[int, int]) -> bool:
+        """Replace the duplicate marks of live deals: deal ID -> ID of its cluster's representative"""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE processed_articles SET duplicate_of = NULL WHERE archived_date IS NULL AND duplicate_of IS NOT NULL"
+                )
+                self.conn.executemany(
+                    "UPDATE processed_articles SET duplicate_of = ? WHERE id = ?",
+                    [(representative, deal_id) for deal_id, representative in duplicates.items()]
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving deal clusters: {e}")
+            return False
+
+    def record_enrichment_failure(self, article_id: int, error_type: str, message: str,
+                                  counted: bool = True, max_attempts: int = 3) -> bool:
+        """
+        Record a failed enrichment of an article
+
+        Args:
+            article_id: ID of the fetched article
+            error_type: Name of the error class
+            message: Error message, kept as the last error
+            counted: Whether the failure counts toward max_attempts (transient errors don't)
+            max_attempts: Counted failures after which the article is dead-lettered
+        Returns:
+            Whether the article is now dead-lettered
+        """
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO enrichment_failures (fetched_article_id, attempts, error_type, last_error)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (fetched_article_id) DO UPDATE SET
+                        attempts = attempts + excluded.attempts,
+                        error_type = excluded.error_type,
+                        last_error = excluded.last_error,
+                        last_failed = datetime('now')
+                """, (article_id, 1 if counted else 0, error_type, message))
+                self.conn.execute("""
+                    UPDATE enrichment_failures SET dead = 1
+                    WHERE fetched_article_id = ? AND attempts >= ?
+                """, (article_id, max_attempts))
+            row = self.conn.execute(
+                "SELECT dead FROM enrichment_failures WHERE fetched_article_id = ?", (article_id,)
+            ).fetchone()
+            return bool(row["dead"])
+        except sqlite3.Error as e:
+            print(f"Error recording enrichment failure: {e}")
+            return False
+
+    def get_dead_letters(self) -> List[Dict]:
+        """Get articles that are no longer retried because their enrichment keeps failing"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT * FROM enrichment_failures
+                WHERE dead = 1
+                ORDER BY last_failed DESC
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting dead letters: {e}")
+            return []
+
+    def requeue_dead_letters(self, article_ids: Optional[List[int]] = None) -> int:
+        """Give dead-lettered articles (all of them by default) a fresh set of attempts"""
+        try:
+            with self.conn:
+                if article_ids is None:
+                    cursor = self.conn.execute("DELETE FROM enrichment_failures WHERE dead = 1")
+                else:
+                    cursor = self.conn.executemany(
+                        "DELETE FROM enrichment_failures WHERE dead = 1 AND fetched_article_id = ?",
+                        [(article_id,) for article_id in article_ids]
+                    )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error requeueing dead letters: {e}")
+            return 0
+
+    def save_enrichment_batch(self, batch_id: str, input_file_id: str, status: str, items: List[Dict]) -> bool:
+        """Record a submitted batch job and the articles it covers, with their token counts"""
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO enrichment_batches (batch_id, input_file_id, status, article_count)
+                    VALUES (?, ?, ?, ?)
+                """, (batch_id, input_file_id, status, len(items)))
+                self.conn.executemany("""
+                    INSERT INTO enrichment_batch_items (
+                        batch_id, fetched_article_id, input_tokens, original_tokens, prompt_version
+                    ) VALUES (?, ?, ?, ?, ?)
+                """, [
+                    (
+                        batch_id, item['fetched_article_id'], item.get('input_tokens'),
+                        item.get('original_tokens'), item.get('prompt_version')
+                    )
+                    for item in items
+                ])
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving enrichment batch: {e}")
+            return False
+
+    def save_edition_plan(self, slots: List[Dict]) -> bool:
+        """Replace the stored plan of upcoming editions"""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM edition_plan")
+                self.conn.executemany("""
+                    INSERT INTO edition_plan (
+                        edition_date, section, position, processed_article_id, distance_km, planned_at
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        slot['edition_date'], slot['section'], slot['position'], slot['processed_article_id'],
+                        slot.get('distance_km'), slot['planned_at']
+                    )
+                    for slot in slots
+                ])
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving edition plan: {e}")
+            return False
+
+    def get_edition_plan(self) -> List[Dict]:
+        """Get the planned slots of upcoming editions, earliest edition first"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT * FROM edition_plan
+                ORDER BY edition_date, section, position
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting edition plan: {e}")
+            return []
+
+    def delete_planned_edition(self, edition_date: str) -> bool:
+        """Remove an edition from the plan once it has been generated"""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM edition_plan WHERE edition_date = ?", (edition_date,))
+            return True
+        except sqlite3.Error as e:
+            print(f"Error deleting planned edition: {e}")
+            return False
+
+    def get_open_enrichment_batches(self) -> List[Dict]:
+        """Get batch jobs that have not been finalized yet"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT * FROM enrichment_batches
+                WHERE completed_date IS NULL
+                ORDER BY submitted_date
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting open enrichment batches: {e}")
+            return []
+
+    def get_open_batch_article_ids(self) -> List[int]:
+        """Get IDs of articles already waiting in an open batch job"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT i.fetched_article_id
+                FROM enrichment_batch_items i
+                JOIN enrichment_batches b ON b.batch_id = i.batch_id
+                WHERE b.completed_date IS NULL
+            """)
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error getting open batch articles: {e}")
+            return []
+
+    def get_batch_item_token_counts(self, batch_id: str) -> Dict[int, Dict]:
+        """Token counts and prompt version recorded for each article of a batch job when it was submitted"""
+        try:
+            cursor = self.conn.execute("""
+                SELECT fetched_article_id, input_tokens, original_tokens, prompt_version
+                FROM enrichment_batch_items
+                WHERE batch_id = ?
+            """, (batch_id,))
+            return {row["fetched_article_id"]: dict(row) for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Error getting batch token counts: {e}")
+            return {}
+
+    def update_enrichment_batch(self, batch_id: str, status: str, output_file_id: Optional[str] = None,
+                                completed: bool = False) -> bool:
+        """Update the status of a batch job, finalizing it when completed"""
+        try:
+            self.conn.execute("""
+                UPDATE enrichment_batches
+                SET status = ?,
+                    output_file_id = COALESCE(?, output_file_id),
+                    completed_date = CASE WHEN ? THEN datetime('now') ELSE completed_date END
+                WHERE batch_id = ?
+            """, (status, output_file_id, completed, batch_id))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error updating enrichment batch: {e}")
+            return False
+
     def get_high_value_deals(self, min_score: int = 8) -> List[Dict]:
         """Get current high-value deals with full article data"""
         try:
@@ -104,7 +703,9 @@ class ProcessedDatabase:
                 JOIN processed_articles p ON a.id = p.fetched_article_id
                 WHERE p.content_type = 'deal'
                 AND json_extract(p.deal_data, '$.value_score') >= ?
-                AND date(json_extract(p.deal_data, '$.booking_deadline')) > date('now')
+                AND p.archived_date IS NULL
+                AND p.duplicate_of IS NULL
+                AND p.booking_deadline > date('now')
                 ORDER BY json_extract(p.deal_data, '$.value_score') DESC
                 LIMIT 1
             """
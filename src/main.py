@@ -1,5 +1,8 @@
 import os
 import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
 from database.populate_db import PopulateDB
 from database.fetch_database import FetchDatabase
 from database.processed_database import ProcessedDatabase
@@ -8,10 +11,20 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.batch_enricher import BatchEnricher
+from content.enriching.enrichment_scheduler import EnrichmentScheduler
+from content.enriching.deal_clusterer import DealClusterer
+from content.enriching.pre_classifier import PreClassifier
+from content.enriching.reenrichment_planner import ReenrichmentPlanner
 from content.selection.article_selector import ArticleSelector
+from content.selection.scoring_engine import ScoringEngine
+from content.selection.edition_planner import EditionPlanner
+from content.selection.segment_selector import SegmentSelector
 from content.writing.newsletter_writer import NewsletterWriter
+from config.source_manager import SourceManager
 
-from services.amazon_ses.amazon_ses_client import AmazonSesClient
+from services.openai.response_cache import ResponseCache
+from services.openai.telemetry import LLMTelemetry
 
 from config.logging_config import app_logger as logger
 
@@ -30,44 +43,181 @@ def load_environment():
         )
 
 
-def main():
+@contextmanager
+def pipeline_stage(name: str, timings: Optional[Dict] = None):
+    """Time one pipeline stage; the body sets stage['items'] to report its throughput"""
+    stage = {"items": None}
+    started = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage["seconds"] = time.perf_counter() - started
+        if timings is not None:
+            timings[name] = stage
+        logger.info(f"Stage {name} took {stage['seconds']:.2f}s")
+
+
+def main(timings: Optional[Dict] = None):
+    """Run the pipeline; per-stage seconds and item counts are stored in timings when given"""
     # Load environment variables
     load_environment()
 
     # populate db with content from our sources
     fetch_db = FetchDatabase("main")
-    populator = PopulateDB(fetch_db)
-    populator.populate_all_sources()
+    sources = SourceManager(os.getenv('SOURCES_CONFIG')).load_sources()
+    with pipeline_stage("populate", timings) as stage:
+        populator = PopulateDB(fetch_db, sources_path=os.getenv('SOURCES_CONFIG'))
+        stage["items"] = populator.populate_all_sources()['total_articles_added']
 
     # fetch full rss content
-    fetcher = RssFullFetch(fetch_db)
-    fetcher.fetch_pending_content()
+    with pipeline_stage("fetch", timings) as stage:
+        fetcher = RssFullFetch(fetch_db)
+        stage["items"] = fetcher.fetch_pending_content()
     fetch_db.conn.close()
     
     # process data adding enriched metadata
     processed_db = ProcessedDatabase("main")
-    enricher = ArticleEnricher(
-        processed_db=processed_db,
-        openai_model=os.getenv('OPENAI_MODEL')
-    )
-    processed_count = enricher.process_pending_articles()
+    llm_cache = ResponseCache("main")
+    llm_telemetry = LLMTelemetry("main")
+    with pipeline_stage("enrich", timings) as stage:
+        pre_classifier = None
+        if os.getenv('ENRICH_PRECLASSIFY', 'true').lower() == 'true':
+            pre_classifier = PreClassifier()
+            pre_classifier.train_from_database(processed_db.conn)
+        llm_provider = None
+        if os.getenv('LLM_BACKEND', 'openai') == 'local':
+            # Enrichment on our own cores; the newsletter itself is still written by the API model
+            from services.llamacpp.llamacpp_provider import LlamaCppProvider
+            llm_provider = LlamaCppProvider(
+                os.getenv('LOCAL_LLM_MODEL_PATH'),
+                n_ctx=int(os.getenv('LOCAL_LLM_CONTEXT', '8192')),
+                n_threads=int(os.getenv('LOCAL_LLM_THREADS', '0')) or None
+            )
+        enricher = ArticleEnricher(
+            processed_db=processed_db,
+            openai_model=os.getenv('OPENAI_MODEL'),
+            cache=llm_cache,
+            telemetry=llm_telemetry,
+            max_content_tokens=int(os.getenv('ENRICH_MAX_CONTENT_TOKENS', '3000')),
+            pre_classifier=pre_classifier,
+            max_enrichment_attempts=int(os.getenv('ENRICH_MAX_ATTEMPTS', '3')),
+            llm_provider=llm_provider,
+            # Expiring deals and email deal sources are enriched before evergreen content
+            scheduler=EnrichmentScheduler.from_sources(sources)
+        )
+        enricher.index_locations()
+        if llm_provider is None and os.getenv('ENRICH_MODE') == 'batch':
+            # Backfills go through the cheaper batch tier, results land on a later run
+            batch_results = BatchEnricher(enricher).run()
+            processed_count = batch_results['processed']
+        else:
+            processed_count = enricher.process_pending_articles_concurrent(
+                max_concurrency=int(os.getenv('ENRICH_MAX_CONCURRENCY', '8')),
+                requests_per_minute=int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500')),
+                tokens_per_minute=int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '200000')),
+                packed=os.getenv('ENRICH_PACKED', 'true').lower() == 'true',
+                # Seconds of enrichment per run; whatever isn't started waits for the next run
+                time_budget=float(os.getenv('ENRICH_TIME_BUDGET', '0')) or None
+            )
+        # Refresh a bounded number of still-selectable articles enriched with an older prompt
+        reenrichment = ReenrichmentPlanner(
+            enricher,
+            call_budget=int(os.getenv('ENRICH_REENRICH_BUDGET', '20')),
+            packed=os.getenv('ENRICH_PACKED', 'true').lower() == 'true'
+        ).run()
+        stage["items"] = processed_count + reenrichment['reenriched']
     logger.info(f"Processed {processed_count} new articles")
+    dead_letters = processed_db.get_dead_letters()
+    if dead_letters:
+        logger.warning(f"{len(dead_letters)} articles are dead-lettered after repeated enrichment failures")
+    llm_cache.log_stats()
+    llm_cache.close()
     
     # Select newsletter content using enriched metadata
     processed_db = ProcessedDatabase("main")
-    selector = ArticleSelector(processed_db)
-    newsletter_content = selector.select_newsletter_content()
+    with pipeline_stage("sweep", timings) as stage:
+        # Archive expired deals so selection only ranges over live ones
+        stage["items"] = processed_db.sweep_expired_deals()
+    with pipeline_stage("cluster", timings) as stage:
+        # The same deal from several sources is selectable through one representative only
+        stage["items"] = DealClusterer(processed_db).run()
+    with pipeline_stage("select", timings) as stage:
+        # "scored" ranks a one-query candidate pool by weighted score (weights overridable as JSON in
+        # SELECTION_WEIGHTS), "pool" keeps the fixed section orderings in memory, "sql" queries each section
+        selection_mode = os.getenv('SELECTION_MODE', 'scored')
+        scoring_engine = None
+        if selection_mode == 'scored':
+            scoring_engine = ScoringEngine.from_sources(sources, weights=json.loads(os.getenv('SELECTION_WEIGHTS', '{}')))
+        # Share of the scored ranking traded for variety of location, source and type (0 disables)
+        selector = ArticleSelector(processed_db, scoring_engine=scoring_engine,
+                                   diversity=float(os.getenv('SELECTION_DIVERSITY', '0.3')))
+        pool = selector.load_candidate_pool() if selection_mode in ('scored', 'pool') else None
+        plan_editions = int(os.getenv('NEWSLETTER_PLAN_EDITIONS', '0'))
+        # Comma separated audience segments (see DEFAULT_SEGMENTS), each sent to its SES topic
+        segments = [name.strip() for name in os.getenv('NEWSLETTER_SEGMENTS', '').split(',') if name.strip()]
+        planned_edition = None
+        if pool is not None and segments:
+            editions = SegmentSelector.from_sources(selector, sources).select_segments(pool, segments)
+        elif pool is not None and plan_editions > 0:
+            # Take the next edition of a stored multi-edition plan, re-planned only where needed
+            planner = EditionPlanner(
+                selector,
+                editions=plan_editions,
+                interval_days=float(os.getenv('NEWSLETTER_PLAN_INTERVAL_DAYS', '2.5'))
+            )
+            content, planned_edition = planner.next_edition(pool)
+            editions = {'newsletter': content}
+        else:
+            editions = {'newsletter': selector.select_newsletter_content(pool=pool)}
+        stage["items"] = sum(
+            len(items) for content in editions.values() for items in content.values() if isinstance(items, list)
+        )
 
-    # Generate the newsletter
-    newsletter_writer = NewsletterWriter(processed_db)
-    json_data = newsletter_writer.generate_newsletter(newsletter_content, mode="test")
+    # Generate the newsletter, one per segment
+    with pipeline_stage("write", timings) as stage:
+        # Streaming converts each section as soon as the model finishes it and stops early on malformed output
+        newsletter_writer = NewsletterWriter(processed_db, telemetry=llm_telemetry,
+                                             stream=os.getenv('NEWSLETTER_STREAM', 'true').lower() == 'true')
+        # "real" counts the articles' usage; an article shared by several segments counts once
+        newsletter_mode = os.getenv('NEWSLETTER_MODE', 'test')
+        newsletters = {
+            topic: newsletter_writer.generate_newsletter(content, mode=newsletter_mode, record_usage=False)
+            for topic, content in editions.items()
+        }
+        if newsletter_mode == 'real':
+            newsletter_writer.update_editions_usage(editions)
+        json_data = next(iter(newsletters.values()))
+        stage["items"] = sum(1 for data in newsletters.values() if data)
+    llm_telemetry.log_run_summary()
+    llm_telemetry.close()
+
+    if os.getenv('NEWSLETTER_DRY_RUN', 'false').lower() == 'true':
+        processed_db.conn.close()
+        logger.info("Dry run: newsletter not sent")
+        return json_data
+
+    with pipeline_stage("send", timings) as stage:
+        # Imported here so offline and dry runs don't need AWS credentials or boto3
+        from services.amazon_ses.amazon_ses_client import AmazonSesClient
+        ses_client = AmazonSesClient()
+        # A segment without its topic would silently reach nobody; create_contact_list provisions them
+        missing_topics = ses_client.missing_topics(newsletters)
+        if missing_topics:
+            raise ValueError(f"Contact list has no topics for: {', '.join(missing_topics)}")
+        ses_client.update_html_template(os.getenv("SES_NEWSLETTER_EDITION_ONE"), os.getenv("EMAIL_TEMPLATE_ONE_FILE"))
+        for topic, data in newsletters.items():
+            ses_client.send_templated_email(
+                os.getenv('SES_CONTACT_LIST_NAME'), os.getenv("SES_NEWSLETTER_EDITION_ONE"), data, topic_name=topic
+            )
+        stage["items"] = len(newsletters)
+
+    # A planned edition leaves the plan only once sent, so a failed write or send takes it again
+    if planned_edition:
+        processed_db.delete_planned_edition(planned_edition)
 
     # Clean up
     processed_db.conn.close()
-
-    ses_client = AmazonSesClient()
-    ses_client.update_html_template(os.getenv("SES_NEWSLETTER_EDITION_ONE"), os.getenv("EMAIL_TEMPLATE_ONE_FILE"))
-    ses_client.send_templated_email(os.getenv('SES_CONTACT_LIST_NAME'), os.getenv("SES_NEWSLETTER_EDITION_ONE"), json_data)
+    return json_data
 
 if __name__ == "__main__":
 
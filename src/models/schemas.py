@@ -1,12 +1,20 @@
+import json
 from datetime import datetime, date
-from typing import List, Optional, Dict, Union
-from pydantic import BaseModel, field_validator, model_validator, Field
+from typing import Any, List, Optional, Dict, Union
+from pydantic import BaseModel, ValidationInfo, field_validator, model_validator, Field
+from config.logging_config import fetch_logger as logger
 
 class TravelWindow(BaseModel):
     # Accept either date or string (including empty string)
     start: Union[date, str] = ''
     end: Union[date, str] = ''
 
+    @field_validator('start', 'end', mode='before')
+    @classmethod
+    def null_as_empty(cls, value):
+        # Structured output sends null for unknown dates
+        return '' if value is None else value
+
 class DealData(BaseModel):
     type: Union[str, List[str]] = Field(default_factory=list)
     price_tier: Union[str, List[str]] = Field(default_factory=list)
@@ -28,12 +36,14 @@ class DealData(BaseModel):
             return []
         return value
     
-    @field_validator('origin', 'destination', mode='before')
+    @field_validator('origin', 'destination', 'booking_deadline', mode='before')
     @classmethod
     def normalize_string_fields(cls, value):
-        # Handle list with a single value by converting to string
+        # Handle list with a single value by converting to string, and null as unknown
         if isinstance(value, list) and len(value) == 1:
             return value[0]
+        if value is None:
+            return ''
         return value
     
     @field_validator('price_tier', 'type', mode='before')
@@ -58,3 +68,89 @@ class ProcessedArticle(BaseModel):
     key_themes: List[str]
     seasonality: List[str]
     processed_date: datetime
+    # Tokens of article text sent to the LLM, and before budgeting
+    input_tokens: Optional[int] = None
+    original_tokens: Optional[int] = None
+    # Hash of the prompt and schema that produced the enrichment
+    prompt_version: Optional[str] = None
+
+# What the model returns for an article: ProcessedArticle without bookkeeping fields, with
+# a single type per field (strict structured output has no loose unions) and null for unknowns
+class TravelWindowOutput(BaseModel):
+    start: Optional[str]
+    end: Optional[str]
+
+class DealDataOutput(BaseModel):
+    type: List[str]
+    price_tier: List[str]
+    value_score: Optional[int]
+    booking_deadline: Optional[str]
+    travel_window: Optional[TravelWindowOutput]
+    origin: Optional[str]
+    destination: Optional[str]
+
+class EnrichmentOutput(BaseModel):
+    content_type: List[str]
+    deal_data: Optional[DealDataOutput]
+    locations: Locations
+    audience: List[str]
+    key_themes: List[str]
+    seasonality: List[str]
+
+class Place(BaseModel):
+    # Gazetteer entry: ISO country code, "<country>:<city>" or "region:<name>"
+    id: str
+    name: str
+    kind: str
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+class SelectedArticle(BaseModel):
+    # A processed article joined with its fetched article, as placed in a newsletter section
+    id: int
+    fetched_article_id: int
+    title: str
+    url: str
+    content: Optional[str] = None
+    published_date: Optional[str] = None
+    source_name: str
+    source_url: str
+    content_type: List[str]
+    deal_data: Optional[Dict[str, Any]] = None
+    locations: Dict[str, Any]
+    audience: List[str] = Field(default_factory=list)
+    key_themes: List[str] = Field(default_factory=list)
+    seasonality: Union[List[str], Dict[str, Any]] = Field(default_factory=list)
+    processed_date: Optional[str] = None
+    last_used: Optional[str] = None
+    used_count: int = 0
+
+    @field_validator('content_type', 'deal_data', 'locations', 'audience', 'key_themes', 'seasonality', mode='before')
+    @classmethod
+    def decode_json_columns(cls, value, info: ValidationInfo):
+        # SQLite returns JSON columns as text; one corrupt column shouldn't drop the article from its newsletter
+        if not isinstance(value, str):
+            return value
+        try:
+            return json.loads(value)
+        except ValueError:
+            logger.warning(f"Invalid JSON in {info.field_name} of processed article {info.data.get('id')}")
+            return {'deal_data': None, 'locations': {}}.get(info.field_name, [])
+
+    @field_validator('published_date', 'processed_date', 'last_used', mode='before')
+    @classmethod
+    def dates_as_text(cls, value):
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        return value
+
+    @field_validator('used_count', mode='before')
+    @classmethod
+    def count_unused(cls, value):
+        return value or 0
+
+    def item(self) -> Dict[str, Any]:
+        """Plain dict placed in the newsletter content"""
+        return self.model_dump()
+
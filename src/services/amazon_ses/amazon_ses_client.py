@@ -44,7 +44,13 @@ class AmazonSesClient:
     def _verify_contact_list(self):
         return self.client.get_contact_list(ContactListName=os.environ.get("SES_CONTACT_LIST_NAME"))
 
-    def create_contact_list(self):
+    def create_contact_list(self, segments=()):
+        """
+        Create the contact list with its newsletter topic and one topic per audience segment
+
+        Args:
+            segments: Segment names (see NEWSLETTER_SEGMENTS) whose editions are sent to their own topic
+        """
         response = self.client.create_contact_list(
             ContactListName=os.environ.get("SES_CONTACT_LIST_NAME"),
             Description='Subscribers for travel newsletter',
@@ -53,10 +59,21 @@ class AmazonSesClient:
                 'DisplayName': 'Travel Newsletter',
                 'Description': 'travel tips and deals',
                 'DefaultSubscriptionStatus': 'OPT_OUT'
-            }]
+            }] + [{
+                'TopicName': segment,
+                'DisplayName': f'{segment.title()} Travel Newsletter',
+                'Description': f'travel tips and deals for {segment} travelers',
+                'DefaultSubscriptionStatus': 'OPT_OUT'
+            } for segment in segments]
         )
 
         return self._verify_contact_list()
+
+    def missing_topics(self, topic_names):
+        """Topics not defined on the contact list, whose sends would reach no subscriber"""
+        contact_list = self._verify_contact_list()
+        defined = {topic['TopicName'] for topic in contact_list.get('Topics', [])}
+        return [name for name in topic_names if name not in defined]
     
     def _load_html_template(self, template_path):
         """
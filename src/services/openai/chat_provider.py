@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from openai.types.chat import ChatCompletion
+
+
+class ChatProvider:
+    """
+    In-process chat completions backend used by OpenAIClient in place of the OpenAI SDK
+
+    It exposes the part of the SDK the client calls, chat.completions.create, so caching,
+    retries and telemetry work the same for every backend. Subclasses implement complete().
+    """
+    # Recorded as the model in cache keys and telemetry
+    model_name = "local"
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        # In-process models run one request at a time
+        self._lock = threading.Lock()
+
+    def complete(self, messages: List[Dict], response_format: Optional[Dict] = None) -> Dict:
+        """OpenAI-shaped chat completion dict for a conversation"""
+        raise NotImplementedError
+
+    def create(self, model: str, messages: List[Dict], response_format: Optional[Dict] = None,
+               **kwargs) -> ChatCompletion:
+        with self._lock:
+            result = self.complete(messages, response_format)
+        return ChatCompletion.model_validate(result)
+
+    async def create_async(self, model: str, messages: List[Dict], response_format: Optional[Dict] = None,
+                           **kwargs) -> ChatCompletion:
+        # Inference is CPU bound, so it runs on a worker thread to keep the event loop free
+        return await asyncio.to_thread(self.create, model, messages, response_format, **kwargs)
+
+    def async_client(self) -> SimpleNamespace:
+        """Stand-in for AsyncOpenAI"""
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create_async)))
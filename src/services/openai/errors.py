@@ -0,0 +1,34 @@
+from typing import Optional
+
+
+class LLMError(Exception):
+    """Base class for LLM call failures"""
+    # Whether retrying the same request later can succeed
+    transient = False
+
+
+class LLMRateLimitError(LLMError):
+    """The API quota was exceeded (HTTP 429)"""
+    transient = True
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """The request timed out"""
+    transient = True
+
+
+class LLMServiceError(LLMError):
+    """Connection failure or server-side error (HTTP 5xx)"""
+    transient = True
+
+
+class LLMRequestError(LLMError):
+    """The request was rejected (HTTP 4xx other than 429) and will fail again as-is"""
+
+
+class LLMBadOutputError(LLMError, ValueError):
+    """The model answered, but its output couldn't be parsed or validated"""
@@ -1,37 +1,370 @@
 import os
-from openai import OpenAI
-from typing import Optional
+import json
+import time
+from types import SimpleNamespace
+import openai
+from openai import OpenAI, AsyncOpenAI
+from typing import Any, Callable, Optional, Dict, Iterator, List
+from services.openai.chat_provider import ChatProvider
+from services.openai.rate_limiter import estimate_tokens
+from services.openai.response_cache import ResponseCache
+from services.openai.telemetry import LLMTelemetry
+from services.openai.errors import (
+    LLMError, LLMRateLimitError, LLMTimeoutError, LLMServiceError, LLMRequestError
+)
+from services.openai.retry import call_with_retry, call_with_retry_async
 
 class OpenAIClient:
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini",
+                 cache: Optional[ResponseCache] = None, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0,
+                 telemetry: Optional[LLMTelemetry] = None, provider: Optional[ChatProvider] = None):
         """
         Initialize OpenAI client with API key from parameter or environment variable
         
         Args:
             api_key: Optional API key. If not provided, will look for OPENAI_API_KEY env var
             model: OpenAI model to use
+            cache: Optional response cache; identical requests are then answered locally
+            max_retries: Retries of rate limited, timed out or server failed requests
+            base_delay: Initial backoff delay in seconds, doubled on every retry
+            max_delay: Upper bound of a single backoff delay in seconds
+            telemetry: Optional per-call usage recorder
+            provider: Optional in-process backend answering instead of the OpenAI API; batch jobs stay remote only
         """
-        # Use provided API key or get from environment
-        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        if not self.api_key:
-            raise ValueError(
-                "OpenAI API key not found. Either pass api_key parameter or "
-                "set OPENAI_API_KEY environment variable"
-            )
-            
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = model
+        self.provider = provider
+        self.async_client = None
+        if provider:
+            self.api_key = None
+            self.client = provider
+            self.model = provider.model_name
+        else:
+            # Use provided API key or get from environment
+            self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+            if not self.api_key:
+                raise ValueError(
+                    "OpenAI API key not found. Either pass api_key parameter or "
+                    "set OPENAI_API_KEY environment variable"
+                )
+
+            # Retries are handled here so they can honor Retry-After and be counted
+            self.client = OpenAI(api_key=self.api_key, max_retries=0)
+            self.model = model
+        self.cache = cache
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.telemetry = telemetry
+
+    @staticmethod
+    def _translate_error(error: Exception) -> LLMError:
+        """Map an OpenAI SDK exception onto the typed LLM errors"""
+        if isinstance(error, LLMError):
+            return error
+        message = f"OpenAI API error: {str(error)}"
+        if isinstance(error, openai.RateLimitError):
+            headers = error.response.headers if error.response is not None else {}
+            retry_after = None
+            try:
+                if headers.get("retry-after-ms"):
+                    retry_after = float(headers["retry-after-ms"]) / 1000
+                elif headers.get("retry-after"):
+                    retry_after = float(headers["retry-after"])
+            except ValueError:
+                pass
+            return LLMRateLimitError(message, retry_after=retry_after)
+        if isinstance(error, openai.APITimeoutError):
+            return LLMTimeoutError(message)
+        if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+            return LLMServiceError(message)
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code >= 500:
+                return LLMServiceError(message)
+            return LLMRequestError(message)
+        return LLMError(message)
         
-    def analyze(self, system_prompt: str, content: str) -> str:
-        """Analyze content using OpenAI API"""
-        try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": content}
-                ]
+    def analyze(self, system_prompt: str, content: str, response_format: Optional[Dict] = None,
+                caller: str = "analyze", article_ids: Optional[List[int]] = None,
+                validate: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        Analyze content using OpenAI API, optionally constrained to a structured output format
+
+        Args:
+            caller: Pipeline step the call is attributed to in telemetry
+            article_ids: Fetched articles the call covers, for per-article and per-source reporting
+            validate: Raises ValueError for a response that must not be cached; a cached
+                response it rejects is dropped and requested again
+        """
+        started = time.perf_counter()
+        cache_key = self._cache_key(system_prompt, content, response_format)
+        if cache_key:
+            cached = self._cached(cache_key, validate)
+            if cached is not None:
+                self._record(caller, article_ids, started, cache_hit=True)
+                return cached
+
+        retries = []
+        try:
+            completion = call_with_retry(
+                lambda: self._complete(system_prompt, content, response_format),
+                self.max_retries, self.base_delay, self.max_delay,
+                on_retry=lambda attempt, error: retries.append(error)
+            )
+        except LLMError as e:
+            self._record(caller, article_ids, started, retries=len(retries), error=e)
+            raise
+        self._record(caller, article_ids, started, completion.usage, retries=len(retries))
+
+        response = completion.choices[0].message.content
+        self._store(cache_key, response, validate)
+        return response
+
+    def _cached(self, cache_key: str, validate: Optional[Callable[[str], Any]]) -> Optional[str]:
+        """Cached response for a key, unless validate rejects it (then it is dropped from the cache)"""
+        cached = self.cache.get(cache_key)
+        if cached is not None and validate and not self._valid(cached, validate):
+            self.cache.delete(cache_key)
+            return None
+        return cached
+
+    def _store(self, cache_key: Optional[str], response: str, validate: Optional[Callable[[str], Any]]):
+        """Cache a response that passed validation, so a bad answer is never replayed"""
+        if cache_key and (not validate or self._valid(response, validate)):
+            self.cache.put(cache_key, self.model, response)
+
+    @staticmethod
+    def _valid(response: str, validate: Callable[[str], Any]) -> bool:
+        try:
+            validate(response)
+            return True
+        except ValueError:
+            return False
+
+    def _record(self, caller: str, article_ids: Optional[List[int]], started: float, usage=None,
+                retries: int = 0, cache_hit: bool = False, error: Optional[Exception] = None,
+                error_type: Optional[str] = None):
+        if not self.telemetry:
+            return
+        self.telemetry.record(
+            caller=caller,
+            model=self.model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            retries=retries,
+            cache_hit=cache_hit,
+            error_type=error_type or (type(error).__name__ if error else None),
+            article_ids=article_ids
+        )
+
+    def _cache_key(self, system_prompt: str, content: str, response_format: Optional[Dict]) -> Optional[str]:
+        if not self.cache:
+            return None
+        if response_format:
+            return self.cache.make_key(self.model, system_prompt, content, json.dumps(response_format, sort_keys=True))
+        return self.cache.make_key(self.model, system_prompt, content)
+
+    def _request_body(self, system_prompt: str, content: str, response_format: Optional[Dict] = None) -> Dict:
+        """Chat completions request parameters"""
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content}
+            ]
+        }
+        if response_format:
+            body["response_format"] = response_format
+        return body
+
+    def _complete(self, system_prompt: str, content: str, response_format: Optional[Dict] = None):
+        """Chat completion response, including its token usage"""
+        try:
+            return self.client.chat.completions.create(
+                **self._request_body(system_prompt, content, response_format)
+            )
+        except Exception as e:
+            raise self._translate_error(e)
+
+    def analyze_stream(self, system_prompt: str, content: str, caller: str = "analyze",
+                       article_ids: Optional[List[int]] = None) -> Iterator[str]:
+        """
+        Completion text in pieces as the model produces them
+
+        Only opening the stream is retried: once pieces have been handed out, a failure is
+        raised to the caller. Closing the iterator early stops the completion. In-process
+        providers and cached responses answer in one piece.
+        """
+        if self.provider:
+            yield self.analyze(system_prompt, content, caller=caller, article_ids=article_ids)
+            return
+
+        started = time.perf_counter()
+        cache_key = self._cache_key(system_prompt, content, None)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record(caller, article_ids, started, cache_hit=True)
+                yield cached
+                return
+
+        retries = []
+        try:
+            stream = call_with_retry(
+                lambda: self._open_stream(system_prompt, content),
+                self.max_retries, self.base_delay, self.max_delay,
+                on_retry=lambda attempt, error: retries.append(error)
             )
-            return completion.choices[0].message.content
+        except LLMError as e:
+            self._record(caller, article_ids, started, retries=len(retries), error=e)
+            raise
+
+        pieces = []
+        usage = None
+        error = None
+        error_type = None
+        try:
+            for chunk in stream:
+                # With include_usage the last chunk carries the usage and no choices
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                    yield pieces[-1]
+        except GeneratorExit:
+            # Closed early by the caller: the usage chunk never arrives, so the billed tokens are estimated
+            error_type = "aborted"
+            usage = SimpleNamespace(prompt_tokens=estimate_tokens(system_prompt + content),
+                                    completion_tokens=estimate_tokens("".join(pieces)))
+            raise
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
\ No newline at end of file
+            error = self._translate_error(e)
+            raise error from e
+        finally:
+            stream.close()
+            self._record(caller, article_ids, started, usage, retries=len(retries), error=error,
+                         error_type=error_type)
+
+        if cache_key:
+            self.cache.put(cache_key, self.model, "".join(pieces))
+
+    def _open_stream(self, system_prompt: str, content: str):
+        """Streamed chat completion, ending with a usage chunk"""
+        try:
+            return self.client.chat.completions.create(
+                **self._request_body(system_prompt, content),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        except Exception as e:
+            raise self._translate_error(e)
+
+    async def analyze_async(self, system_prompt: str, content: str, response_format: Optional[Dict] = None,
+                            caller: str = "analyze", article_ids: Optional[List[int]] = None,
+                            validate: Optional[Callable[[str], Any]] = None) -> str:
+        """Analyze content using the async OpenAI API, for concurrent callers (see analyze)"""
+        started = time.perf_counter()
+        cache_key = self._cache_key(system_prompt, content, response_format)
+        if cache_key:
+            cached = self._cached(cache_key, validate)
+            if cached is not None:
+                self._record(caller, article_ids, started, cache_hit=True)
+                return cached
+
+        retries = []
+        try:
+            completion = await call_with_retry_async(
+                lambda: self._complete_async(system_prompt, content, response_format),
+                self.max_retries, self.base_delay, self.max_delay,
+                on_retry=lambda attempt, error: retries.append(error)
+            )
+        except LLMError as e:
+            self._record(caller, article_ids, started, retries=len(retries), error=e)
+            raise
+        self._record(caller, article_ids, started, completion.usage, retries=len(retries))
+
+        response = completion.choices[0].message.content
+        self._store(cache_key, response, validate)
+        return response
+
+    async def _complete_async(self, system_prompt: str, content: str, response_format: Optional[Dict] = None):
+        # Created lazily so synchronous-only callers never open an async session
+        if self.async_client is None:
+            if self.provider:
+                self.async_client = self.provider.async_client()
+            else:
+                self.async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+
+        try:
+            return await self.async_client.chat.completions.create(
+                **self._request_body(system_prompt, content, response_format)
+            )
+        except Exception as e:
+            raise self._translate_error(e)
+
+    def batch_request(self, custom_id: str, system_prompt: str, content: str,
+                      response_format: Optional[Dict] = None) -> Dict:
+        """Build one JSONL line of a chat completions batch file"""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._request_body(system_prompt, content, response_format)
+        }
+
+    def submit_batch(self, batch_file_path: str) -> Dict:
+        """Upload a JSONL batch file and start a batch job against the chat completions endpoint"""
+        if self.provider:
+            raise LLMRequestError(f"Batch jobs are not supported by the {self.model} provider")
+        try:
+            with open(batch_file_path, "rb") as batch_file:
+                input_file = self.client.files.create(file=batch_file, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            return {"batch_id": batch.id, "input_file_id": input_file.id, "status": batch.status}
+        except Exception as e:
+            raise self._translate_error(e)
+
+    def get_batch(self, batch_id: str) -> Dict:
+        """Get the current status and result file IDs of a batch job"""
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            return {
+                "batch_id": batch.id,
+                "status": batch.status,
+                "output_file_id": batch.output_file_id,
+                "error_file_id": batch.error_file_id
+            }
+        except Exception as e:
+            raise self._translate_error(e)
+
+    def iter_batch_results(self, file_id: str) -> Iterator[Dict]:
+        """
+        Stream the lines of a batch result file
+
+        Yields:
+            Dicts with custom_id, content (None on failure), error (None on success) and token usage
+        """
+        try:
+            result_file = self.client.files.content(file_id)
+        except Exception as e:
+            raise self._translate_error(e)
+
+        for line in result_file.iter_lines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            body = response.get("body") or {}
+            error = result.get("error")
+
+            content = None
+            if not error and response.get("status_code") == 200:
+                content = body["choices"][0]["message"]["content"]
+            elif not error:
+                error = body.get("error") or f"HTTP {response.get('status_code')}"
+
+            yield {"custom_id": result["custom_id"], "content": content, "error": error, "usage": body.get("usage") or {}}
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size estimate (~4 characters per token for English text)"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int = 500, tokens_per_minute: int = 200000):
+        """
+        Token bucket limiter covering both the request and token budgets of an API quota
+
+        Args:
+            requests_per_minute: Maximum number of requests started per minute
+            tokens_per_minute: Maximum number of (estimated) tokens sent per minute
+        """
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        # Both buckets start full and refill continuously
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until both buckets can cover a request of the given size"""
+        request_deficit = 1 - self._request_allowance
+        token_deficit = tokens - self._token_allowance
+        wait = 0.0
+        if request_deficit > 0:
+            wait = max(wait, request_deficit * 60.0 / self.requests_per_minute)
+        if token_deficit > 0:
+            wait = max(wait, token_deficit * 60.0 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until a request with the given estimated token count fits the budget"""
+        # A single request larger than the whole minute budget would never fit
+        tokens = min(tokens, self.tokens_per_minute)
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Serialize waiters so requests are admitted in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+                await asyncio.sleep(wait)
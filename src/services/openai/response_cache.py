@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from config.logging_config import fetch_logger as logger
+
+
+class ResponseCache:
+    def __init__(self, db_path: str = ":memory:", max_entries: int = 20000,
+                 max_size_bytes: int = 200 * 1024 * 1024):
+        """
+        Persistent content-addressed cache of LLM responses with LRU eviction
+
+        Args:
+            db_path: ":memory:" for testing or "main" for the cache file next to the article database
+            max_entries: Maximum number of cached responses
+            max_size_bytes: Maximum total size of cached responses
+        """
+        if db_path == ":memory:":
+            self.db_path = db_path
+        elif db_path == "main":
+            db_dir = Path(os.getenv('DATABASE_PATH'))
+            db_dir.mkdir(parents=True, exist_ok=True)
+            self.db_path = str(db_dir / "llm_cache.db")
+        else:
+            raise ValueError("Invalid database path")
+
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.conn = None
+        self.setup_database()
+
+    def setup_database(self):
+        """Initialize database connection and create the cache table"""
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache (last_accessed)")
+        self.conn.commit()
+
+        row = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache").fetchone()
+        self._entry_count, self._total_size = row[0], row[1]
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, content: str, *extra: str) -> str:
+        """Hash of everything that determines the response"""
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, content, *extra):
+            digest.update(part.encode("utf-8"))
+            # Separator keeps ("ab", "c") and ("a", "bc") from colliding
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, refreshing its LRU position"""
+        row = self.conn.execute("SELECT response FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute("""
+            UPDATE llm_cache
+            SET last_accessed = ?, hit_count = hit_count + 1
+            WHERE cache_key = ?
+        """, (time.time(), key))
+        self.conn.commit()
+        return row["response"]
+
+    def put(self, key: str, model: str, response: str):
+        """Store a response and evict least recently used entries beyond the size bounds"""
+        size = len(response.encode("utf-8"))
+        now = time.time()
+
+        existing = self.conn.execute("SELECT size_bytes FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if existing:
+            self._entry_count -= 1
+            self._total_size -= existing["size_bytes"]
+
+        self.conn.execute("""
+            INSERT OR REPLACE INTO llm_cache (cache_key, model, response, size_bytes, created_at, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, model, response, size, now, now))
+        self._entry_count += 1
+        self._total_size += size
+
+        self._evict()
+        self.conn.commit()
+
+    def delete(self, key: str):
+        """Drop a cached response, so the next request for it reaches the model again"""
+        existing = self.conn.execute("SELECT size_bytes FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if not existing:
+            return
+        self.conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+        self.conn.commit()
+        self._entry_count -= 1
+        self._total_size -= existing["size_bytes"]
+
+    def _evict(self):
+        while self._entry_count > self.max_entries or self._total_size > self.max_size_bytes:
+            # Evict in chunks so a large overshoot doesn't cost one query per entry
+            excess = max(self._entry_count - self.max_entries, 1)
+            rows = self.conn.execute("""
+                SELECT cache_key, size_bytes FROM llm_cache
+                ORDER BY last_accessed ASC
+                LIMIT ?
+            """, (excess,)).fetchall()
+            if not rows:
+                break
+            self.conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", [(row["cache_key"],) for row in rows])
+            self._entry_count -= len(rows)
+            self._total_size -= sum(row["size_bytes"] for row in rows)
+            self.evictions += len(rows)
+
+    def stats(self) -> Dict:
+        """Hit/miss metrics for this process plus the current cache size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._entry_count,
+            "size_bytes": self._total_size
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evictions, "
+            f"{stats['entries']} entries"
+        )
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
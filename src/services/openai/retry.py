@@ -0,0 +1,63 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+from services.openai.errors import LLMError, LLMRateLimitError
+from config.logging_config import fetch_logger as logger
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with full jitter, never shorter than a server provided Retry-After
+
+    Args:
+        attempt: Zero based number of the retry
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after(error: LLMError) -> Optional[float]:
+    return error.retry_after if isinstance(error, LLMRateLimitError) else None
+
+
+def call_with_retry(call: Callable[[], T], max_retries: int = 5, base_delay: float = 1.0,
+                    max_delay: float = 60.0, on_retry: Optional[Callable[[int, LLMError], None]] = None) -> T:
+    """Run a call, retrying transient LLM errors with backoff"""
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except LLMError as e:
+            if not e.transient or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, _retry_after(e))
+            logger.warning(f"{type(e).__name__} on attempt {attempt + 1}, retrying in {delay:.1f}s: {str(e)}")
+            if on_retry:
+                on_retry(attempt + 1, e)
+            time.sleep(delay)
+            attempt += 1
+
+
+async def call_with_retry_async(call: Callable[[], Awaitable[T]], max_retries: int = 5, base_delay: float = 1.0,
+                                max_delay: float = 60.0,
+                                on_retry: Optional[Callable[[int, LLMError], None]] = None) -> T:
+    """Async variant of call_with_retry"""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except LLMError as e:
+            if not e.transient or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, _retry_after(e))
+            logger.warning(f"{type(e).__name__} on attempt {attempt + 1}, retrying in {delay:.1f}s: {str(e)}")
+            if on_retry:
+                on_retry(attempt + 1, e)
+            await asyncio.sleep(delay)
+            attempt += 1
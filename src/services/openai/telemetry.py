@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from config.logging_config import fetch_logger as logger
+
+# USD per million (prompt, completion) tokens; matched on the longest model name prefix
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+# The batch API bills half the synchronous price
+BATCH_DISCOUNT = 0.5
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int, batch: bool = False) -> Optional[float]:
+    """USD cost of a call, None for models without a known price"""
+    matches = [name for name in MODEL_PRICES if (model or "").startswith(name)]
+    if not matches:
+        return None
+    prompt_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+class LLMTelemetry:
+    def __init__(self, db_path: str = ":memory:", run_id: Optional[str] = None, flush_every: int = 50):
+        """
+        Per-call record of LLM usage: tokens, latency, retries, cache hits and cost
+
+        Args:
+            db_path: ":memory:" for testing or "main" for the article database, so calls can be joined to sources
+            run_id: Identifier grouping the calls of one pipeline run (generated by default)
+            flush_every: Number of calls buffered before they are written
+        """
+        if db_path == ":memory:":
+            self.db_path = db_path
+        elif db_path == "main":
+            db_dir = Path(os.getenv('DATABASE_PATH'))
+            db_dir.mkdir(parents=True, exist_ok=True)
+            self.db_path = str(db_dir / "travel_articles.db")
+        else:
+            raise ValueError("Invalid database path")
+
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.flush_every = flush_every
+        self._pending: List[tuple] = []
+
+        self.conn = None
+        self.setup_database()
+
+    def setup_database(self):
+        """Initialize database connection and create the llm_calls table"""
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                caller TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                latency_ms REAL NOT NULL,
+                retries INTEGER NOT NULL DEFAULT 0,
+                cache_hit INTEGER NOT NULL DEFAULT 0,
+                batch INTEGER NOT NULL DEFAULT 0,
+                error_type TEXT,
+                article_ids JSON,
+                cost_usd REAL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls (run_id)")
+        self.conn.commit()
+
+    def record(self, caller: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               latency_ms: float = 0.0, retries: int = 0, cache_hit: bool = False, batch: bool = False,
+               error_type: Optional[str] = None, article_ids: Optional[List[int]] = None):
+        """Buffer one call; cache hits cost nothing"""
+        cost = 0.0 if cache_hit else call_cost(model, prompt_tokens, completion_tokens, batch)
+        self._pending.append((
+            self.run_id, caller, model, prompt_tokens, completion_tokens, latency_ms, retries,
+            int(cache_hit), int(batch), error_type, json.dumps(article_ids) if article_ids else None, cost
+        ))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered calls in one transaction"""
+        if not self._pending:
+            return
+        try:
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT INTO llm_calls (
+                        run_id, caller, model, prompt_tokens, completion_tokens, latency_ms, retries,
+                        cache_hit, batch, error_type, article_ids, cost_usd
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, self._pending)
+            self._pending.clear()
+        except sqlite3.Error as e:
+            print(f"Error saving LLM telemetry: {e}")
+
+    def run_totals(self) -> Dict:
+        """Call count, tokens and cost of the current run"""
+        self.flush()
+        row = self.conn.execute("""
+            SELECT COUNT(*) AS calls,
+                   COALESCE(SUM(cache_hit), 0) AS cache_hits,
+                   COALESCE(SUM(prompt_tokens + completion_tokens), 0) AS tokens,
+                   COALESCE(SUM(cost_usd), 0) AS cost_usd
+            FROM llm_calls WHERE run_id = ?
+        """, (self.run_id,)).fetchone()
+        return dict(row)
+
+    def log_run_summary(self):
+        totals = self.run_totals()
+        logger.info(
+            f"LLM run {self.run_id}: {totals['calls']} calls ({totals['cache_hits']} cached), "
+            f"{totals['tokens']} tokens, ${totals['cost_usd']:.4f}"
+        )
+
+    def close(self):
+        """Flush pending calls and close the database connection"""
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
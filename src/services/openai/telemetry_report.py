@@ -0,0 +1,165 @@
+"""
+Cost and latency report over the llm_calls telemetry table
+
+Usage:
+    PYTHONPATH=src python -m services.openai.telemetry_report [--runs 5] [--run-id RUN] [--db PATH]
+"""
+import argparse
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def recent_run_ids(conn: sqlite3.Connection, limit: int = 5) -> List[str]:
+    cursor = conn.execute("""
+        SELECT run_id FROM llm_calls
+        GROUP BY run_id
+        ORDER BY MIN(id) DESC
+        LIMIT ?
+    """, (limit,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _latency_stats(rows: List[sqlite3.Row]) -> Dict:
+    # Cached and batch calls never waited on the API
+    latencies = [row["latency_ms"] for row in rows if not row["cache_hit"] and not row["batch"]]
+    return {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95)}
+
+
+def run_summary(conn: sqlite3.Connection, run_id: str) -> Dict:
+    """Totals, latency percentiles and per-article usage of one run"""
+    rows = conn.execute("SELECT * FROM llm_calls WHERE run_id = ?", (run_id,)).fetchall()
+    articles = set()
+    article_tokens = 0
+    for row in rows:
+        if row["article_ids"]:
+            articles.update(conn.execute("SELECT value FROM json_each(?)", (row["article_ids"],)).fetchall())
+            article_tokens += row["prompt_tokens"] + row["completion_tokens"]
+
+    return {
+        "run_id": run_id,
+        "started": min(row["created_at"] for row in rows) if rows else None,
+        "calls": len(rows),
+        "cache_hits": sum(row["cache_hit"] for row in rows),
+        "errors": sum(1 for row in rows if row["error_type"]),
+        "retries": sum(row["retries"] for row in rows),
+        "prompt_tokens": sum(row["prompt_tokens"] for row in rows),
+        "completion_tokens": sum(row["completion_tokens"] for row in rows),
+        "articles": len(articles),
+        "tokens_per_article": article_tokens / len(articles) if articles else None,
+        "cost_usd": sum(row["cost_usd"] or 0 for row in rows),
+        **_latency_stats(rows)
+    }
+
+
+def caller_summary(conn: sqlite3.Connection, run_id: str) -> List[Dict]:
+    """Per pipeline step breakdown of one run"""
+    rows = conn.execute("SELECT * FROM llm_calls WHERE run_id = ?", (run_id,)).fetchall()
+    callers: Dict[str, List[sqlite3.Row]] = {}
+    for row in rows:
+        callers.setdefault(row["caller"], []).append(row)
+    return sorted((
+        {
+            "caller": caller,
+            "calls": len(caller_rows),
+            "tokens": sum(row["prompt_tokens"] + row["completion_tokens"] for row in caller_rows),
+            "cost_usd": sum(row["cost_usd"] or 0 for row in caller_rows),
+            **_latency_stats(caller_rows)
+        }
+        for caller, caller_rows in callers.items()
+    ), key=lambda summary: -summary["cost_usd"])
+
+
+def source_summary(conn: sqlite3.Connection, run_ids: List[str]) -> List[Dict]:
+    """Cost and tokens per article source; packed calls are split evenly across their articles"""
+    if not run_ids:
+        return []
+    placeholders = ",".join("?" * len(run_ids))
+    try:
+        cursor = conn.execute(f"""
+            SELECT a.source_name,
+                   COUNT(DISTINCT a.id) AS articles,
+                   SUM((c.prompt_tokens + c.completion_tokens) * 1.0 / json_array_length(c.article_ids)) AS tokens,
+                   SUM(COALESCE(c.cost_usd, 0) / json_array_length(c.article_ids)) AS cost_usd
+            FROM llm_calls c, json_each(c.article_ids) j
+            JOIN articles a ON a.id = j.value
+            WHERE c.run_id IN ({placeholders}) AND c.article_ids IS NOT NULL
+            GROUP BY a.source_name
+            ORDER BY cost_usd DESC
+        """, run_ids)
+    except sqlite3.OperationalError:
+        # Telemetry stored apart from the articles table
+        return []
+    return [
+        {**dict(row), "cost_per_article": row["cost_usd"] / row["articles"] if row["articles"] else None}
+        for row in cursor.fetchall()
+    ]
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:.0f}ms" if value is not None else "-"
+
+
+def format_report(conn: sqlite3.Connection, run_ids: List[str]) -> str:
+    lines = []
+    for run_id in run_ids:
+        run = run_summary(conn, run_id)
+        per_article = f"{run['tokens_per_article']:.0f}" if run['tokens_per_article'] is not None else "-"
+        lines.append(f"Run {run_id} (started {run['started']})")
+        lines.append(
+            f"  {run['calls']} calls, {run['cache_hits']} cached, {run['errors']} failed, {run['retries']} retries"
+        )
+        lines.append(
+            f"  latency p50 {_ms(run['p50_ms'])}, p95 {_ms(run['p95_ms'])}; "
+            f"{run['prompt_tokens']} prompt + {run['completion_tokens']} completion tokens; "
+            f"{per_article} tokens/article over {run['articles']} articles; ${run['cost_usd']:.4f}"
+        )
+        for caller in caller_summary(conn, run_id):
+            lines.append(
+                f"    {caller['caller']:<20} {caller['calls']:>6} calls {caller['tokens']:>10} tokens "
+                f"${caller['cost_usd']:>9.4f}  p50 {_ms(caller['p50_ms'])}  p95 {_ms(caller['p95_ms'])}"
+            )
+
+    sources = source_summary(conn, run_ids)
+    if sources:
+        lines.append("")
+        lines.append(f"Cost per source over {len(run_ids)} run(s)")
+        for source in sources:
+            lines.append(
+                f"  {source['source_name']:<40} {source['articles']:>6} articles {source['tokens']:>10.0f} tokens "
+                f"${source['cost_usd']:>9.4f} (${source['cost_per_article']:.5f}/article)"
+            )
+    return "\n".join(lines) if lines else "No LLM calls recorded"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="LLM cost and latency report")
+    parser.add_argument("--db", help="SQLite file holding llm_calls (defaults to the article database)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of most recent runs to report")
+    parser.add_argument("--run-id", help="Report a single run")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or str(Path(os.getenv('DATABASE_PATH', '.')) / "travel_articles.db")
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        run_ids = [args.run_id] if args.run_id else recent_run_ids(conn, args.runs)
+        print(format_report(conn, run_ids))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
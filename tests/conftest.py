@@ -0,0 +1,15 @@
+import pytest
+from database.fetch_database import FetchDatabase
+from database.processed_database import ProcessedDatabase
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """File backed fetch and processed databases sharing one SQLite file, as in production"""
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    fetch_db = FetchDatabase("main")
+    processed_db = ProcessedDatabase("main")
+    yield fetch_db, processed_db
+    fetch_db.conn.close()
+    processed_db.close()
@@ -0,0 +1,176 @@
+import itertools
+import json
+from datetime import datetime, timedelta
+from content.enriching.article_enricher import ArticleEnricher
+from models.schemas import ProcessedArticle
+
+_url_ids = itertools.count()
+
+
+ENRICHED_RESPONSE = {
+    "content_type": ["deal"],
+    "deal_data": {
+        "type": "flight",
+        "price_tier": "budget",
+        "value_score": 8,
+        "booking_deadline": "2099-01-01",
+        "travel_window": {"start": "2099-02-01", "end": "2099-03-01"},
+        "origin": "new york",
+        "destination": "lisbon"
+    },
+    "locations": {"primary": "portugal", "secondary": ["lisbon"]},
+    "audience": ["budget"],
+    "key_themes": ["culture"],
+    "seasonality": ["winter"]
+}
+
+
+class FakeLLM:
+    """Stand-in for OpenAIClient that returns a canned enrichment response"""
+    model = "gpt-4o-mini"
+
+    def __init__(self, response=None):
+        self.response = response if response is not None else json.dumps(ENRICHED_RESPONSE)
+        self.calls = []
+
+    def analyze(self, system_prompt, content, response_format=None, **kwargs):
+        self.calls.append(content)
+        return self.response
+
+    async def analyze_async(self, system_prompt, content, response_format=None, **kwargs):
+        return self.analyze(system_prompt, content, response_format)
+
+
+def store_articles(fetch_db, count, content="Cheap flights to Lisbon from $299 round trip"):
+    """Store fully fetched articles and return their IDs"""
+    ids = []
+    for _ in range(count):
+        i = next(_url_ids)
+        ids.append(fetch_db.store_article({
+            "title": f"Article {i}",
+            "url": f"https://example.com/{i}",
+            "content": content,
+            "published_date": datetime.now(),
+            "source_name": "Test Feed",
+            "source_url": "https://test.com/feed",
+            "is_full_content_fetched": True
+        }))
+    return ids
+
+
+def store_catalog(fetch_db, processed_db):
+    """Deals to Lisbon, guides, news and tips, plus an expired deal and a used-up tip"""
+    enricher = ArticleEnricher(processed_db)
+    future = (datetime.now() + timedelta(days=60)).date().isoformat()
+    specs = [
+        ("deal", "Lisbon", {"value_score": 9, "booking_deadline": future, "destination": "lisbon"}),
+        ("deal", "Lisbon", {"value_score": 7, "booking_deadline": future, "destination": "lisbon"}),
+        ("deal", "Rome", {"value_score": 8, "booking_deadline": future, "destination": "rome"}),
+        ("deal", "Paris", {"value_score": 6, "booking_deadline": future, "destination": "paris"}),
+        ("deal", "Tokyo", {"value_score": 5, "booking_deadline": future, "destination": "tokyo"}),
+        ("deal", "Athens", {"value_score": 10, "booking_deadline": "2000-01-01", "destination": "athens"}),
+        ("guide", "Lisbon", None),
+        ("guide", "Porto", None),
+        ("experience", "Lisbon", None),
+        ("news", "Tokyo", None),
+        ("news", "Paris", None),
+        ("tip", "Worldwide", None),
+        ("tip", "Worldwide", None),
+    ]
+    articles = []
+    for article_id, (content_type, location, deal_data) in zip(store_articles(fetch_db, len(specs)), specs):
+        articles.append(enricher.gazetteer.canonicalize(ProcessedArticle(
+            fetched_article_id=article_id,
+            content_type=[content_type],
+            deal_data={"type": "flight", "price_tier": "budget", **deal_data} if deal_data else None,
+            locations={"primary": location, "secondary": []},
+            audience=[],
+            key_themes=[],
+            seasonality=[],
+            processed_date=datetime.now()
+        )))
+    enricher.save_articles(articles)
+    processed_db.conn.execute("""
+        UPDATE processed_articles SET used_count = 3, last_used = '2000-01-01 00:00:00'
+        WHERE id = (SELECT MAX(id) FROM processed_articles)
+    """)
+    processed_db.conn.commit()
+
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _FileContent:
+    def __init__(self, text):
+        self.text = text
+
+    def iter_lines(self):
+        return iter(self.text.splitlines())
+
+
+class FakeBatchAPI:
+    """
+    Local stand-in for the OpenAI files and batches endpoints
+
+    Batches stay in_progress until complete_all() is called, then answer every
+    request with the canned enrichment response (or a failure for failing_ids).
+    """
+
+    def __init__(self, response=None, failing_ids=()):
+        self.response = response if response is not None else json.dumps(ENRICHED_RESPONSE)
+        self.failing_ids = set(failing_ids)
+        self.uploaded = {}
+        self.batch_jobs = {}
+        self.files = _Obj(create=self._create_file, content=self._file_content)
+        self.batches = _Obj(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self.uploaded) + 1}"
+        self.uploaded[file_id] = file.read().decode()
+        return _Obj(id=file_id)
+
+    def _file_content(self, file_id):
+        return _FileContent(self.uploaded[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self.batch_jobs) + 1}"
+        self.batch_jobs[batch_id] = {"input_file_id": input_file_id, "status": "in_progress", "output_file_id": None}
+        return _Obj(id=batch_id, status="in_progress")
+
+    def _retrieve_batch(self, batch_id):
+        job = self.batch_jobs[batch_id]
+        return _Obj(id=batch_id, status=job["status"], output_file_id=job["output_file_id"], error_file_id=None)
+
+    def complete_all(self):
+        for batch_id, job in self.batch_jobs.items():
+            if job["status"] != "in_progress":
+                continue
+            lines = []
+            for line in self.uploaded[job["input_file_id"]].splitlines():
+                request = json.loads(line)
+                if request["custom_id"] in self.failing_ids:
+                    response = {"status_code": 500, "body": {"error": "server error"}}
+                else:
+                    response = {"status_code": 200, "body": {"choices": [{"message": {"content": self.response}}]}}
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": response, "error": None}))
+            output_file_id = f"file-{len(self.uploaded) + 1}"
+            self.uploaded[output_file_id] = "\n".join(lines)
+            job["status"] = "completed"
+            job["output_file_id"] = output_file_id
+
+
+class FakeChatAPI:
+    """Local stand-in for the OpenAI chat completions endpoint"""
+
+    def __init__(self, response=None):
+        self.response = response if response is not None else json.dumps(ENRICHED_RESPONSE)
+        self.requests = []
+        self.chat = _Obj(completions=_Obj(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.requests.append({"model": model, "messages": messages, **kwargs})
+        message = _Obj(content=self.response)
+        usage = _Obj(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+        return _Obj(choices=[_Obj(message=message)], usage=usage)
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from content.enriching.article_enricher import ArticleEnricher
+from services.openai.rate_limiter import RateLimiter
+from tests.fakes import FakeLLM, store_articles
+
+
+def test_concurrent_processing_saves_all_articles(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 7)
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = FakeLLM()
+
+    processed = enricher.process_pending_articles_concurrent(max_concurrency=3, save_batch_size=2)
+
+    assert processed == 7
+    count = processed_db.conn.execute("SELECT COUNT(*) FROM processed_articles").fetchone()[0]
+    assert count == 7
+    assert enricher.get_unprocessed_articles() == []
+
+
+def test_concurrent_processing_counts_failures(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 3)
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = FakeLLM(response="not json")
+
+    assert enricher.process_pending_articles_concurrent() == 0
+    assert len(enricher.get_unprocessed_articles()) == 3
+
+
+def test_rate_limiter_waits_for_request_budget():
+    limiter = RateLimiter(requests_per_minute=120, tokens_per_minute=100000)
+    # Drain the bucket so the next request must wait for half a second of refill
+    limiter._request_allowance = 0
+
+    async def run():
+        start = time.monotonic()
+        await limiter.acquire(10)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.4
+
+
+def test_rate_limiter_waits_for_token_budget():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=600)
+
+    async def run():
+        await limiter.acquire(600)
+        start = time.monotonic()
+        await limiter.acquire(5)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.4
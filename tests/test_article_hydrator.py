@@ -0,0 +1,81 @@
+from content.selection.article_hydrator import ArticleHydrator
+from content.selection.article_selector import ArticleSelector
+from models.schemas import SelectedArticle
+from tests.fakes import store_catalog
+
+
+def test_hydrator_loads_each_article_once(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    hydrator = ArticleHydrator(processed_db)
+
+    first = hydrator.hydrate([3, 1, 2])
+    second = hydrator.hydrate([2, 4, 999])
+
+    assert [record.id for record in first] == [3, 1, 2]
+    assert [record.id for record in second] == [2, 4]
+    assert second[0] is first[2]
+    assert hydrator.queries == 2
+    assert hydrator.hydrate([1, 4]) and hydrator.queries == 2
+    assert isinstance(first[0], SelectedArticle)
+    assert first[1].deal_data['value_score'] == 9
+    assert first[1].locations['primary'] == "lisbon"
+
+
+def test_sections_hold_hydrated_items_keyed_consistently(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+
+    content = selector.select_newsletter_content()
+
+    items = content['featured_deals'] + content['featured_destination_guides'] + content['travel_news'] \
+        + content['practical_tips']
+    assert [item['id'] for item in items] == content['metadata']['article_ids']
+    assert all(item['title'] and item['content'] for item in items)
+    assert selector.hydrator.queries == 1
+
+
+def test_recorded_usage_refreshes_cached_records(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    hydrator = ArticleHydrator(processed_db)
+    assert hydrator.hydrate([7])[0].used_count == 0
+
+    processed_db.record_usage([7])
+
+    record = hydrator.hydrate([7])[0]
+    assert (record.used_count, hydrator.queries) == (1, 2)
+    assert record.last_used is not None
+
+
+def test_articles_deleted_after_selection_are_left_out(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+    newsletter_content = {
+        'featured_deals': [1, 2], 'travel_news': [10], 'seasonal_experience': 9,
+        'metadata': {'article_ids': [1, 2, 10, 9]}
+    }
+    processed_db.conn.execute("DELETE FROM processed_articles WHERE id IN (2, 9)")
+
+    content = selector.hydrate_content(newsletter_content)
+
+    assert [item['id'] for item in content['featured_deals']] == [1]
+    assert [item['id'] for item in content['travel_news']] == [10]
+    assert 'seasonal_experience' not in content
+    assert content['metadata']['article_ids'] == [1, 10]
+
+
+def test_corrupt_json_columns_fall_back_to_empty_values(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    processed_db.conn.execute(
+        "UPDATE processed_articles SET deal_data = '{\"value_score\": 9', locations = 'lisbon', audience = '[' WHERE id = 1"
+    )
+    processed_db.conn.commit()
+
+    record = ArticleHydrator(processed_db).hydrate([1])[0]
+
+    assert (record.deal_data, record.locations, record.audience) == (None, {}, [])
+    assert record.content_type
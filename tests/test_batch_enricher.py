@@ -0,0 +1,61 @@
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.batch_enricher import BatchEnricher
+from tests.fakes import FakeBatchAPI, store_articles
+
+
+def make_batch_enricher(processed_db, tmp_path, api):
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm.client = api
+    return BatchEnricher(enricher, batch_dir=str(tmp_path))
+
+
+def test_batch_round_trip_across_runs(databases, tmp_path):
+    fetch_db, processed_db = databases
+    article_ids = store_articles(fetch_db, 4)
+    api = FakeBatchAPI()
+
+    first = make_batch_enricher(processed_db, tmp_path, api).run()
+    assert first["submitted"] == 1
+    assert first["processed"] == 0
+
+    # A second run while the job is in progress polls it and submits nothing new
+    second = make_batch_enricher(processed_db, tmp_path, api).run()
+    assert second["open"] == 1
+    assert second["submitted"] == 0
+    assert len(api.batch_jobs) == 1
+
+    api.complete_all()
+    third = make_batch_enricher(processed_db, tmp_path, api).run()
+    assert third["processed"] == 4
+    assert third["submitted"] == 0
+
+    rows = processed_db.conn.execute("SELECT fetched_article_id FROM processed_articles").fetchall()
+    assert sorted(row[0] for row in rows) == sorted(article_ids)
+    assert processed_db.get_open_enrichment_batches() == []
+
+
+def test_batch_file_uses_stable_custom_ids(databases, tmp_path):
+    fetch_db, processed_db = databases
+    article_ids = store_articles(fetch_db, 2)
+    api = FakeBatchAPI()
+
+    make_batch_enricher(processed_db, tmp_path, api).submit_pending()
+
+    batch_file = api.uploaded["file-1"]
+    assert [f'"custom_id": "article-{i}"' in batch_file for i in article_ids] == [True, True]
+
+
+def test_failed_batch_requests_are_resubmitted(databases, tmp_path):
+    fetch_db, processed_db = databases
+    article_ids = store_articles(fetch_db, 3)
+    api = FakeBatchAPI(failing_ids={f"article-{article_ids[0]}"})
+    batch_enricher = make_batch_enricher(processed_db, tmp_path, api)
+
+    batch_enricher.run()
+    api.complete_all()
+    results = batch_enricher.run()
+
+    assert results["processed"] == 2
+    assert results["errors"] == 1
+    assert results["submitted"] == 1
+    assert processed_db.get_open_batch_article_ids() == [article_ids[0]]
@@ -0,0 +1,65 @@
+import json
+import requests
+import yaml
+from benchmarks.fake_openai_server import FakeOpenAIServer, canned_enrichment
+from benchmarks.http_replay import HttpCassette, synthetic_corpus
+from benchmarks.pipeline_benchmark import format_timings, run_pipeline
+from content.fetching.parsers import rss_feed_parser
+from services.openai import retry
+from services.openai.openai_client import OpenAIClient
+
+
+def test_fake_server_answers_through_the_client_and_retries_rate_limits(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    with FakeOpenAIServer(rate_limit_rate=0.5, seed=3) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        client = OpenAIClient(api_key="test-key", max_retries=10)
+
+        single = client.analyze("prompt", "Cheap flights to Lisbon", {"type": "json_object"})
+        packed = client.analyze("prompt", "### ARTICLE 4\nFirst\n\n### ARTICLE 9\nSecond", {"type": "json_object"})
+        newsletter = client.analyze("prompt", "Write the newsletter")
+
+    assert json.loads(single) == canned_enrichment("Cheap flights to Lisbon")
+    assert json.loads(packed)["results"] == [
+        {"article_id": 4, **canned_enrichment("First")}, {"article_id": 9, **canned_enrichment("Second")}
+    ]
+    assert newsletter.startswith("# Introduction")
+    assert server.stats["rate_limited"] > 0
+    assert server.stats["completions"] == 3
+
+
+def test_cassette_replays_recordings_and_never_reaches_the_network(tmp_path):
+    cassette, sources = synthetic_corpus(source_count=1, articles_per_source=4)
+
+    with cassette:
+        entries = rss_feed_parser(sources[0])
+        page = requests.get(entries[0]["url"])
+        missing = requests.get("https://unrecorded.example.com/")
+
+    assert len(entries) == 4
+    assert entries[0]["title"] in page.text
+    assert missing.status_code == 404
+    assert (cassette.hits, cassette.misses) == (2, 1)
+
+    cassette.path = tmp_path / "cassette.json"
+    cassette.save()
+    with HttpCassette(str(cassette.path)):
+        assert requests.get(entries[0]["url"]).content == page.content
+
+
+def test_pipeline_runs_offline_with_stage_timings(tmp_path, monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    cassette, sources = synthetic_corpus(source_count=2, articles_per_source=5)
+    sources_config = tmp_path / "sources.yaml"
+    sources_config.write_text(yaml.safe_dump({"sources": sources}))
+
+    with FakeOpenAIServer(error_rate=0.2, seed=1) as server:
+        timings = run_pipeline(cassette, str(sources_config), server, str(tmp_path / "run"),
+                               env={"OPENAI_BASE_URL": server.base_url, "ENRICH_PRECLASSIFY": "false"})
+
+    assert list(timings) == ["populate", "fetch", "enrich", "sweep", "cluster", "select", "write"]
+    assert (timings["populate"]["items"], timings["fetch"]["items"]) == (10, 10)
+    assert timings["enrich"]["items"] == 10
+    assert timings["write"]["items"] == 1
+    assert cassette.misses == 0
+    assert "enrich" in format_timings([timings])
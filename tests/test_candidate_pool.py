@@ -0,0 +1,53 @@
+from content.selection.article_selector import ArticleSelector
+from tests.fakes import store_catalog
+
+
+def section_ids(content):
+    sections = ['featured_deals', 'featured_destination_guides', 'travel_news', 'practical_tips']
+    return {section: sorted(item['id'] for item in content.get(section, [])) for section in sections}
+
+
+def test_pool_selection_matches_the_sql_selection(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+
+    pooled = selector.select_newsletter_content(pool=selector.load_candidate_pool())
+    queried = selector.select_newsletter_content()
+
+    assert section_ids(pooled) == section_ids(queried)
+    assert sorted(pooled['metadata']['article_ids']) == sorted(queried['metadata']['article_ids'])
+    assert [deal['title'] for deal in pooled['featured_deals']] == [deal['title'] for deal in queried['featured_deals']]
+    assert len(pooled['featured_destination_guides']) == 2
+    assert len(pooled['practical_tips']) == 1
+
+
+def test_pool_selection_queries_only_to_hydrate_the_selection(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+    pool = selector.load_candidate_pool()
+    statements = []
+    processed_db.conn.set_trace_callback(statements.append)
+
+    content = selector.select_newsletter_content(pool=pool)
+
+    processed_db.conn.set_trace_callback(None)
+    assert len(statements) == 1 and "FROM processed_articles p" in statements[0]
+    assert content['featured_deals'][0]['deal_data']['value_score'] == 9
+    assert len(pool) == 12
+
+
+def test_pool_is_reused_across_editions(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+    pool = selector.load_candidate_pool()
+
+    first = selector.select_newsletter_content(pool=pool)
+    pool.mark_used(first['metadata']['article_ids'])
+    second = selector.select_newsletter_content(pool=pool)
+
+    # Deals are never reused and the other content is still cooling down
+    assert not set(first['metadata']['article_ids']) & set(second['metadata']['article_ids'])
+    assert second['featured_deals']
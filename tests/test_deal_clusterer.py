@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.deal_clusterer import DealClusterer
+from content.selection.article_selector import ArticleSelector
+from models.schemas import ProcessedArticle
+from tests.fakes import store_articles
+
+DEADLINE = (datetime.now() + timedelta(days=30)).date().isoformat()
+
+
+def store_deals(fetch_db, processed_db, specs, deal_types=None):
+    """Deals from (origin, destination, price tier, travel window start, end, value score), flights by default"""
+    articles = []
+    deal_types = deal_types or ["flight"] * len(specs)
+    for article_id, (origin, destination, tier, start, end, value), deal_type in zip(
+            store_articles(fetch_db, len(specs)), specs, deal_types):
+        articles.append(ProcessedArticle(
+            fetched_article_id=article_id,
+            content_type=["deal"],
+            deal_data={
+                "type": deal_type, "price_tier": tier, "value_score": value, "booking_deadline": DEADLINE,
+                "travel_window": {"start": start, "end": end}, "origin": origin, "destination": destination
+            },
+            locations={"primary": destination or "worldwide", "secondary": []},
+            audience=[],
+            key_themes=[],
+            seasonality=[],
+            processed_date=datetime.now()
+        ))
+    ArticleEnricher(processed_db).save_articles(articles)
+
+
+def test_same_deal_from_several_sources_keeps_one_representative(databases):
+    fetch_db, processed_db = databases
+    store_deals(fetch_db, processed_db, [
+        ("New York", "Lisbon", "budget", "2026-03-01", "2026-03-10", 7),
+        ("JFK", "Lisboa", "Budget", "2026-03-05", "2026-03-20", 9),
+        ("NYC", "lisbon", "budget", "2026-03-18", "2026-03-25", 6),   # overlaps the previous window
+        ("New York", "Lisbon", "budget", "2026-06-01", "2026-06-10", 8),  # another sale
+        ("New York", "Lisbon", "luxury", "2026-03-01", "2026-03-10", 5),
+        ("Boston", "Lisbon", "budget", "2026-03-01", "2026-03-10", 4),
+    ])
+
+    assert DealClusterer(processed_db).run() == 2
+    content = ArticleSelector(processed_db).select_newsletter_content()
+    assert [deal['deal_data']['value_score'] for deal in content['featured_deals']] == [9, 8, 5]
+    # Re-clustering is idempotent
+    assert DealClusterer(processed_db).run() == 2
+
+
+def test_different_deal_types_and_unknown_destinations_are_not_merged(databases):
+    fetch_db, processed_db = databases
+    store_deals(fetch_db, processed_db, [
+        (None, None, "luxury", None, None, 8),
+        (None, None, "luxury", None, None, 7),
+        (None, "Lisbon", "luxury", None, None, 6),
+        (None, "Lisbon", "luxury", None, None, 5),
+    ], deal_types=["hotel", "hotel", "hotel", "cruise"])
+
+    assert DealClusterer(processed_db).run() == 0
+
+
+def test_representative_prefers_an_already_featured_deal():
+    deals = [
+        {"id": 1, "last_used": None, "deal_data": {"value_score": 9}},
+        {"id": 2, "last_used": "2026-01-01 00:00:00", "deal_data": {"value_score": 6}},
+        {"id": 3, "last_used": None, "deal_data": {"value_score": 9}},
+    ]
+
+    assert DealClusterer.representative(deals)["id"] == 2
+    assert DealClusterer.representative([deals[0], deals[2]])["id"] == 1
@@ -0,0 +1,72 @@
+from datetime import datetime
+from content.enriching.article_enricher import ArticleEnricher
+from content.selection.article_selector import ArticleSelector
+from database.processed_database import ProcessedDatabase
+from models.schemas import ProcessedArticle
+from tests.fakes import store_articles, store_catalog
+
+
+def archived_deadlines(processed_db):
+    return [row[0] for row in processed_db.conn.execute(
+        "SELECT booking_deadline FROM processed_articles WHERE archived_date IS NOT NULL"
+    )]
+
+
+def test_sweep_archives_only_expired_deals(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+
+    assert processed_db.sweep_expired_deals() == 1
+    assert archived_deadlines(processed_db) == ["2000-01-01"]
+    # Already archived deals are not swept again
+    assert processed_db.sweep_expired_deals() == 0
+
+    content = ArticleSelector(processed_db).select_newsletter_content()
+    assert [deal['deal_data']['value_score'] for deal in content['featured_deals']] == [9, 8, 7]
+
+
+def test_deal_queries_range_over_the_live_deadline_index(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    plan = " ".join(row[-1] for row in processed_db.conn.execute("""
+        EXPLAIN QUERY PLAN SELECT id FROM processed_articles
+        WHERE archived_date IS NULL AND booking_deadline > date('now')
+    """))
+
+    assert "idx_processed_articles_live_deadline" in plan
+
+
+def test_existing_databases_get_deadlines_backfilled(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path))
+    processed_db = ProcessedDatabase("main")
+    processed_db.conn.executescript("""
+        DROP INDEX idx_processed_articles_live_deadline;
+        ALTER TABLE processed_articles DROP COLUMN archived_date;
+        ALTER TABLE processed_articles DROP COLUMN booking_deadline;
+        INSERT INTO processed_articles (fetched_article_id, content_type, deal_data, locations, audience, key_themes, seasonality)
+        VALUES (1, '["deal"]', '{"booking_deadline": "2001-02-03"}', '{}', '[]', '[]', '[]'),
+            (2, '["guide"]', '{"booking_deadline": "2001-02-03"}', '{}', '[]', '[]', '[]');
+    """)
+    processed_db.conn.close()
+
+    processed_db = ProcessedDatabase("main")
+
+    assert processed_db.sweep_expired_deals() == 1
+    assert archived_deadlines(processed_db) == ["2001-02-03"]
+
+
+def test_sweep_keeps_other_content_with_a_past_deadline(databases):
+    fetch_db, processed_db = databases
+    enricher = ArticleEnricher(processed_db)
+    # The model falls back to the posting date when a guide has no booking deadline
+    enricher.save_articles([enricher.gazetteer.canonicalize(ProcessedArticle(
+        fetched_article_id=store_articles(fetch_db, 1)[0],
+        content_type=["guide"],
+        deal_data={"type": "hotel", "price_tier": "budget", "booking_deadline": "2024-01-01"},
+        locations={"primary": "Lisbon", "secondary": []},
+        audience=[], key_themes=[], seasonality=[],
+        processed_date=datetime.now()
+    ))])
+
+    assert processed_db.sweep_expired_deals() == 0
+    assert len(processed_db.get_selection_candidates(["guide"])) == 1
@@ -0,0 +1,38 @@
+import numpy as np
+from content.selection.article_selector import ArticleSelector
+from content.selection.diversity import AttributeSimilarity, mmr_top_k
+from content.selection.scoring_engine import ScoringEngine, top_k
+from tests.fakes import store_catalog
+
+
+def deal_destinations(content):
+    return [deal['deal_data']['destination'] for deal in content['featured_deals']]
+
+
+def test_mmr_without_diversity_is_top_k_and_updates_incrementally(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    columns = ArticleSelector(processed_db).load_candidate_pool().columns()
+    scores = ScoringEngine().score(columns, "summer", "autumn")
+    mask = np.ones(len(columns), dtype=bool)
+    similarity = AttributeSimilarity()
+    rows = []
+
+    def counting(columns, position, positions):
+        rows.append(len(positions))
+        return similarity(columns, position, positions)
+
+    assert list(mmr_top_k(scores, mask, 5, columns, similarity, diversity=0)) == list(top_k(scores, mask, 5))
+    mmr_top_k(scores, mask, 5, columns, counting, diversity=0.5)
+    # One similarity row per pick, never a pairwise matrix
+    assert rows == [len(columns)] * 5
+
+
+def test_diverse_selection_spreads_deals_over_countries(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    ranked = ArticleSelector(processed_db, scoring_engine=ScoringEngine())
+    diverse = ArticleSelector(processed_db, scoring_engine=ScoringEngine(), diversity=0.5)
+
+    assert deal_destinations(ranked.select_scored(ranked.load_candidate_pool())) == ["lisbon", "rome", "lisbon"]
+    assert deal_destinations(diverse.select_scored(diverse.load_candidate_pool())) == ["lisbon", "rome", "paris"]
@@ -0,0 +1,116 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from content.enriching.article_enricher import ArticleEnricher
+from content.selection.article_selector import ArticleSelector
+from content.selection.edition_planner import EditionPlanner
+from models.schemas import ProcessedArticle
+from tests.fakes import store_articles, store_catalog
+
+
+def store_deal(fetch_db, processed_db, destination, value_score, days_left):
+    article_id = store_articles(fetch_db, 1)[0]
+    deadline = (datetime.now() + timedelta(days=days_left)).date().isoformat()
+    enricher = ArticleEnricher(processed_db)
+    enricher.save_articles([enricher.gazetteer.canonicalize(ProcessedArticle(
+        fetched_article_id=article_id,
+        content_type=["deal"],
+        deal_data={"value_score": value_score, "booking_deadline": deadline, "destination": destination},
+        locations={"primary": destination, "secondary": []},
+        audience=[],
+        key_themes=[],
+        seasonality=[],
+        processed_date=datetime.now() - timedelta(seconds=5)
+    ))])
+    return processed_db.conn.execute(
+        "SELECT id FROM processed_articles WHERE fetched_article_id = ?", (article_id,)
+    ).fetchone()[0]
+
+
+def planned(editions, section):
+    return [processed_id for edition in editions for processed_id in edition['sections'][section]]
+
+
+def test_plan_spreads_content_and_respects_deadlines(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    expiring = store_deal(fetch_db, processed_db, "madrid", 4, days_left=3)
+    planner = EditionPlanner(ArticleSelector(processed_db), editions=3, interval_days=2.5)
+
+    editions = planner.plan()
+
+    deals = planned(editions, 'featured_deals')
+    assert len(deals) == len(set(deals)) == 6
+    assert [len(edition['sections']['featured_deals']) for edition in editions] == [2, 2, 2]
+    assert expiring in deals[:4]
+    assert sorted(len(edition['sections']['travel_news']) for edition in editions) == [0, 1, 1]
+    assert len(planned(editions, 'practical_tips')) == 1
+    leads = [edition['sections']['featured_deals'][0] for edition in editions]
+    destinations = [processed_db.conn.execute(
+        "SELECT json_extract(deal_data, '$.destination') FROM processed_articles WHERE id = ?", (lead,)
+    ).fetchone()[0] for lead in leads]
+    assert all(a != b for a, b in zip(destinations, destinations[1:]))
+    assert planner.load()[0] == editions
+
+
+def test_refresh_only_replans_for_new_articles(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    planner = EditionPlanner(ArticleSelector(processed_db), editions=1)
+    editions = planner.plan()
+    before = planned(editions, 'featured_deals')
+
+    assert planner.refresh() == editions
+
+    processed_db.conn.execute("UPDATE edition_plan SET planned_at = '2000-01-01 00:00:00'")
+    processed_db.conn.execute("UPDATE processed_articles SET processed_date = '1999-01-01 00:00:00'")
+    processed_db.conn.commit()
+    best = store_deal(fetch_db, processed_db, "kyoto", 10, days_left=30)
+    after = planned(planner.refresh(), 'featured_deals')
+
+    assert best in after
+    # The new deal takes the place of the weakest planned one, the others stay
+    assert len(after) == len(before) == 3
+    assert len(set(before) - set(after)) == 1
+
+
+@pytest.fixture
+def pacific_time(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Los_Angeles")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_refresh_sees_articles_processed_after_planning_west_of_utc(databases, pacific_time):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    planner = EditionPlanner(ArticleSelector(processed_db), editions=1)
+    planner.plan()
+    processed_db.conn.execute("UPDATE edition_plan SET planned_at = datetime('now', '-1 minute')")
+    processed_db.conn.commit()
+
+    best = store_deal(fetch_db, processed_db, "kyoto", 10, days_left=30)
+
+    assert best in planned(planner.refresh(), 'featured_deals')
+
+
+def test_next_edition_is_hydrated_and_consumed(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    planner = EditionPlanner(ArticleSelector(processed_db), editions=3)
+    first_date = planner.plan()[0]['edition_date']
+
+    content, edition_date = planner.next_edition()
+
+    assert content['featured_deals'][0]['title']
+    assert content['metadata']['edition_date'] == first_date.isoformat()
+    assert content['metadata']['article_ids'][0] == content['featured_deals'][0]['id']
+    # Until it has been sent, the edition stays planned and is taken again
+    assert planner.next_edition()[0]['metadata']['edition_date'] == first_date.isoformat()
+
+    processed_db.delete_planned_edition(edition_date)
+    editions, _ = planner.load()
+    assert len(editions) == 2 and editions[0]['edition_date'] > first_date
+    assert len(planner.refresh()) == 3
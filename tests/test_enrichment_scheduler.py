@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from content.enriching import article_enricher
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.enrichment_scheduler import EnrichmentScheduler, find_deadline
+from services.openai.rate_limiter import RateLimiter
+from tests.fakes import FakeLLM, store_articles
+
+GUIDE = "A relaxed walking guide to the old town and its museums"
+
+
+def test_find_deadline_reads_deadline_wording():
+    today = date(2025, 3, 1)
+
+    assert find_deadline("Fares from $199, book by March 5", today) == date(2025, 3, 5)
+    assert find_deadline("Sale ends 2025-03-10, valid until 3/20", today) == date(2025, 3, 10)
+    # A month long gone refers to next year
+    assert find_deadline("Offer expires Jan 3", date(2025, 6, 1)) == date(2026, 1, 3)
+    assert find_deadline("Flights in March 5 times a week", today) is None
+
+
+def test_urgent_deals_are_enriched_before_evergreen_guides(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 2, content=GUIDE)
+    fetch_db.store_article({
+        "title": "Flash sale to Lisbon",
+        "url": "https://example.com/flash-sale",
+        "content": f"Round trips from $249, book by {(date.today() + timedelta(days=2)):%Y-%m-%d}",
+        "published_date": datetime.now() - timedelta(days=3),
+        "source_name": "Deals Inbox",
+        "source_url": "deals@example.com",
+        "is_full_content_fetched": True
+    })
+    enricher = ArticleEnricher(processed_db, scheduler=EnrichmentScheduler({"Test Feed": "travel_tips"}))
+    enricher.llm = FakeLLM()
+
+    assert enricher.process_pending_articles() == 3
+    assert "book by" in enricher.llm.calls[0]
+    assert all(GUIDE in call for call in enricher.llm.calls[1:])
+
+
+def test_time_budget_defers_unstarted_articles(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 3)
+    enricher = ArticleEnricher(processed_db, scheduler=EnrichmentScheduler())
+    enricher.llm = FakeLLM()
+
+    assert enricher.process_pending_articles_concurrent(time_budget=0) == 0
+    assert enricher.process_pending_articles(time_budget=0) == 0
+    assert len(enricher.get_unprocessed_articles()) == 3
+    assert enricher.process_pending_articles_concurrent() == 3
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowLLM(FakeLLM):
+    """Answers after its request has taken 0.1s on the given clock"""
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    async def analyze_async(self, system_prompt, content, response_format=None, **kwargs):
+        await asyncio.sleep(0)
+        self.clock.now += 0.1
+        return self.analyze(system_prompt, content, response_format)
+
+
+def test_time_budget_defers_articles_queued_behind_slow_requests(databases, monkeypatch):
+    acquired = []
+
+    class CountingLimiter(RateLimiter):
+        async def acquire(self, tokens=0):
+            acquired.append(tokens)
+            await super().acquire(tokens)
+
+    monkeypatch.setattr(article_enricher, "RateLimiter", CountingLimiter)
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 10)
+    enricher = ArticleEnricher(processed_db)
+    enricher.clock = FakeClock()
+    enricher.llm = SlowLLM(enricher.clock)
+
+    processed = enricher.process_pending_articles_concurrent(max_concurrency=1, time_budget=0.25)
+
+    # Requests start at 0, 0.1 and 0.2s; the rest find the budget spent once the semaphore frees up
+    assert processed == 3
+    assert len(enricher.llm.calls) == 3
+    assert len(enricher.get_unprocessed_articles()) == 7
+    # Deferred articles never take rate limiter tokens
+    assert len(acquired) == 3
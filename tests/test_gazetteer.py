@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.gazetteer import load_gazetteer, normalize_key
+from content.selection.article_selector import ArticleSelector
+from models.schemas import ProcessedArticle
+from tests.fakes import ENRICHED_RESPONSE, FakeLLM, store_articles
+
+GUIDE_RESPONSE = {
+    **ENRICHED_RESPONSE,
+    "content_type": ["guide"],
+    "deal_data": None,
+    "locations": {"primary": "Lisboa, Portugal", "secondary": ["Sintra"]}
+}
+
+
+def test_aliases_resolve_to_canonical_places():
+    gazetteer = load_gazetteer()
+
+    assert normalize_key("São  Paulo!") == "saopaulo"
+    for name in ["uk", "UnitedKingdom", "England", "Great Britain"]:
+        assert gazetteer.lookup(name).id == "gb"
+    london = gazetteer.lookup("London (LHR)")
+    assert (london.id, london.country) == ("gb:london", "gb")
+    assert gazetteer.lookup("new york, ny").name == "new york"
+    assert gazetteer.lookup("the beaches of Bali").id == "id:bali"
+    assert gazetteer.lookup("Koh Lanta") is None
+    assert gazetteer.canonical_name("  Koh   Lanta ") == "koh lanta"
+
+
+def test_canonicalize_article_locations():
+    article = ProcessedArticle(
+        fetched_article_id=1,
+        content_type=["deal"],
+        deal_data={"origin": "NYC", "destination": ["Lisboa", "Porto"]},
+        locations={"primary": "Portugal", "secondary": ["Lisboa", "lisbon", "portugal"]},
+        audience=[],
+        key_themes=[],
+        seasonality=[],
+        processed_date=datetime.now()
+    )
+
+    load_gazetteer().canonicalize(article)
+
+    assert article.locations.primary == "portugal"
+    assert article.locations.secondary == ["lisbon"]
+    assert article.deal_data.origin == "new york"
+    assert article.deal_data.destination == ["lisbon", "porto"]
+
+
+def test_enriched_locations_are_indexed_and_matched_exactly(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 1)
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = FakeLLM(response=json.dumps(GUIDE_RESPONSE))
+    assert enricher.process_pending_articles() == 1
+
+    rows = processed_db.conn.execute(
+        "SELECT location_id, country_id, role FROM article_locations ORDER BY role"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [("pt:lisbon", "pt", "primary"), ("sintra", None, "secondary")]
+
+    selector = ArticleSelector(processed_db)
+    # Country queries also match articles about the country's cities
+    assert len(selector.find_location_matching_guides("Portugal")) == 1
+    assert len(selector.find_location_matching_guides("lisboa")) == 1
+    assert len(selector.find_location_matching_guides("sintra")) == 1
+    assert selector.find_location_matching_guides("spain") == []
+
+
+def test_index_locations_backfills_existing_articles(databases):
+    fetch_db, processed_db = databases
+    article_id = store_articles(fetch_db, 1)[0]
+    processed_db.save_article(ProcessedArticle(
+        fetched_article_id=article_id,
+        content_type=["guide"],
+        locations={"primary": "Japan", "secondary": ["Kyoto"]},
+        audience=[],
+        key_themes=[],
+        seasonality=[],
+        processed_date=datetime.now()
+    ))
+    enricher = ArticleEnricher(processed_db)
+
+    assert enricher.index_locations() == 1
+    assert enricher.index_locations() == 0
+    location_ids = {row[0] for row in processed_db.conn.execute("SELECT location_id FROM article_locations")}
+    assert location_ids == {"jp", "jp:kyoto"}
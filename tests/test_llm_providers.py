@@ -0,0 +1,86 @@
+import json
+import pytest
+from benchmarks.fake_openai_server import FakeOpenAIServer, canned_enrichment
+from benchmarks.llm_backend_benchmark import agreement, format_comparison, run_backend, synthetic_articles
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.structured_output import enrichment_response_format
+from services.llamacpp import llamacpp_provider
+from services.llamacpp.llamacpp_provider import response_schema
+from services.openai.chat_provider import ChatProvider
+from services.openai.errors import LLMRequestError
+from services.openai.openai_client import OpenAIClient
+from services.openai.telemetry import LLMTelemetry
+from tests.fakes import store_articles
+
+
+class CannedProvider(ChatProvider):
+    """In-process backend answering with the fake server's deterministic enrichments"""
+    model_name = "local/canned"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def complete(self, messages, response_format=None):
+        self.calls.append(response_format)
+        content = json.dumps(canned_enrichment(messages[-1]["content"]))
+        return {
+            "id": "local-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": self.model_name,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        }
+
+
+def test_provider_replaces_the_api_without_a_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    telemetry = LLMTelemetry(":memory:", run_id="run-1")
+    client = OpenAIClient(provider=CannedProvider(), telemetry=telemetry)
+
+    response = client.analyze("prompt", "Cheap flights to Lisbon", {"type": "json_object"})
+
+    assert json.loads(response) == canned_enrichment("Cheap flights to Lisbon")
+    assert telemetry.run_totals() == {"calls": 1, "cache_hits": 0, "tokens": 15, "cost_usd": 0}
+    assert telemetry.conn.execute("SELECT model FROM llm_calls").fetchone()[0] == "local/canned"
+    with pytest.raises(LLMRequestError):
+        client.submit_batch("batch.jsonl")
+
+
+def test_concurrent_enrichment_runs_on_the_provider(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 4)
+    provider = CannedProvider()
+    enricher = ArticleEnricher(processed_db, llm_provider=provider)
+
+    assert enricher.process_pending_articles_concurrent(max_concurrency=4) == 4
+    # Every enrichment asked for the structured output schema
+    assert provider.calls == [enricher.response_format] * 4
+
+
+def test_response_schema_of_openai_formats():
+    schema = response_schema(enrichment_response_format())
+
+    assert schema["properties"]["locations"]
+    assert response_schema({"type": "json_object"}) is None
+    assert response_schema(None) is None
+
+
+@pytest.mark.skipif(llamacpp_provider.Llama is not None, reason="llama-cpp-python is installed")
+def test_local_backend_needs_llama_cpp():
+    with pytest.raises(ImportError):
+        llamacpp_provider.LlamaCppProvider("model.gguf")
+
+
+def test_benchmark_compares_backends(monkeypatch):
+    articles = synthetic_articles(6)
+    with FakeOpenAIServer() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        remote = run_backend(articles)
+    local = run_backend(articles, provider=CannedProvider())
+
+    assert (len(remote["results"]), len(local["results"])) == (6, 6)
+    assert agreement(remote, local) == {"compared": 6, "content_type": 1.0, "primary_location": 1.0}
+    assert "local/canned" in format_comparison([remote, local], agreement(remote, local))
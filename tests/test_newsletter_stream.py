@@ -0,0 +1,126 @@
+import time
+import pytest
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from content.writing.newsletter_writer import NewsletterWriter
+from content.writing.section_stream import SECTION_ORDER, SectionStreamParser
+from services.openai.errors import LLMBadOutputError
+
+
+def test_sections_are_emitted_as_soon_as_the_next_heading_arrives():
+    emitted = []
+    parser = SectionStreamParser(lambda section, body: emitted.append((section, body)), required=["introduction"])
+
+    for piece in ["Sure!\n# Intro", "duction\nWelcome ", "aboard.\n\n# Featured", " Deals\n## Lisbon\n"]:
+        parser.feed(piece)
+    assert emitted == [("introduction", "Welcome aboard.")]
+
+    parser.feed("From $299.")
+    sections = parser.close()
+    assert emitted[-1] == ("featured_deals", "## Lisbon\nFrom $299.")
+    assert list(sections) == ["introduction", "featured_deals"]
+
+
+def test_malformed_output_stops_the_stream_early():
+    consumed = []
+
+    def completion():
+        for line in ["# Introduction\n", "Hello\n", "# Travel News\n"] + ["More news\n"] * 100:
+            consumed.append(line)
+            yield line
+
+    parser = SectionStreamParser(lambda section, body: None, required=["introduction", "featured_deals"])
+    with pytest.raises(LLMBadOutputError, match="featured_deals"):
+        for piece in completion():
+            parser.feed(piece)
+    assert len(consumed) == 3
+
+    parser = SectionStreamParser(lambda section, body: None, required=["introduction"])
+    with pytest.raises(LLMBadOutputError, match="empty"):
+        parser.feed("# Introduction\n\n# Conclusion\n")
+
+    parser = SectionStreamParser(lambda section, body: None)
+    with pytest.raises(LLMBadOutputError, match="out of order"):
+        parser.feed("# Conclusion\nBye\n# Introduction\n")
+
+
+def test_streamed_newsletter_matches_the_parsed_completion(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TEST_JSON_DIR", str(tmp_path))
+    with FakeOpenAIServer(latency=0.4) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        arrivals = []
+        started = time.perf_counter()
+        streamed = NewsletterWriter(None, stream=True).generate_newsletter(
+            {}, mode="test", on_section=lambda section, data: arrivals.append((section, time.perf_counter()))
+        )
+        finished = time.perf_counter()
+        whole = NewsletterWriter(None).generate_newsletter({}, mode="test")
+
+    assert streamed == whole
+    assert streamed["featured_deals"][0]["title"] == "Cheap flights to Lisbon"
+    assert [section for section, _ in arrivals] == [
+        "introduction", "featured_deals", "destination_guides", "travel_news", "travel_tips", "conclusion"
+    ]
+    # The introduction is usable well before the completion has ended
+    assert arrivals[0][1] - started < (finished - started) / 2
+
+
+def test_headings_match_loosely_and_only_selected_sections_are_required():
+    emitted = []
+    parser = SectionStreamParser(lambda section, body: emitted.append(section),
+                                 required=NewsletterWriter._required_sections({"featured_deals": [{"id": 1}]}))
+
+    parser.feed("# 1. **INTRODUCTION**\nHello\n# Featured deals ✈️\n## Lisbon\nFrom $299\n## Not a section\n")
+    parser.feed("#Travel Tips:\nPack light\n# Conclusion\nBye")
+    parser.close()
+
+    assert emitted == ["introduction", "featured_deals", "travel_tips", "conclusion"]
+
+
+class BrokenStreamLLM:
+    """Streams a newsletter that repeats a section; answers in full when asked without streaming"""
+    def __init__(self, whole="# Introduction\nHello\n# Featured Deals\n## Lisbon\nFrom $299\n# Conclusion\nBye\n"):
+        self.calls = []
+        self.whole = whole
+
+    def analyze_stream(self, system_prompt, content, caller="analyze", article_ids=None):
+        self.calls.append("stream")
+        yield from ["# Introduction\nHello\n", "# Introduction\nHello again\n", "# Conclusion\nBye\n"]
+
+    def analyze(self, system_prompt, content, response_format=None, caller="analyze", article_ids=None):
+        self.calls.append("whole")
+        return self.whole
+
+
+def test_abandoned_stream_falls_back_to_the_whole_completion(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TEST_JSON_DIR", str(tmp_path))
+    writer = NewsletterWriter(None, stream=True)
+    writer.llm = BrokenStreamLLM()
+    emitted = []
+
+    newsletter = writer.generate_newsletter({}, mode="test", on_section=lambda section, data: emitted.append(section))
+
+    assert writer.llm.calls == ["stream", "whole"]
+    assert newsletter["featured_deals"][0]["title"] == "Lisbon"
+    # The fallback's sections replace the one streamed before the abort
+    assert emitted == ["introduction"] + [section for section in SECTION_ORDER if section in newsletter]
+
+
+def test_fallback_splits_loose_headings_like_the_stream(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TEST_JSON_DIR", str(tmp_path))
+    writer = NewsletterWriter(None, stream=True)
+    writer.llm = BrokenStreamLLM(
+        "Here you go!\n# 1. **INTRODUCTION**\nHello\n# Featured deals ✈️\n## Lisbon\nFrom $299\n"
+        "# Introduction\nHello again\n#Conclusion:\nBye\n"
+    )
+
+    newsletter = writer.generate_newsletter({}, mode="test")
+
+    assert writer.llm.calls == ["stream", "whole"]
+    assert newsletter["featured_deals"][0]["title"] == "Lisbon"
+    # A repeated section keeps its first copy instead of failing the fallback
+    assert "Hello again" not in newsletter["introduction"]["content"]
+    assert "Hello" in newsletter["introduction"]["content"]
+    assert "Bye" in newsletter["conclusion"]["content"]
@@ -0,0 +1,83 @@
+import json
+import re
+from content.enriching.article_enricher import ArticleEnricher
+from tests.fakes import ENRICHED_RESPONSE, FakeLLM, store_articles
+
+
+class PackingLLM(FakeLLM):
+    """Answers packed requests with a keyed result per article, leaving out the IDs in drop_ids"""
+
+    def __init__(self, drop_ids=()):
+        super().__init__()
+        self.drop_ids = set(drop_ids)
+        self.packed_calls = 0
+
+    def analyze(self, system_prompt, content, response_format=None, **kwargs):
+        ids = re.findall(r"^### ARTICLE (\d+)$", content, re.MULTILINE)
+        if not ids:
+            return super().analyze(system_prompt, content, response_format)
+        self.packed_calls += 1
+        self.calls.append(content)
+        return json.dumps({"results": {i: ENRICHED_RESPONSE for i in ids if int(i) not in self.drop_ids}})
+
+
+def make_enricher(processed_db, llm, **kwargs):
+    enricher = ArticleEnricher(processed_db, **kwargs)
+    enricher.llm = llm
+    return enricher
+
+
+def test_short_articles_are_packed_under_budget(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 10)
+    long_id = store_articles(fetch_db, 1, content="Long guide sentence about Lisbon. " * 400)[0]
+    enricher = make_enricher(processed_db, PackingLLM(), max_pack_size=4)
+
+    packs, singles = enricher.pack_articles(enricher.get_unprocessed_articles())
+
+    assert [len(pack) for pack in packs] == [4, 4, 2]
+    assert [article['id'] for article in singles] == [long_id]
+
+
+def test_packed_mode_reduces_requests(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 8)
+    llm = PackingLLM()
+    enricher = make_enricher(processed_db, llm)
+
+    assert enricher.process_pending_articles(packed=True) == 8
+    assert len(llm.calls) == 1
+    assert llm.packed_calls == 1
+
+
+def test_failed_pack_elements_fall_back_to_single_requests(databases):
+    fetch_db, processed_db = databases
+    article_ids = store_articles(fetch_db, 5)
+    llm = PackingLLM(drop_ids={article_ids[2]})
+    enricher = make_enricher(processed_db, llm)
+
+    assert enricher.process_pending_articles_concurrent(packed=True) == 5
+    assert llm.packed_calls == 1
+    # One packed request plus one single retry for the dropped element
+    assert len(llm.calls) == 2
+    assert "### ARTICLE" not in llm.calls[1]
+
+
+def test_packed_enrichments_carry_the_packed_prompt_version(databases):
+    fetch_db, processed_db = databases
+    article_ids = store_articles(fetch_db, 3)
+    enricher = make_enricher(processed_db, PackingLLM(drop_ids={article_ids[0]}))
+
+    assert enricher.process_pending_articles(packed=True) == 3
+
+    versions = dict(processed_db.conn.execute("SELECT fetched_article_id, prompt_version FROM processed_articles"))
+    single, packed = enricher.prompt_version_for("full"), enricher.prompt_version_for("full", packed=True)
+    assert single != packed
+    # The dropped element fell back to a single request
+    assert versions == {article_ids[0]: single, article_ids[1]: packed, article_ids[2]: packed}
+    assert {single, packed} <= set(enricher.current_prompt_versions())
+
+    # Changing only the packing instructions outdates only packed enrichments
+    enricher.packed_prompt += "\nNew packing rule."
+    assert enricher.prompt_version_for("full") == single
+    assert packed not in enricher.current_prompt_versions()
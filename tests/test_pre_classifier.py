@@ -0,0 +1,99 @@
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.pre_classifier import PreClassifier
+from tests.fakes import FakeLLM, store_articles
+
+DEAL = (
+    "Flash sale: round-trip flights from Chicago to Rome from $489. Book by March 3 for travel "
+    "through May. This fare is a great deal on a nonstop airline route to Italy for your next trip. "
+) * 3
+GUIDE = (
+    "Our guide to the best things to do in Kyoto: where to stay, where to eat and a three day "
+    "itinerary covering temples, gardens and the neighborhood around Gion for your trip to Japan. "
+) * 3
+JUNK = "Confirm your subscription to our newsletter. Click the link below to verify your email. " * 6
+
+
+def trained_classifier():
+    classifier = PreClassifier(min_training_examples=10)
+    examples = [("Deal", DEAL, "deal")] * 10 + [("Guide", GUIDE, "guide")] * 10
+    assert classifier.train(examples)
+    return classifier
+
+
+def test_untrained_classifier_sends_relevant_articles_to_full_extraction():
+    classifier = PreClassifier()
+    assert not classifier.train([("Deal", DEAL, "deal")])
+
+    assert classifier.route({"title": "Guide", "content": GUIDE})["route"] == "full"
+    assert classifier.route({"title": "Junk", "content": JUNK})["route"] == "skip"
+
+
+def test_trained_classifier_routes_by_predicted_type():
+    classifier = trained_classifier()
+
+    deal = classifier.route({"title": "Rome fares", "content": DEAL})
+    guide = classifier.route({"title": "Kyoto", "content": GUIDE})
+
+    assert (deal["route"], deal["content_type"]) == ("full", "deal")
+    assert (guide["route"], guide["content_type"]) == ("light", "guide")
+
+
+def test_skipped_and_light_articles_save_llm_work(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 1, content=DEAL)
+    store_articles(fetch_db, 1, content=GUIDE)
+    junk_id = store_articles(fetch_db, 1, content=JUNK)[0]
+    llm = FakeLLM()
+    enricher = ArticleEnricher(processed_db, pre_classifier=trained_classifier())
+    enricher.llm = llm
+
+    assert enricher.process_pending_articles() == 2
+
+    # Junk never reaches the LLM and isn't picked up again
+    assert len(llm.calls) == 2
+    row = processed_db.conn.execute(
+        "SELECT content_type FROM processed_articles WHERE fetched_article_id = ?", (junk_id,)
+    ).fetchone()
+    assert row["content_type"] == '["irrelevant"]'
+    assert enricher.get_unprocessed_articles() == []
+
+
+EMAIL_DEAL = """Hi there,
+
+This week's best fare: round-trip flights from Boston to Dublin on a nonstop Aer Lingus route from $398.
+Hotel add-ons start at $89 a night, and the sale runs through Sunday for travel in October and November.
+Book by March 12 before the fares go back up.
+
+Happy travels,
+The Going Places team
+
+You are receiving this email because you signed up at goingplaces.example.com.
+Unsubscribe from this list | Update your preferences | View in browser
+123 Main Street, Boston, MA 02110
+"""
+BLURB = "Round-trip flights from NYC to Lisbon from $299... Book by March 5."
+
+
+def test_real_email_deals_and_short_blurbs_are_not_junk():
+    classifier = PreClassifier()
+
+    for content in (EMAIL_DEAL, BLURB):
+        decision = classifier.route({"title": "Deal alert", "content": content})
+        assert decision["route"] == "full"
+        assert decision["relevance"] > 0
+    # Junk still is, when the top of the email says so
+    notice = "Confirm your subscription\n\n" + EMAIL_DEAL
+    assert classifier.route({"title": "Welcome", "content": notice})["route"] == "skip"
+
+
+def test_skips_are_triaged_again_when_the_rules_change(databases):
+    fetch_db, processed_db = databases
+    junk_id = store_articles(fetch_db, 1, content=JUNK)[0]
+    enricher = ArticleEnricher(processed_db, pre_classifier=PreClassifier())
+    enricher.llm = FakeLLM()
+    enricher.process_pending_articles()
+    assert enricher.get_unprocessed_articles() == []
+
+    enricher.pre_classifier = PreClassifier(min_words=5)
+
+    assert [article['id'] for article in enricher.get_unprocessed_articles()] == [junk_id]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.reenrichment_planner import ReenrichmentPlanner
+from content.enriching.structured_output import prompt_version
+from models.schemas import ProcessedArticle
+from tests.fakes import FakeChatAPI, store_articles
+
+
+def _enriched(article_id, content_type, deadline=None):
+    deal_data = None
+    if deadline:
+        deal_data = {
+            "type": "flight", "price_tier": "budget", "value_score": 8, "booking_deadline": deadline,
+            "travel_window": {"start": "2099-02-01", "end": "2099-03-01"}, "origin": "nyc", "destination": "lisbon"
+        }
+    return ProcessedArticle(
+        fetched_article_id=article_id,
+        content_type=[content_type],
+        deal_data=deal_data,
+        locations={"primary": "portugal", "secondary": []},
+        audience=[],
+        key_themes=[],
+        seasonality=[],
+        processed_date=datetime.now()
+    )
+
+
+def test_prompt_change_reenriches_in_place(databases):
+    fetch_db, processed_db = databases
+    article_id = store_articles(fetch_db, 1)[0]
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm.client = FakeChatAPI()
+    enricher.process_pending_articles()
+    processed_db.conn.execute("UPDATE processed_articles SET used_count = 2")
+    before = dict(processed_db.conn.execute("SELECT * FROM processed_articles").fetchone())
+
+    assert before["prompt_version"] == enricher.prompt_version_for("full")
+    assert ReenrichmentPlanner(enricher).plan() == []
+
+    # Reindenting the prompt keeps the version, changing its rules doesn't
+    enricher.system_prompt = "    " + enricher.system_prompt.replace("\n", "\n  ")
+    assert enricher.prompt_version_for("full") == before["prompt_version"]
+    enricher.system_prompt += "\nNew value score rule."
+    assert ReenrichmentPlanner(enricher).run() == {"planned": 1, "reenriched": 1, "calls": 1}
+
+    after = dict(processed_db.conn.execute("SELECT * FROM processed_articles").fetchone())
+    assert after["prompt_version"] == enricher.prompt_version_for("full") != before["prompt_version"]
+    assert (after["id"], after["fetched_article_id"], after["used_count"]) == (before["id"], article_id, 2)
+    assert ReenrichmentPlanner(enricher).plan() == []
+
+
+def test_planner_prefers_selectable_articles_within_the_call_budget(databases):
+    fetch_db, processed_db = databases
+    expired_deal, live_deal, used_guide, guide, old_news, news = store_articles(fetch_db, 6)
+    fetch_db.conn.execute(
+        "UPDATE articles SET published_date = ? WHERE id = ?",
+        ((datetime.now() - timedelta(days=90)).isoformat(), old_news)
+    )
+    fetch_db.conn.commit()
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm.client = FakeChatAPI()
+    enricher.save_articles([
+        _enriched(expired_deal, "deal", "2000-01-01"),
+        _enriched(live_deal, "deal", "2099-01-01"),
+        _enriched(used_guide, "guide"),
+        _enriched(guide, "guide"),
+        _enriched(old_news, "news"),
+        _enriched(news, "news"),
+    ])
+    processed_db.conn.execute("UPDATE processed_articles SET used_count = 5 WHERE fetched_article_id = ?", (used_guide,))
+
+    planned = ReenrichmentPlanner(enricher, call_budget=10, packed=False).plan()
+    assert [article["id"] for article in planned] == [live_deal, guide, news]
+
+    result = ReenrichmentPlanner(enricher, call_budget=1, packed=False).run()
+    assert result == {"planned": 1, "reenriched": 1, "calls": 1}
+    assert len(enricher.llm.client.requests) == 1
+    versions = dict(processed_db.conn.execute("SELECT fetched_article_id, prompt_version FROM processed_articles"))
+    assert versions[live_deal] == enricher.prompt_version_for("full")
+    assert versions[guide] is None
+
+
+def test_prompt_version_ignores_whitespace_but_not_schema():
+    response_format = {"type": "json_object"}
+
+    assert prompt_version("Analyze  the\n   article", response_format) == prompt_version("Analyze the article", response_format)
+    assert prompt_version("Analyze the article", response_format) != prompt_version("Analyze the article", {})
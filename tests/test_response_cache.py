@@ -0,0 +1,83 @@
+import json
+import pytest
+from content.enriching.article_enricher import ArticleEnricher
+from services.openai.errors import LLMBadOutputError
+from services.openai.openai_client import OpenAIClient
+from services.openai.response_cache import ResponseCache
+from tests.fakes import ENRICHED_RESPONSE, FakeChatAPI
+
+
+def test_key_depends_on_prompt_model_and_content():
+    key = ResponseCache.make_key("gpt-4o-mini", "prompt", "content")
+    assert key == ResponseCache.make_key("gpt-4o-mini", "prompt", "content")
+    assert key != ResponseCache.make_key("gpt-4o", "prompt", "content")
+    assert key != ResponseCache.make_key("gpt-4o-mini", "prompt2", "content")
+    assert key != ResponseCache.make_key("gpt-4o-mini", "prompt", "content2")
+    assert ResponseCache.make_key("m", "ab", "c") != ResponseCache.make_key("m", "a", "bc")
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.put("a", "model", "response a")
+    cache.put("b", "model", "response b")
+    # Touch "a" so "b" becomes the least recently used entry
+    assert cache.get("a") == "response a"
+    cache.put("c", "model", "response c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "response a"
+    assert cache.get("c") == "response c"
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_size_bound_evicts_entries():
+    cache = ResponseCache(":memory:", max_size_bytes=25)
+    cache.put("a", "model", "x" * 10)
+    cache.put("b", "model", "y" * 10)
+    cache.put("c", "model", "z" * 10)
+
+    assert cache.stats()["size_bytes"] <= 25
+    assert cache.get("a") is None
+
+
+def test_client_returns_cached_response_without_api_call():
+    api = FakeChatAPI(response='{"ok": true}')
+    client = OpenAIClient(api_key="test-key", cache=ResponseCache(":memory:"))
+    client.client = api
+
+    assert client.analyze("prompt", "content") == '{"ok": true}'
+    assert client.analyze("prompt", "content") == '{"ok": true}'
+    assert len(api.requests) == 1
+
+    client.analyze("prompt", "other content")
+    assert len(api.requests) == 2
+
+
+def test_responses_failing_validation_are_not_cached_or_replayed(databases):
+    _, processed_db = databases
+    cache = ResponseCache(":memory:")
+    api = FakeChatAPI(response="I could not analyze this article")
+    client = OpenAIClient(api_key="test-key", cache=cache, max_retries=0)
+    client.client = api
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = client
+
+    for _ in range(2):
+        with pytest.raises(LLMBadOutputError):
+            enricher.enrich_article(1, "content")
+    assert cache.stats()["entries"] == 0
+
+    # A bad answer cached before validation existed is dropped instead of replayed
+    prepared = enricher.prepare_content("content")
+    key = client._cache_key(enricher.system_prompt, prepared['text'], enricher.response_format)
+    cache.put(key, client.model, "not json")
+    api.response = json.dumps(ENRICHED_RESPONSE)
+    requests = len(api.requests)
+
+    assert enricher.enrich_article(1, "content").locations.primary == "portugal"
+    assert len(api.requests) == requests + 1
+    assert cache.get(key) == api.response
@@ -0,0 +1,101 @@
+import openai
+import pytest
+from content.enriching.article_enricher import ArticleEnricher
+from services.openai import retry
+from services.openai.errors import LLMBadOutputError, LLMRateLimitError, LLMRequestError
+from services.openai.openai_client import OpenAIClient
+from services.openai.retry import backoff_delay, call_with_retry
+from tests.fakes import FakeLLM, _Obj, store_articles
+
+
+class RateLimitedLLM(FakeLLM):
+    """Fake client whose quota is always exhausted"""
+
+    def analyze(self, system_prompt, content, response_format=None, **kwargs):
+        self.calls.append(content)
+        raise LLMRateLimitError("Rate limit reached", retry_after=1.0)
+
+
+def _status_error(error_class, status_code, headers=None):
+    response = _Obj(status_code=status_code, headers=headers or {}, request=None)
+    return error_class("error", response=response, body=None)
+
+
+def test_backoff_delay_honors_retry_after():
+    for attempt in range(5):
+        assert 0 <= backoff_delay(attempt, base_delay=1.0, max_delay=8.0) <= 8.0
+    assert backoff_delay(0, base_delay=0.1, retry_after=5.0) >= 5.0
+
+
+def test_call_with_retry_retries_only_transient_errors(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise LLMRateLimitError("Rate limit reached")
+        return "ok"
+
+    assert call_with_retry(flaky, max_retries=5) == "ok"
+    assert len(attempts) == 3
+
+    def rejected():
+        attempts.append(1)
+        raise LLMRequestError("Bad request")
+
+    attempts.clear()
+    with pytest.raises(LLMRequestError):
+        call_with_retry(rejected, max_retries=5)
+    assert len(attempts) == 1
+
+
+def test_openai_errors_are_translated():
+    error = OpenAIClient._translate_error(_status_error(openai.RateLimitError, 429, {"retry-after": "7"}))
+    assert isinstance(error, LLMRateLimitError)
+    assert error.retry_after == 7.0
+
+    assert OpenAIClient._translate_error(_status_error(openai.InternalServerError, 503)).transient
+    assert not OpenAIClient._translate_error(_status_error(openai.BadRequestError, 400)).transient
+
+
+def test_bad_output_is_dead_lettered_after_max_attempts(databases):
+    fetch_db, processed_db = databases
+    article_id = store_articles(fetch_db, 1)[0]
+    enricher = ArticleEnricher(processed_db, max_enrichment_attempts=2)
+    enricher.llm = FakeLLM(response="not json")
+
+    with pytest.raises(LLMBadOutputError):
+        enricher.enrich_article(article_id, "Cheap flights to Lisbon")
+
+    enricher.process_pending_articles()
+    assert len(enricher.get_unprocessed_articles()) == 1
+    enricher.process_pending_articles()
+    assert enricher.get_unprocessed_articles() == []
+    assert processed_db.get_unprocessed_articles() == []
+
+    dead_letters = processed_db.get_dead_letters()
+    assert [row["fetched_article_id"] for row in dead_letters] == [article_id]
+    assert dead_letters[0]["attempts"] == 2
+    assert dead_letters[0]["error_type"] == "LLMBadOutputError"
+
+    # Once requeued and enriched successfully, the failure record is cleared
+    assert processed_db.requeue_dead_letters() == 1
+    enricher.llm = FakeLLM()
+    assert enricher.process_pending_articles() == 1
+    assert processed_db.conn.execute("SELECT COUNT(*) FROM enrichment_failures").fetchone()[0] == 0
+
+
+def test_rate_limits_never_dead_letter(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 2)
+    enricher = ArticleEnricher(processed_db, max_enrichment_attempts=1)
+    enricher.llm = RateLimitedLLM()
+
+    for _ in range(3):
+        assert enricher.process_pending_articles_concurrent() == 0
+
+    assert len(enricher.get_unprocessed_articles()) == 2
+    assert processed_db.get_dead_letters() == []
+    rows = processed_db.conn.execute("SELECT attempts, error_type FROM enrichment_failures").fetchall()
+    assert [tuple(row) for row in rows] == [(0, "LLMRateLimitError")] * 2
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from content.selection.article_selector import ArticleSelector
+from content.selection.scoring_engine import ScoringEngine, top_k
+from tests.fakes import store_catalog
+
+
+def test_top_k_matches_a_full_sort():
+    rng = np.random.default_rng(3)
+    scores = rng.random(100_000)
+    mask = rng.random(100_000) < 0.3
+
+    expected = np.flatnonzero(mask)[np.argsort(-scores[mask])][:25]
+
+    assert list(top_k(scores, mask, 25)) == list(expected)
+    assert len(top_k(scores, np.zeros(100_000, dtype=bool), 5)) == 0
+    assert list(top_k(np.zeros(4), np.ones(4, dtype=bool), 3)) == [0, 1, 2]
+
+
+def test_weights_retune_the_ranking(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db)
+    columns = selector.load_candidate_pool().columns()
+    deals = columns.type_mask('deal')
+
+    by_value = ScoringEngine().score(columns, 'winter', 'spring')
+    by_quality = ScoringEngine(weights={"value": 0}, source_quality={"Test Feed": 10}).score(columns, 'winter', 'spring')
+
+    assert columns.candidates[top_k(by_value, deals, 1)[0]].value_score == 9
+    assert np.allclose(by_quality[deals], by_quality[deals][0])
+    with pytest.raises(ValueError):
+        ScoringEngine(weights={"clicks": 1})
+
+
+def test_scored_selection_respects_policies_across_editions(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    selector = ArticleSelector(processed_db, scoring_engine=ScoringEngine())
+    pool = selector.load_candidate_pool()
+
+    first = selector.select_newsletter_content(pool=pool)
+    pool.mark_used(first['metadata']['article_ids'])
+    second = selector.select_newsletter_content(pool=pool)
+
+    assert first['featured_deals'][0]['deal_data']['value_score'] == 9
+    assert {guide['locations']['primary'] for guide in first['featured_destination_guides']} == {"lisbon"}
+    assert len(first['practical_tips']) == 1
+    assert len(first['metadata']['article_ids']) == len(set(first['metadata']['article_ids'])) == 8
+    assert not set(first['metadata']['article_ids']) & set(second['metadata']['article_ids'])
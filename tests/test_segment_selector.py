@@ -0,0 +1,81 @@
+import pytest
+from content.selection.article_selector import ArticleSelector
+from content.selection.scoring_engine import ScoringEngine
+from content.selection.segment_selector import SegmentSelector
+from content.writing.newsletter_writer import NewsletterWriter
+from tests.fakes import store_catalog
+
+
+def tag_deal(processed_db, destination, audience):
+    processed_db.conn.execute(
+        "UPDATE processed_articles SET audience = ? WHERE json_extract(deal_data, '$.destination') = ?",
+        (audience, destination)
+    )
+    processed_db.conn.commit()
+
+
+@pytest.fixture
+def segments(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    tag_deal(processed_db, "tokyo", '["Luxury"]')
+    tag_deal(processed_db, "paris", '["budget", "family"]')
+    selector = ArticleSelector(processed_db, scoring_engine=ScoringEngine())
+    return processed_db, selector, SegmentSelector(selector)
+
+
+def test_segments_lead_with_their_audience(segments):
+    processed_db, selector, segment_selector = segments
+    pool = selector.load_candidate_pool()
+
+    editions = segment_selector.select_segments(pool, ["budget", "luxury", "adventure"])
+
+    assert editions["luxury"]["featured_deals"][0]["deal_data"]["destination"] == "tokyo"
+    assert editions["budget"]["featured_deals"][0]["deal_data"]["destination"] == "paris"
+    # Without tagged candidates a segment gets the general edition
+    general = selector.select_scored(pool)
+    assert editions["adventure"]["metadata"]["article_ids"] == general["metadata"]["article_ids"]
+    assert editions["adventure"]["metadata"]["segment"] == "adventure"
+
+
+def test_all_segments_are_hydrated_with_one_query(segments):
+    processed_db, selector, segment_selector = segments
+    pool = selector.load_candidate_pool()
+    statements = []
+    processed_db.conn.set_trace_callback(statements.append)
+
+    editions = segment_selector.select_segments(pool)
+
+    processed_db.conn.set_trace_callback(None)
+    assert set(editions) == {"budget", "luxury", "family", "adventure"}
+    assert len(statements) == 1 and selector.hydrator.queries == 1
+    assert all(edition["featured_deals"] for edition in editions.values())
+
+
+def test_source_categories_boost_a_segment(segments):
+    processed_db, selector, _ = segments
+    segment_selector = SegmentSelector.from_sources(selector, [{"name": "Test Feed", "category": "budget"}])
+    pool = selector.load_candidate_pool()
+    base = selector.scoring_engine.score(pool.columns(), "summer", "autumn")
+
+    scores = segment_selector.segment_scores(pool, base, segment_selector.segments["budget"])
+
+    assert (scores - base).min() == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        segment_selector.select_segments(pool, ["students"])
+
+
+def test_articles_shared_by_segments_count_one_use(segments, monkeypatch):
+    processed_db, selector, segment_selector = segments
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    editions = segment_selector.select_segments(selector.load_candidate_pool(), ["budget", "luxury"])
+    shared = set(editions["budget"]["metadata"]["article_ids"]) & set(editions["luxury"]["metadata"]["article_ids"])
+    assert shared
+
+    NewsletterWriter(processed_db).update_editions_usage(editions)
+
+    placeholders = ",".join("?" * len(shared))
+    counts = processed_db.conn.execute(
+        f"SELECT used_count FROM processed_articles WHERE id IN ({placeholders})", list(shared)
+    ).fetchall()
+    assert [row["used_count"] for row in counts] == [1] * len(shared)
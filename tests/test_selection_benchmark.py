@@ -0,0 +1,50 @@
+import copy
+from benchmarks.selection_benchmark import benchmark_corpus, compare, format_results, run_mode
+from tests.fakes import store_catalog
+
+
+def test_synthetic_corpus_backtests_every_mode_without_violations(tmp_path):
+    results = benchmark_corpus("synthetic-400", tmp_path, ["sql", "pool", "scored"], editions=2, rows=400)
+
+    assert [result["mode"] for result in results] == ["sql", "pool", "scored"]
+    for result in results:
+        assert result["rows"] == 400 and result["failures"] == 0
+        assert result["violations"] == 0, result["violation_examples"]
+        assert result["fill"]["featured_deals"] == 1.0
+    # The pool modes load candidates and hydrate the selection, nothing else
+    assert [result["queries"] for result in results[1:]] == [2, 2]
+    assert results[0]["swept"] > 0
+    assert "scored" in format_results(results)
+
+
+def test_snapshot_replay_and_baseline_regressions(tmp_path, databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    snapshot = tmp_path / "snapshot.db"
+    processed_db.conn.execute(f"VACUUM INTO '{snapshot}'")
+
+    baseline = benchmark_corpus("snapshot", tmp_path / "run", ["pool"], editions=1, snapshot=str(snapshot))
+    assert baseline[0]["rows"] == 13 and baseline[0]["violations"] == 0
+
+    slower = copy.deepcopy(baseline)
+    slower[0]["select_p50_ms"] = baseline[0]["select_p50_ms"] * 3 + 10
+    slower[0]["queries"] += 1
+    slower[0]["fill"]["practical_tips"] = 0.0
+    assert len(compare(slower, baseline)) == 3
+    assert compare(baseline, baseline) == []
+
+
+def test_editions_record_usage_like_the_writer(databases):
+    fetch_db, processed_db = databases
+    store_catalog(fetch_db, processed_db)
+    recorded = []
+    record_usage = processed_db.record_usage
+    processed_db.record_usage = lambda ids: recorded.append(list(ids)) or record_usage(ids)
+
+    result = run_mode(processed_db, [], "pool", editions=2)
+
+    assert result["failures"] == 0 and len(recorded) == 2
+    # The second edition was selected against the usage recorded for the first
+    assert processed_db.usage_version == 2
+    row = processed_db.conn.execute("SELECT used_count FROM processed_articles WHERE id = ?", (recorded[0][0],)).fetchone()
+    assert row["used_count"] >= 1
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+import numpy as np
+from content.enriching.article_enricher import ArticleEnricher
+from content.selection.article_selector import ArticleSelector
+from content.selection.spatial_index import SpatialIndex, chord_to_km, to_unit_vectors
+from models.schemas import ProcessedArticle
+from tests.fakes import store_articles
+
+
+def test_query_radius_matches_brute_force():
+    rng = np.random.default_rng(7)
+    latitudes = np.degrees(np.arcsin(rng.uniform(-1, 1, 5000)))
+    longitudes = rng.uniform(-180, 180, 5000)
+    index = SpatialIndex(latitudes, longitudes, range(5000), leaf_size=16)
+
+    points = to_unit_vectors(latitudes, longitudes)
+    for latitude, longitude, radius in [(38.7, -9.1, 800), (-33.9, 151.2, 300), (0.0, 179.9, 1500)]:
+        distances = chord_to_km(np.linalg.norm(points - to_unit_vectors([latitude], [longitude])[0], axis=1))
+        expected = set(np.nonzero(distances <= radius)[0])
+
+        results = index.query_radius(latitude, longitude, radius)
+
+        assert {point_id for point_id, _ in results} == expected
+        assert [distance for _, distance in results] == sorted(distance for _, distance in results)
+
+
+def test_query_radius_returns_each_id_once_at_its_closest_point():
+    # One article covering both Lisbon and Sydney
+    index = SpatialIndex([38.72, -33.87, 41.16], [-9.14, 151.21, -8.63], ["guide", "guide", "porto"])
+
+    results = index.query_radius(38.72, -9.14, 500)
+
+    assert [point_id for point_id, _ in results] == ["guide", "porto"]
+    assert results[0][1] < 1
+    assert SpatialIndex([], [], []).query_radius(0, 0, 100) == []
+
+
+def test_nearby_guides_are_used_without_an_exact_match(databases):
+    fetch_db, processed_db = databases
+    enricher = ArticleEnricher(processed_db)
+    guides = []
+    for article_id, location in zip(store_articles(fetch_db, 3), ["Madrid", "Paris", "Porto"]):
+        guides.append(enricher.gazetteer.canonicalize(ProcessedArticle(
+            fetched_article_id=article_id,
+            content_type=["guide"],
+            locations={"primary": location, "secondary": []},
+            audience=[],
+            key_themes=[],
+            seasonality=[],
+            processed_date=datetime.now()
+        )))
+    enricher.save_articles(guides)
+    selector = ArticleSelector(processed_db, guide_radius_km=800)
+
+    assert selector.find_location_matching_guides("lisbon") == []
+    nearby = selector.find_nearby_guides("lisbon")
+
+    assert [json.loads(guide['locations'])['primary'] for guide in nearby] == ["porto", "madrid"]
+    assert 250 < nearby[0]['distance_km'] < 300
+    assert selector.find_nearby_guides("lisbon", used_ids=[nearby[0]['id']])[0]['id'] == nearby[1]['id']
+    assert selector.find_nearby_guides("koh lanta") == []
@@ -0,0 +1,126 @@
+import json
+import pytest
+from content.enriching.article_enricher import ArticleEnricher
+from content.enriching.structured_output import (
+    BOOKKEEPING_FIELDS, enrichment_response_format, repair_fields, repair_json
+)
+from models.schemas import ProcessedArticle
+from tests.fakes import ENRICHED_RESPONSE, FakeLLM
+
+
+class SequenceLLM(FakeLLM):
+    """Returns the given responses in order, recording the response formats requested"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.formats = []
+
+    def analyze(self, system_prompt, content, response_format=None, **kwargs):
+        self.calls.append(content)
+        self.formats.append(response_format)
+        return self.responses.pop(0)
+
+
+def schema_nodes(schema):
+    """Every schema nested in a JSON schema, itself included"""
+    if isinstance(schema, list):
+        for item in schema:
+            yield from schema_nodes(item)
+    elif isinstance(schema, dict):
+        yield schema
+        for key, value in schema.items():
+            yield from schema_nodes(list(value.values()) if key in ("properties", "$defs") else value)
+
+
+def test_schema_covers_the_model_without_bookkeeping_fields():
+    schema = enrichment_response_format()["json_schema"]["schema"]
+
+    assert set(schema["properties"]) == set(ProcessedArticle.model_fields) - BOOKKEEPING_FIELDS
+    assert "fetched_article_id" not in schema["required"]
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_response_format_is_strict(packed):
+    response_format = enrichment_response_format(packed)["json_schema"]
+    nodes = list(schema_nodes(response_format["schema"]))
+    objects = [node for node in nodes if "properties" in node]
+
+    assert response_format["strict"] is True
+    assert len(objects) >= 4
+    for schema in objects:
+        assert schema["additionalProperties"] is False
+        assert schema["required"] == list(schema["properties"])
+    for node in nodes:
+        assert "default" not in node
+        # No loose unions: a union only ever makes a single type nullable
+        if "anyOf" in node:
+            assert len([option for option in node["anyOf"] if option != {"type": "null"}]) == 1
+
+
+def test_null_fields_of_strict_output_validate(databases):
+    _, processed_db = databases
+    response = {**ENRICHED_RESPONSE, "deal_data": {
+        "type": ["hotel"], "price_tier": ["luxury"], "value_score": None, "booking_deadline": None,
+        "travel_window": {"start": None, "end": None}, "origin": None, "destination": "lisbon"
+    }}
+    llm = SequenceLLM([json.dumps(response)])
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = llm
+
+    processed = enricher.enrich_article(1, "content")
+
+    assert (processed.deal_data.booking_deadline, processed.deal_data.origin) == ("", "")
+    assert len(llm.calls) == 1
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": [1, 2,], "b": None}\n```',
+    'Here is the result: {"a": [1, 2], "b": null} Hope this helps!',
+    '{"a": [1, 2], "b": null',
+])
+def test_repair_json_fixes_common_syntax_defects(text):
+    assert repair_json(text) == {"a": [1, 2], "b": None}
+
+
+def test_repair_json_gives_up_on_garbage():
+    assert repair_json("I could not analyze this article") is None
+
+
+def test_repair_fields_fills_missing_values():
+    data = {**ENRICHED_RESPONSE, "locations": {"primary": "japan"}, "audience": "budget"}
+    data["deal_data"] = {**ENRICHED_RESPONSE["deal_data"], "value_score": "7.6"}
+
+    repaired = repair_fields(data)
+
+    assert repaired["locations"] == {"primary": "japan", "secondary": []}
+    assert repaired["audience"] == ["budget"]
+    assert repaired["deal_data"]["value_score"] == 8
+
+
+def test_local_repair_avoids_extra_calls(databases):
+    _, processed_db = databases
+    broken = {**ENRICHED_RESPONSE, "locations": {"primary": "portugal"}}
+    llm = SequenceLLM(["```json\n" + json.dumps(broken) + "\n```"])
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = llm
+
+    processed = enricher.enrich_article(1, "content")
+
+    assert processed.locations.secondary == []
+    assert len(llm.calls) == 1
+    assert llm.formats[0]["type"] == "json_schema"
+
+
+def test_follow_up_fix_call_only_sends_the_broken_output(databases):
+    _, processed_db = databases
+    llm = SequenceLLM(["content_type: deal, oops", json.dumps(ENRICHED_RESPONSE)])
+    enricher = ArticleEnricher(processed_db)
+    enricher.llm = llm
+
+    processed = enricher.enrich_article(1, "A long article body about Lisbon")
+
+    assert processed.locations.primary == "portugal"
+    assert len(llm.calls) == 2
+    assert "content_type: deal, oops" in llm.calls[1]
+    assert "A long article body" not in llm.calls[1]
@@ -0,0 +1,104 @@
+import pytest
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from content.enriching.article_enricher import ArticleEnricher
+from services.openai import retry
+from services.openai.errors import LLMServiceError
+from services.openai.openai_client import OpenAIClient
+from services.openai.rate_limiter import estimate_tokens
+from services.openai.response_cache import ResponseCache
+from services.openai.telemetry import LLMTelemetry, call_cost
+from services.openai.telemetry_report import format_report, percentile, run_summary, source_summary
+from tests.fakes import FakeChatAPI, store_articles
+
+
+class FlakyChatAPI(FakeChatAPI):
+    """Chat API whose first request fails with a server error"""
+
+    def _create(self, model, messages, **kwargs):
+        if not self.requests:
+            self.requests.append(None)
+            raise LLMServiceError("Service unavailable")
+        return super()._create(model, messages, **kwargs)
+
+
+def test_calls_are_recorded_with_usage_cost_and_cache_hits():
+    telemetry = LLMTelemetry(":memory:", run_id="run-1")
+    client = OpenAIClient(api_key="test-key", cache=ResponseCache(":memory:"), telemetry=telemetry)
+    client.client = FakeChatAPI(response='{"ok": true}')
+
+    client.analyze("prompt", "content", caller="enrichment", article_ids=[7])
+    client.analyze("prompt", "content", caller="enrichment", article_ids=[7])
+    telemetry.flush()
+
+    rows = telemetry.conn.execute("SELECT * FROM llm_calls ORDER BY id").fetchall()
+    assert [(row["caller"], row["cache_hit"], row["prompt_tokens"], row["completion_tokens"]) for row in rows] == [
+        ("enrichment", 0, 100, 50), ("enrichment", 1, 0, 0)
+    ]
+    assert rows[0]["cost_usd"] == pytest.approx(call_cost("gpt-4o-mini", 100, 50))
+    assert rows[1]["cost_usd"] == 0
+    assert telemetry.run_totals() == {"calls": 2, "cache_hits": 1, "tokens": 150, "cost_usd": rows[0]["cost_usd"]}
+
+
+def test_retries_and_failures_are_recorded(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    telemetry = LLMTelemetry(":memory:", run_id="run-1")
+    client = OpenAIClient(api_key="test-key", telemetry=telemetry, max_retries=1)
+
+    client.client = FlakyChatAPI()
+    client.analyze("prompt", "content")
+    client.client = FlakyChatAPI()
+    client.max_retries = 0
+    with pytest.raises(LLMServiceError):
+        client.analyze("prompt", "content")
+    telemetry.flush()
+
+    rows = telemetry.conn.execute("SELECT retries, error_type FROM llm_calls ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(1, None), (0, "LLMServiceError")]
+
+
+def test_call_cost_uses_longest_model_prefix():
+    assert call_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+    assert call_cost("gpt-4o", 0, 1_000_000) == pytest.approx(10.0)
+    assert call_cost("gpt-4o-mini", 1_000_000, 0, batch=True) == pytest.approx(0.075)
+    assert call_cost("local-llama", 100, 100) is None
+    assert percentile([1, 2, 3, 4], 50) == pytest.approx(2.5)
+    assert percentile([], 95) is None
+
+
+def test_report_attributes_cost_to_sources(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 3)
+    telemetry = LLMTelemetry("main", run_id="run-1")
+    enricher = ArticleEnricher(processed_db, telemetry=telemetry)
+    enricher.llm.client = FakeChatAPI()
+
+    assert enricher.process_pending_articles() == 3
+    telemetry.flush()
+
+    run = run_summary(telemetry.conn, "run-1")
+    assert (run["calls"], run["articles"], run["tokens_per_article"]) == (3, 3, 150)
+    assert run["p50_ms"] is not None
+    sources = source_summary(telemetry.conn, ["run-1"])
+    assert [(source["source_name"], source["articles"]) for source in sources] == [("Test Feed", 3)]
+    assert sources[0]["cost_usd"] == pytest.approx(run["cost_usd"])
+    assert "Test Feed" in format_report(telemetry.conn, ["run-1"])
+    telemetry.close()
+
+
+def test_stream_closed_early_is_recorded_as_aborted_with_estimated_tokens(monkeypatch):
+    with FakeOpenAIServer() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        telemetry = LLMTelemetry(":memory:", run_id="run-1")
+        client = OpenAIClient(api_key="test-key", cache=ResponseCache(":memory:"), telemetry=telemetry)
+
+        stream = client.analyze_stream("Write the newsletter", "content", caller="newsletter")
+        first = next(stream)
+        stream.close()
+    telemetry.flush()
+
+    row = telemetry.conn.execute("SELECT * FROM llm_calls").fetchone()
+    assert row["error_type"] == "aborted"
+    assert row["completion_tokens"] == estimate_tokens(first)
+    assert row["prompt_tokens"] > 0
+    # A partial completion is never cached
+    assert client.cache.stats()["entries"] == 0
@@ -0,0 +1,54 @@
+from content.enriching.token_budget import TokenBudget, count_tokens
+from content.enriching.article_enricher import ArticleEnricher
+from tests.fakes import FakeLLM, store_articles
+
+
+FILLER = "The weather was pleasant and we enjoyed a long walk around the neighborhood. "
+
+
+def test_short_content_is_sent_unchanged():
+    budget = TokenBudget(max_tokens=500)
+    prepared = budget.fit("Flights to Rome from $450.", title="Rome deal")
+
+    assert prepared["truncated"] is False
+    assert prepared["text"] == "Rome deal\n\nFlights to Rome from $450."
+    assert prepared["tokens"] == prepared["original_tokens"]
+
+
+def test_long_content_keeps_lead_and_deal_details_within_budget():
+    content = (
+        "This is the opening of a very long guide. "
+        + FILLER * 200
+        + "Round-trip fares to Tokyo start at $612 if you book by March 15. "
+        + FILLER * 200
+    )
+    budget = TokenBudget(max_tokens=300)
+    prepared = budget.fit(content, title="Japan guide")
+
+    assert prepared["truncated"] is True
+    assert prepared["tokens"] <= 300
+    assert prepared["original_tokens"] > 300
+    assert prepared["text"].startswith("Japan guide\n\nThis is the opening")
+    assert "$612" in prepared["text"]
+    assert "[...]" in prepared["text"]
+
+
+def test_run_on_text_without_sentence_breaks_is_truncated():
+    budget = TokenBudget(max_tokens=200)
+    prepared = budget.fit("word " * 5000)
+
+    assert 0 < prepared["tokens"] <= 200
+
+
+def test_token_counts_are_recorded(databases):
+    fetch_db, processed_db = databases
+    store_articles(fetch_db, 1, content="Flights to Lisbon from $299. " + FILLER * 300)
+    enricher = ArticleEnricher(processed_db, max_content_tokens=400)
+    enricher.llm = FakeLLM()
+
+    enricher.process_pending_articles()
+
+    row = processed_db.conn.execute("SELECT input_tokens, original_tokens FROM processed_articles").fetchone()
+    assert row["input_tokens"] <= 400
+    assert row["original_tokens"] > row["input_tokens"]
+    assert count_tokens(enricher.llm.calls[0]) == row["input_tokens"]